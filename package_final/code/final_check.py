@@ -4,6 +4,10 @@ import pandas as pd
 import sys
 import os
 
+# Modules du projet (stockage): le script est lancé depuis scripts/
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import stockage
+
 class ValidationFinale:
     def __init__(self):
         self.project_path = Path('..')
@@ -71,6 +75,8 @@ class ValidationFinale:
         for dossier, fichiers in fichiers_requis.items():
             for fichier in fichiers:
                 chemin = self.project_path / dossier / fichier
+                if dossier == 'data/processed':
+                    chemin = self._table_processed(fichier)
                 if not chemin.exists():
                     self.avertissements.append(f"⚠️ Fichier manquant: {dossier}/{fichier}")
                 else:
@@ -94,7 +100,7 @@ class ValidationFinale:
             },
             {
                 'nom': 'Chargement des données',
-                'code': "pd.read_csv('../data/processed/sales_facts_clean.csv')",
+                'code': "self._lire_sales_facts()",
                 'critique': True
             },
             {
@@ -117,20 +123,35 @@ class ValidationFinale:
         
         return len([e for e in self.erreurs if 'critique' in e]) == 0
     
+    def _table_processed(self, fichier_csv):
+        """Table nettoyée dans le format publié par l'ETL (partitions, parquet, feather, csv)"""
+        dossier = self.project_path / 'data/processed'
+        chemin = stockage.trouver_table(dossier, Path(fichier_csv).stem.removesuffix('_clean'))
+        return chemin if chemin is not None else dossier / fichier_csv
+    
+    def _lire_sales_facts(self):
+        """sales_facts lue quel que soit le format de publication"""
+        df = stockage.lire_table(self.project_path / 'data/processed', 'sales_facts')
+        if df is None:
+            raise FileNotFoundError("sales_facts_clean absente de data/processed")
+        return df
+    
     def verifier_donnees(self):
         """Vérifie la qualité des données"""
         print("\n📊 VÉRIFICATION DES DONNÉES...")
         
         try:
-            df = pd.read_csv(self.project_path / 'data/processed/sales_facts_clean.csv')
+            df = self._lire_sales_facts()
             
             # Vérifications de base
             if len(df) == 0:
-                self.erreurs.append("❌ Aucune donnée dans sales_facts_clean.csv")
+                self.erreurs.append("❌ Aucune donnée dans sales_facts_clean")
                 return False
             
             # Colonnes requises
-            colonnes_requises = ['order_id', 'order_date', 'customer_company', 'product_name', 'Line Total']
+            # Montant de ligne: snake_case (etl.py) ou libellé d'origine (etl_main.py)
+            colonne_ca = 'line_total' if 'line_total' in df.columns else 'Line Total'
+            colonnes_requises = ['order_id', 'order_date', 'customer_company', 'product_name', colonne_ca]
             for col in colonnes_requises:
                 if col not in df.columns:
                     self.erreurs.append(f"❌ Colonne manquante: {col}")
@@ -141,7 +162,7 @@ class ValidationFinale:
                 self.avertissements.append(f"⚠️ {valeurs_manquantes} valeurs manquantes dans les colonnes critiques")
             
             # Vérifier cohérence des données
-            ca_total = df['Line Total'].sum()
+            ca_total = df[colonne_ca].sum()
             if ca_total <= 0:
                 self.erreurs.append("❌ Chiffre d'affaires total invalide")
             
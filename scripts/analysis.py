@@ -5,74 +5,379 @@ from pathlib import Path
 import logging
 from datetime import datetime, timedelta
 import json
+import os
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import schema_etoile
+import calendrier
+import encodage
+import stockage
+import instrumentation
+import sketches
+import cube
+import index_temporel
+import cohortes
+import rfm
+import etat_kpi
+import backend_sql
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Tables partagées déjà ouvertes dans ce processus (worker): chemin -> DataFrame
+_TABLES_PARTAGEES = {}
+
+
+def _table_partagee(chemin):
+    """Table Arrow IPC non compressée, projetée en mémoire (mmap) et ouverte une fois par worker"""
+    if chemin not in _TABLES_PARTAGEES:
+        from pyarrow import feather
+        # split_blocks: les colonnes numériques restent des vues sur les pages projetées
+        _TABLES_PARTAGEES[chemin] = feather.read_table(chemin, memory_map=True).to_pandas(split_blocks=True)
+    return _TABLES_PARTAGEES[chemin]
+
+
+def _executer_etape(etape, tables, parametres, kpis_requis, etapes_faites):
+    """Exécute une étape d'analyse dans un worker sur les tables partagées
+
+    kpis_requis: KPI des étapes dont elle dépend, déjà calculés par d'autres
+    workers. Retourne les KPI produits, les lignes de rapport, la durée et
+    les mesures d'instrumentation du worker.
+    """
+    analyse = AnalyseNorthwind(**parametres)
+    analyse.donnees = {nom: _table_partagee(chemin) for nom, chemin in tables.items() if not nom.startswith('cube_')}
+    cuboides = {nom[len('cube_'):]: _table_partagee(chemin) for nom, chemin in tables.items() if nom.startswith('cube_')}
+    if cuboides:
+        analyse.cube = cube.CubeVentes.depuis_cuboides(cuboides)
+    if analyse.backend == 'sql':
+        analyse.sql = backend_sql.BackendSQL.ouvrir(analyse.data_path, analyse.debut, analyse.fin)
+    analyse._indexer_ventes()
+    analyse.kpis.update(kpis_requis)
+    for faite in etapes_faites:
+        analyse._marquer_evaluee(faite)
+    
+    debut = time.perf_counter()
+    analyse._executer_etape(etape)
+    duree = time.perf_counter() - debut
+    produits = {nom: valeur for nom, valeur in analyse.kpis.items() if nom not in kpis_requis}
+    return produits, analyse.rapport_analyse, duree, instrumentation.extraire()
+
+
+def _comparer_kpis(obtenus, attendus, rtol=1e-9):
+    """Noms des KPI de attendus absents ou différents dans obtenus (tri d'index, tolérance relative)"""
+    def comparer(nom, obtenu, attendu):
+        if isinstance(attendu, dict):
+            return all([comparer(f"{nom}.{cle}", (obtenu or {}).get(cle), valeur) for cle, valeur in attendu.items()])
+        try:
+            assert obtenu is not None, "absent"
+            if isinstance(attendu, (pd.DataFrame, pd.Series)):
+                assert isinstance(obtenu, type(attendu)), f"type {type(obtenu).__name__}"
+                verification = pd.testing.assert_frame_equal if isinstance(attendu, pd.DataFrame) else pd.testing.assert_series_equal
+                verification(obtenu.sort_index(), attendu.sort_index(), check_dtype=False, check_index_type=False,
+                             check_categorical=False, check_exact=False, rtol=rtol)
+            elif isinstance(attendu, (int, float, np.number)):
+                assert np.isclose(obtenu, attendu, rtol=rtol), f"{obtenu} != {attendu}"
+        except AssertionError as e:
+            logging.error(f"❌ KPI {nom}: {e}")
+            return False
+        return True
+    
+    return [nom for nom, attendu in attendus.items() if not comparer(nom, obtenus.get(nom), attendu)]
+
 class AnalyseNorthwind:
-    def __init__(self):
+    # KPI fondamentaux: agrégat global des ventes (colonne, fonction)
+    TOTAUX_VENTES = {
+        'chiffre_affaires_total': ('line_total', 'sum'),
+        'profit_total': ('profit', 'sum'),
+        'nombre_commandes': ('order_id', 'nunique'),
+        'nombre_clients': ('customer_company', 'nunique'),
+        'nombre_produits_vendus': ('product_name', 'nunique'),
+        'quantite_totale_vendue': ('quantity', 'sum')
+    }
+    # KPI moyens: (numérateur, dénominateur, facteur), 0 si le dénominateur est nul
+    RATIOS_VENTES = {
+        'marge_moyenne': ('profit_total', 'chiffre_affaires_total', 100),
+        'panier_moyen': ('chiffre_affaires_total', 'nombre_commandes', 1),
+        'profit_par_commande': ('profit_total', 'nombre_commandes', 1),
+        'quantite_moyenne_par_commande': ('quantite_totale_vendue', 'nombre_commandes', 1)
+    }
+    # Étapes d'analyse: méthode -> (KPI produits, KPI dont elle dépend).
+    # L'ordre de déclaration est celui de l'analyse complète (et du rapport).
+    ETAPES_KPI = {
+        'analyser_tendances_temporelles': (('ventes_par_mois', 'croissance_mensuelle', 'ventes_par_jour'), ()),
+        'analyser_performance_produits': (('top_produits_ca', 'top_produits_quantite', 'top_produits_profit',
+                                           'performance_categories'), ()),
+        'analyser_comportement_clients': (('top_clients', 'segmentation_clients', 'seuils_segmentation',
+                                           'performance_geographique'), ()),
+        'analyser_rfm': (('rfm_clients', 'segments_rfm'), ()),
+        'analyser_performance_commerciale': (('performance_employes',), ()),
+        'analyser_efficacite_operationnelle': (('delai_livraison_moyen', 'delai_livraison_median', 'delai_livraison_p90',
+                                                'delai_livraison_p99', 'taux_livraison_rapide',
+                                                'performance_transporteurs', 'methodes_paiement'), ()),
+        'analyser_gestion_stock': (('analyse_stock',), ()),
+        'calculer_taux_croissance': (('taux_croissance_mensuel',), ()),
+        'calculer_clv': (('clv_moyen',), ('top_clients',)),
+        'analyser_cohortes': (('retention_cohortes', 'retention_ca_cohortes', 'taille_cohortes', 'churn_mensuel',
+                               'taux_retention_mensuel', 'taux_churn_mensuel', 'retention_m1_moyenne'), ())
+    }
+    
+    def __init__(self, debut=None, fin=None, erreur_distincts=None, utiliser_cube=True,
+                 execution_parallele=False, n_workers=None, backend='pandas'):
         self.data_path = Path('../data/processed')
+        # Période analysée (bornes incluses); None = tout l'historique
+        self.debut = debut
+        self.fin = fin
+        # None: nunique exact; sinon comptes distincts estimés par HyperLogLog à cette erreur type
+        self.erreur_distincts = erreur_distincts
+        # Cube d'agrégats construit une fois au chargement; les analyses y lisent leurs groupby
+        self.utiliser_cube = utiliser_cube and erreur_distincts is None
+        self.cube = None
+        # Faits triés par date: les périodes sont des tranches (recherche dichotomique)
+        self.index_temporel = None
+        # 'sql': agrégats des ventes calculés par la base embarquée (etl.py --base-sql),
+        # 'pandas': tables lues et agrégées en mémoire (implémentation de référence)
+        self.backend = backend
+        self.sql = None
+        # État agrégé persisté entre deux analyses (mode incrémental)
+        self.etat_path = Path('../data/analysis/etat_kpi')
+        self._signatures_faits = None
+        self._etat = None
+        # Étapes indépendantes exécutées dans un pool de processus sur des tables partagées
+        self.execution_parallele = execution_parallele
+        self.n_workers = n_workers
+        self.stats_execution = {}
         self.figures_path = Path('../figures')
         self.donnees = {}
         self.kpis = {}
         self.rapport_analyse = []
-        
-    def charger_donnees_propres(self):
-        """Charge les données nettoyées depuis le dossier processed"""
+        # KPI évalués à la demande: graphe des dépendances et étapes déjà calculées
+        # pour la version courante des données
+        self.graphe_kpi = self._construire_graphe()
+        self.version_donnees = 0
+        self._etapes_evaluees = set()
+        
+    def _construire_graphe(self):
+        """KPI -> (étape qui le calcule, fonction de calcul, KPI dont il dépend)"""
+        graphe = {}
+        for nom in self.TOTAUX_VENTES:
+            graphe[nom] = (nom, lambda nom=nom: self._calculer_total(nom), ())
+        for nom, (numerateur, denominateur, _) in self.RATIOS_VENTES.items():
+            graphe[nom] = (nom, lambda nom=nom: self._calculer_ratio(nom), (numerateur, denominateur))
+        for etape, (produits, dependances) in self.ETAPES_KPI.items():
+            for nom in produits:
+                graphe[nom] = (etape, getattr(self, etape), dependances)
+        return graphe
+    
+    def _nouvelle_version(self):
+        """Données (ou cube) remplacées: les KPI mémoïsés sont à recalculer"""
+        self.version_donnees += 1
+        self.kpis.clear()
+        self.rapport_analyse.clear()
+        self._etapes_evaluees.clear()
+    
+    def _evaluer(self, nom, en_cours=()):
+        etape, calcul, dependances = self.graphe_kpi[nom]
+        if etape in self._etapes_evaluees:
+            return
+        if etape in en_cours:
+            raise ValueError(f"Dépendance circulaire entre KPI: {' -> '.join(en_cours + (etape,))}")
+        for dependance in dependances:
+            self._evaluer(dependance, en_cours + (etape,))
+        calcul()
+        self._etapes_evaluees.add(etape)
+    
+    def kpi(self, nom, defaut=None):
+        """Valeur d'un KPI, calculée à la première demande avec ses seules dépendances
+        
+        Le résultat est mémoïsé jusqu'au prochain chargement des données. defaut
+        est retourné pour un KPI non calculable sur ces données (table absente...).
+        """
+        if nom not in self.graphe_kpi:
+            raise KeyError(f"KPI inconnu: {nom}")
+        self._evaluer(nom)
+        return self.kpis.get(nom, defaut)
+    
+    def definir_ventes(self, faits):
+        """Analyse les faits de vente fournis (nommage etl.py ou *_main) au lieu de les charger"""
+        if self.utiliser_cube:
+            self.donnees['sales_facts'] = faits
+            self.cube = cube.CubeVentes.construire(faits)
+        else:
+            self.donnees['sales_facts'] = cube.preparer_faits(faits)
+        self._indexer_ventes()
+        self._nouvelle_version()
+    
+    def _indexer_ventes(self):
+        """Index temporel des faits chargés (triés par date s'ils ne le sont pas déjà)"""
+        faits = self.donnees.get('sales_facts')
+        self.index_temporel = None
+        if faits is not None and not faits.columns.intersection(cube.COLONNES['order_date']).empty:
+            self.index_temporel = index_temporel.IndexTemporel(faits)
+            self.donnees['sales_facts'] = self.index_temporel.faits
+    
+    def ventes_periode(self, debut=None, fin=None):
+        """Faits de vente de la période [debut, fin]: tranche de l'index temporel, sans masque"""
+        if self.index_temporel is None:
+            faits = self.donnees.get('sales_facts')
+            return None if faits is None else stockage.filtrer_periode(faits, 'order_date', debut, fin)
+        return self.index_temporel.tranche(debut, fin)
+        
+    def charger_donnees_propres(self, avec_faits=True):
+        """Charge les données nettoyées depuis le dossier processed
+        
+        avec_faits=False: la table de faits n'est pas lue (ventes servies par l'état KPI)
+        """
         logging.info("📥 CHARGEMENT DES DONNÉES NETTOYÉES")
         
-        fichiers = {
-            'sales_facts': 'sales_facts_clean.csv',
-            'products': 'products_clean.csv', 
-            'customers': 'customers_clean.csv',
-            'employees': 'employees_clean.csv',
-            'orders': 'orders_clean.csv',
-            'order_details': 'order_details_clean.csv',
-            'inventory': 'inventory_clean.csv'
-        }
-        
-        for nom, fichier in fichiers.items():
+        if self.backend == 'sql' and avec_faits:
+            self.sql = backend_sql.BackendSQL.ouvrir(self.data_path, self.debut, self.fin)
+            if self.sql is not None:
+                return self._charger_depuis_sql()
+            logging.warning("⚠️ Base SQL absente ou périmée (etl.py --base-sql): tables lues par pandas")
+        
+        tables = ['sales_facts', 'products', 'customers', 'employees', 'orders', 'order_details', 'inventory']
+        if not avec_faits:
+            tables.remove('sales_facts')
+        
+        # Schéma en étoile publié: la vue des faits est reconstruite à partir
+        # des clés entières (colonnes texte catégorielles) au lieu du CSV large
+        dictionnaires = encodage.charger_dictionnaires(self.data_path)
+        # Analyse sur une période: lecture des seules partitions concernées
+        periode = self.debut is not None or self.fin is not None
+        if avec_faits and self.utiliser_cube and not periode:
+            # Fichiers de faits lus par cette analyse, repères du prochain passage incrémental
+            self._signatures_faits = etat_kpi.signatures_faits(self.data_path)
+        schema = None if periode or not avec_faits else schema_etoile.charger_schema(self.data_path)
+        if schema is not None:
+            self.donnees['sales_facts'] = encodage.encoder(schema_etoile.denormaliser(schema), dictionnaires)
+            tables.remove('sales_facts')
+            logging.info(f"✅ Schéma en étoile chargé ({len(self.donnees['sales_facts'])} faits)")
+        
+        for nom in tables:
             try:
-                chemin = self.data_path / fichier
-                if chemin.exists():
-                    # Chargement avec parsing des dates pour sales_facts
-                    if nom == 'sales_facts':
-                        self.donnees[nom] = pd.read_csv(chemin, parse_dates=['order_date'])
-                    else:
-                        self.donnees[nom] = pd.read_csv(chemin)
+                # Format détecté (parquet > feather > csv), parsing des dates pour sales_facts
+                # et colonnes texte du schéma en catégorielles
+                chemin = stockage.trouver_table(self.data_path, nom)
+                if chemin is not None:
+                    df = stockage.lire_table(
+                        self.data_path, nom, parse_dates=['order_date'] if nom == 'sales_facts' else None,
+                        dictionnaires=dictionnaires,
+                        debut=self.debut if nom in ('sales_facts', 'orders') else None,
+                        fin=self.fin if nom in ('sales_facts', 'orders') else None
+                    )
+                    if df is None:
+                        logging.warning(f"⚠️ Aucune ligne de {nom} sur la période")
+                        continue
+                    if nom == 'sales_facts' and 'order_date' in df.columns:
+                        # Grain jour, comme les faits reconstruits du schéma en étoile
+                        df['order_date'] = df['order_date'].dt.normalize()
                     
-                    logging.info(f"✅ {fichier} chargé ({len(self.donnees[nom])} lignes)")
+                    self.donnees[nom] = df
+                    logging.info(f"✅ {chemin.name} chargé ({len(df)} lignes)")
                 else:
-                    logging.warning(f"⚠️ Fichier non trouvé: {fichier}")
+                    logging.warning(f"⚠️ Table non trouvée: {nom}")
             except Exception as e:
-                logging.error(f"❌ Erreur avec {fichier}: {e}")
+                logging.error(f"❌ Erreur avec {nom}: {e}")
+        
+        self._indexer_ventes()
+        if self.utiliser_cube and 'sales_facts' in self.donnees:
+            self.cube = cube.CubeVentes.construire(self.donnees['sales_facts'])
+        self._nouvelle_version()
+    
+    def _charger_depuis_sql(self):
+        """Petites tables lues dans la base embarquée; la table de faits y reste (agrégats en SQL)"""
+        dictionnaires = encodage.charger_dictionnaires(self.data_path)
+        for nom in ['products', 'customers', 'employees', 'orders', 'order_details', 'inventory']:
+            df = self.sql.lire_table(nom, periode=nom == 'orders')
+            if df is None or df.empty:
+                logging.warning(f"⚠️ Table absente de la base SQL: {nom}")
+                continue
+            self.donnees[nom] = encodage.encoder(df, dictionnaires)
+            logging.info(f"✅ {nom} lu dans {self.sql.chemin.name} ({len(df)} lignes)")
+        logging.info(f"🗄️ Ventes agrégées par {self.sql.moteur} ({self.sql.chemin.name}), table de faits non chargée")
+        self._nouvelle_version()
                 
         return self.donnees
     
+    def _agreger(self, df, cles, specs):
+        """df.groupby(cles).agg(specs), les 'nunique' passant par HyperLogLog en mode approché"""
+        groupes = df.groupby(cles, observed=True)
+        if self.erreur_distincts is None:
+            return groupes.agg(specs)
+        
+        fonctions = {colonne: list(f) if isinstance(f, (list, tuple)) else [f] for colonne, f in specs.items()}
+        distinctes = [colonne for colonne, liste in fonctions.items() if 'nunique' in liste]
+        if not distinctes:
+            return groupes.agg(specs)
+        
+        # Agrégats exacts sans les 'nunique'; 'size' réserve la place d'une colonne
+        # qui n'a rien d'autre à calculer, remplie ensuite par les sketches
+        exacts = {colonne: [f for f in liste if f != 'nunique'] or ['size'] for colonne, liste in fonctions.items()}
+        resultat = groupes.agg(exacts)
+        for colonne in distinctes:
+            estimees = sketches.distincts_par_groupe(df, cles, colonne, self.erreur_distincts)
+            resultat[(colonne, 'nunique')] = estimees.reindex(resultat.index).to_numpy()
+        
+        # Colonnes et forme de groupes.agg(specs): MultiIndex seulement si une spec est une liste
+        resultat = resultat[[(colonne, f) for colonne, liste in fonctions.items() for f in liste]]
+        if not any(isinstance(f, (list, tuple)) for f in specs.values()):
+            resultat.columns = resultat.columns.get_level_values(0)
+        return resultat
+    
+    def _agreger_ventes(self, cles, specs):
+        """Agrégat des faits de vente: requête SQL, cube s'il est construit, sinon groupby sur les faits"""
+        if self.sql is not None:
+            return self.sql.agreger(cles, specs)
+        if self.cube is not None:
+            return self.cube.agreger(cles, specs)
+        
+        df = self.donnees['sales_facts']
+        # Attributs calendaires lus dans la dimension date (pas de formatage par ligne)
+        for cle, attribut in (('mois_annee', 'periode_mois'), ('jour_semaine', 'day_name')):
+            if cle in ([cles] if isinstance(cles, str) else cles) and cle not in df.columns:
+                calendrier.enrichir(df, 'order_date', [attribut], [cle])
+        return self._agreger(df, cles, specs)
+    
+    def _total_ventes(self, colonne, fonction='sum'):
+        """Agrégat global d'une colonne des faits (SQL, cube ou faits)"""
+        if self.sql is not None:
+            return self.sql.total(colonne, fonction)
+        if self.cube is not None:
+            return self.cube.total(colonne, fonction)
+        serie = self.donnees['sales_facts'][colonne]
+        if fonction == 'nunique':
+            return sketches.compter_distincts(serie, self.erreur_distincts)
+        return serie.agg(fonction)
+    
+    def _ventes_disponibles(self):
+        return self.sql is not None or self.cube is not None or 'sales_facts' in self.donnees
+    
+    def a_colonne_ventes(self, colonne):
+        if self.sql is not None:
+            return self.sql.a_colonne(colonne)
+        if self.cube is not None:
+            return self.cube.a_colonne(colonne)
+        return colonne in self.donnees['sales_facts'].columns
+    
+    def _calculer_total(self, nom):
+        colonne, fonction = self.TOTAUX_VENTES[nom]
+        self.kpis[nom] = self._total_ventes(colonne, fonction)
+    
+    def _calculer_ratio(self, nom):
+        numerateur, denominateur, facteur = self.RATIOS_VENTES[nom]
+        self.kpis[nom] = (self.kpis[numerateur] / self.kpis[denominateur] * facteur) if self.kpis[denominateur] > 0 else 0
+    
     def calculer_kpi_fondamentaux(self):
         """Calcule les KPI business fondamentaux"""
         logging.info("💰 CALCUL DES KPI FONDAMENTAUX")
         
-        if 'sales_facts' not in self.donnees:
+        if not self._ventes_disponibles():
             logging.error("❌ Table 'sales_facts' manquante pour l'analyse")
             return
         
-        df = self.donnees['sales_facts']
-        
-        # KPI VENTES
-        self.kpis['chiffre_affaires_total'] = df['line_total'].sum()
-        self.kpis['profit_total'] = df['profit'].sum()
-        self.kpis['marge_moyenne'] = (self.kpis['profit_total'] / self.kpis['chiffre_affaires_total'] * 100) if self.kpis['chiffre_affaires_total'] > 0 else 0
-        
-        # KPI VOLUMES
-        self.kpis['nombre_commandes'] = df['order_id'].nunique()
-        self.kpis['nombre_clients'] = df['customer_company'].nunique()
-        self.kpis['nombre_produits_vendus'] = df['product_name'].nunique()
-        self.kpis['quantite_totale_vendue'] = df['quantity'].sum()
-        
-        # KPI MOYENS
-        self.kpis['panier_moyen'] = self.kpis['chiffre_affaires_total'] / self.kpis['nombre_commandes']
-        self.kpis['profit_par_commande'] = self.kpis['profit_total'] / self.kpis['nombre_commandes']
-        self.kpis['quantite_moyenne_par_commande'] = self.kpis['quantite_totale_vendue'] / self.kpis['nombre_commandes']
+        # KPI VENTES, VOLUMES et MOYENS (nœuds du graphe)
+        for nom in (*self.TOTAUX_VENTES, *self.RATIOS_VENTES):
+            self.kpi(nom)
         
         # Ajout au rapport
         self.rapport_analyse.extend([
@@ -89,18 +394,16 @@ class AnalyseNorthwind:
         
         logging.info(f"✅ KPI fondamentaux calculés")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_tendances_temporelles(self):
         """Analyse l'évolution dans le temps"""
         logging.info("📅 ANALYSE DES TENDANCES TEMPORELLES")
         
-        if 'sales_facts' not in self.donnees:
+        if not self._ventes_disponibles():
             return
         
-        df = self.donnees['sales_facts']
-        
         # Ventes par mois
-        df['mois_annee'] = df['order_date'].dt.to_period('M')
-        ventes_par_mois = df.groupby('mois_annee').agg({
+        ventes_par_mois = self._agreger_ventes('mois_annee', {
             'line_total': 'sum',
             'profit': 'sum',
             'order_id': 'nunique',
@@ -116,8 +419,7 @@ class AnalyseNorthwind:
             self.kpis['croissance_mensuelle'] = ventes_par_mois[['mois_annee', 'croissance_ca']].dropna()
         
         # Ventes par jour de la semaine
-        df['jour_semaine'] = df['order_date'].dt.day_name()
-        ventes_par_jour = df.groupby('jour_semaine').agg({
+        ventes_par_jour = self._agreger_ventes('jour_semaine', {
             'line_total': 'sum',
             'order_id': 'nunique'
         }).reset_index()
@@ -125,44 +427,44 @@ class AnalyseNorthwind:
         # Réordonner les jours
         jours_ordre = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         ventes_par_jour['jour_semaine'] = pd.Categorical(ventes_par_jour['jour_semaine'], categories=jours_ordre, ordered=True)
-        ventes_par_jour = ventes_par_jour.sort_values('jour_semaine')
+        ventes_par_jour = ventes_par_jour.sort_values('jour_semaine', ignore_index=True)
         
         self.kpis['ventes_par_jour'] = ventes_par_jour
         
         logging.info(f"✅ Tendances temporelles analysées")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_performance_produits(self):
         """Analyse détaillée des performances produits"""
         logging.info("📦 ANALYSE PERFORMANCE PRODUITS")
         
-        if 'sales_facts' not in self.donnees:
+        if not self._ventes_disponibles():
             return
         
-        df = self.donnees['sales_facts']
-        
-        # Top 10 produits par chiffre d'affaires
-        top_produits_ca = df.groupby('product_name').agg({
+        # Un seul agrégat par produit pour les trois classements
+        produits = self._agreger_ventes('product_name', {
             'line_total': 'sum',
             'quantity': 'sum',
             'profit': 'sum',
             'order_id': 'nunique'
-        }).round(2)
+        })
         
-        top_produits_ca = top_produits_ca.sort_values('line_total', ascending=False)
+        # Top 10 produits par chiffre d'affaires
+        top_produits_ca = produits.round(2).sort_values('line_total', ascending=False)
         top_produits_ca['marge'] = (top_produits_ca['profit'] / top_produits_ca['line_total'] * 100).round(1)
         self.kpis['top_produits_ca'] = top_produits_ca.head(15)
         
         # Top 10 produits par quantité
-        top_produits_qte = df.groupby('product_name')['quantity'].sum().sort_values(ascending=False)
+        top_produits_qte = produits['quantity'].sort_values(ascending=False)
         self.kpis['top_produits_quantite'] = top_produits_qte.head(15)
         
         # Top 10 produits par profit
-        top_produits_profit = df.groupby('product_name')['profit'].sum().sort_values(ascending=False)
+        top_produits_profit = produits['profit'].sort_values(ascending=False)
         self.kpis['top_produits_profit'] = top_produits_profit.head(15)
         
         # Performance par catégorie
-        if 'category' in df.columns:
-            performance_categories = df.groupby('category').agg({
+        if self.a_colonne_ventes('category'):
+            performance_categories = self._agreger_ventes('category', {
                 'line_total': 'sum',
                 'profit': 'sum',
                 'quantity': 'sum',
@@ -186,17 +488,16 @@ class AnalyseNorthwind:
         self.rapport_analyse.append("")
         logging.info(f"✅ Performance produits analysée")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_comportement_clients(self):
         """Analyse du comportement et de la valeur client"""
         logging.info("👥 ANALYSE COMPORTEMENT CLIENTS")
         
-        if 'sales_facts' not in self.donnees:
+        if not self._ventes_disponibles():
             return
         
-        df = self.donnees['sales_facts']
-        
         # Top clients par chiffre d'affaires
-        top_clients = df.groupby('customer_company').agg({
+        top_clients = self._agreger_ventes('customer_company', {
             'line_total': 'sum',
             'profit': 'sum',
             'order_id': 'nunique',
@@ -214,18 +515,21 @@ class AnalyseNorthwind:
         self.kpis['top_clients'] = top_clients.head(20)
         
         # Segmentation clients par valeur
+        # Seuils p50/p80 lus en une fois dans un t-digest (sketch fusionnable, sans tri complet)
+        seuil_fidele, seuil_vip = sketches.construire_digest(top_clients['ca_total']).quantiles([0.5, 0.8])
         segments = {
-            'VIP': top_clients[top_clients['ca_total'] > top_clients['ca_total'].quantile(0.8)],
-            'Fidèles': top_clients[(top_clients['ca_total'] > top_clients['ca_total'].quantile(0.5)) & 
-                                 (top_clients['ca_total'] <= top_clients['ca_total'].quantile(0.8))],
-            'Occasionnels': top_clients[top_clients['ca_total'] <= top_clients['ca_total'].quantile(0.5)]
+            'VIP': top_clients[top_clients['ca_total'] > seuil_vip],
+            'Fidèles': top_clients[(top_clients['ca_total'] > seuil_fidele) & 
+                                 (top_clients['ca_total'] <= seuil_vip)],
+            'Occasionnels': top_clients[top_clients['ca_total'] <= seuil_fidele]
         }
         
         self.kpis['segmentation_clients'] = segments
+        self.kpis['seuils_segmentation'] = {'p50': seuil_fidele, 'p80': seuil_vip}
         
         # Performance géographique
-        if 'country' in df.columns:
-            performance_pays = df.groupby('country').agg({
+        if self.a_colonne_ventes('country'):
+            performance_pays = self._agreger_ventes('country', {
                 'line_total': 'sum',
                 'profit': 'sum',
                 'customer_company': 'nunique'
@@ -235,17 +539,50 @@ class AnalyseNorthwind:
         
         logging.info(f"✅ Comportement clients analysé")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
+    def analyser_rfm(self):
+        """Scores RFM (récence, fréquence, montant) et segments clients"""
+        logging.info("🏷️ SCORES RFM CLIENTS")
+        
+        if not self._ventes_disponibles():
+            return
+        
+        # Seuils des quintiles exacts: les agrégats par client sont en mémoire
+        scores = None
+        if self._etat is not None and self._etat.delta is not None:
+            # Analyse incrémentale: scores précédents mis à jour avec les seules commandes nouvelles
+            scores = rfm.ScoresRFM.charger(self.etat_path)
+            if scores is not None:
+                scores.ajouter(self._etat.delta)
+        if scores is None:
+            agregats = self._agreger_ventes('customer_company', rfm.AGREGATS).rename(columns=rfm.NOMS_AGREGATS)
+            scores = rfm.ScoresRFM(agregats)
+        
+        self.kpis['rfm_clients'] = scores.scores
+        self.kpis['segments_rfm'] = scores.resume_segments()
+        
+        # Ajout au rapport
+        self.rapport_analyse.extend([
+            "🏷️ SEGMENTS RFM",
+            "-" * 40,
+        ])
+        for segment, row in self.kpis['segments_rfm'].iterrows():
+            self.rapport_analyse.append(f"  {segment}: {int(row['nb_clients'])} clients ({row['part_clients']:.1f}%), "
+                                        f"{row['montant']:,.2f} $")
+        
+        self.rapport_analyse.append("")
+        logging.info(f"✅ Scores RFM calculés")
+    
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_performance_commerciale(self):
         """Analyse de la performance des commerciaux"""
         logging.info("👨‍💼 ANALYSE PERFORMANCE COMMERCIALE")
         
-        if 'sales_facts' not in self.donnees:
+        if not self._ventes_disponibles():
             return
         
-        df = self.donnees['sales_facts']
-        
         # Performance par employé
-        performance_employes = df.groupby('employee_name').agg({
+        performance_employes = self._agreger_ventes('employee_name', {
             'line_total': 'sum',
             'profit': 'sum',
             'order_id': 'nunique',
@@ -276,6 +613,7 @@ class AnalyseNorthwind:
         self.rapport_analyse.append("")
         logging.info(f"✅ Performance commerciale analysée")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_efficacite_operationnelle(self):
         """Analyse de l'efficacité opérationnelle"""
         logging.info("⚙️ ANALYSE EFFICACITÉ OPÉRATIONNELLE")
@@ -289,7 +627,11 @@ class AnalyseNorthwind:
         if 'delivery_days' in df.columns:
             delais = df[df['delivery_days'].notna()]
             self.kpis['delai_livraison_moyen'] = delais['delivery_days'].mean()
-            self.kpis['delai_livraison_median'] = delais['delivery_days'].median()
+            # Percentiles de délai depuis un t-digest alimenté par blocs
+            p50, p90, p99 = sketches.construire_digest(delais['delivery_days']).quantiles([0.5, 0.9, 0.99])
+            self.kpis['delai_livraison_median'] = p50
+            self.kpis['delai_livraison_p90'] = p90
+            self.kpis['delai_livraison_p99'] = p99
             
             # Taux de livraison rapide (moins de 7 jours)
             livraisons_rapides = delais[delais['delivery_days'] <= 7]
@@ -297,7 +639,7 @@ class AnalyseNorthwind:
         
         # Performance des transporteurs
         if 'shipping_company' in df.columns:
-            performance_transporteurs = df.groupby('shipping_company').agg({
+            performance_transporteurs = self._agreger(df, 'shipping_company', {
                 'delivery_days': 'mean',
                 'order_id': 'nunique',
                 'shipping_fee': 'mean'
@@ -313,10 +655,12 @@ class AnalyseNorthwind:
         # Méthodes de paiement
         if 'payment_type' in df.columns:
             methodes_paiement = df['payment_type'].value_counts()
+            methodes_paiement = methodes_paiement[methodes_paiement > 0]
             self.kpis['methodes_paiement'] = methodes_paiement
         
         logging.info(f"✅ Efficacité opérationnelle analysée")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_gestion_stock(self):
         """Analyse de la gestion des stocks et inventaire"""
         logging.info("📊 ANALYSE GESTION STOCK")
@@ -326,7 +670,7 @@ class AnalyseNorthwind:
             products_df = self.donnees['products']
             
             # Mouvements de stock par produit
-            mouvements_stock = inventory_df.groupby('product_name').agg({
+            mouvements_stock = inventory_df.groupby('product_name', observed=True).agg({
                 'quantity': 'sum',
                 'transaction_type': 'count'
             }).rename(columns={'transaction_type': 'nb_mouvements'})
@@ -351,30 +695,54 @@ class AnalyseNorthwind:
             
             logging.info(f"✅ Gestion stock analysée")
     
-    def calculer_metrics_avancees(self):
-        """Calcule des métriques avancées et ratios"""
-        logging.info("🎯 CALCUL MÉTRIQUES AVANCÉES")
-        
-        # Taux de croissance (simplifié)
-        if 'ventes_par_mois' in self.kpis:
-            ventes_mois = self.kpis['ventes_par_mois']
-            if len(ventes_mois) > 1:
-                dernier_mois = ventes_mois.iloc[-1]['line_total']
-                mois_precedent = ventes_mois.iloc[-2]['line_total']
-                self.kpis['taux_croissance_mensuel'] = ((dernier_mois - mois_precedent) / mois_precedent * 100) if mois_precedent > 0 else 0
-        
-        # Customer Lifetime Value approximatif
+    def calculer_taux_croissance(self):
+        """Taux de croissance (simplifié): dernier mois vs mois précédent"""
+        if self.index_temporel is not None:
+            # Sommes par mois lues sur les frontières de jours de l'index (pas de groupby)
+            ca_mois = self.index_temporel.sommes_mensuelles('line_total')
+        else:
+            ventes_mois = self.kpi('ventes_par_mois')
+            ca_mois = ventes_mois['line_total'] if ventes_mois is not None else None
+        if ca_mois is not None and len(ca_mois) > 1:
+            dernier_mois = ca_mois.iloc[-1]
+            mois_precedent = ca_mois.iloc[-2]
+            self.kpis['taux_croissance_mensuel'] = ((dernier_mois - mois_precedent) / mois_precedent * 100) if mois_precedent > 0 else 0
+    
+    def calculer_clv(self):
+        """Customer Lifetime Value approximatif (moyenne des top clients)"""
         if 'top_clients' in self.kpis:
             clv_moyen = self.kpis['top_clients']['ca_total'].mean()
             self.kpis['clv_moyen'] = clv_moyen
+    
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
+    def analyser_cohortes(self):
+        """Rétention par cohorte d'acquisition (clients et CA), churn mois par mois"""
+        if not self._ventes_disponibles():
+            return
         
-        # Taux de rétention (simplifié)
-        if 'sales_facts' in self.donnees:
-            df = self.donnees['sales_facts']
-            clients_par_mois = df.groupby([df['order_date'].dt.to_period('M'), 'customer_company']).size().reset_index()
-            clients_uniques_par_mois = clients_par_mois.groupby('order_date')['customer_company'].nunique()
-            if len(clients_uniques_par_mois) > 1:
-                self.kpis['taux_retention_approx'] = (clients_uniques_par_mois.iloc[-1] / clients_uniques_par_mois.iloc[-2] * 100) if clients_uniques_par_mois.iloc[-2] > 0 else 100
+        # Un couple (client, mois) actif par cellule, lu dans le cube
+        activite = self._agreger_ventes(['customer_company', 'mois_annee'], {'line_total': 'sum'}).reset_index()
+        if activite.empty:
+            return
+        resultat = cohortes.analyser_cohortes(activite['customer_company'], activite['mois_annee'], activite['line_total'])
+        self.kpis.update(resultat)
+        
+        churn = resultat['churn_mensuel']
+        if len(churn):
+            # Clients du mois précédent encore actifs le dernier mois
+            self.kpis['taux_retention_mensuel'] = churn['taux_retention'].iloc[-1]
+            self.kpis['taux_churn_mensuel'] = churn['taux_churn'].iloc[-1]
+            # Rétention à M+1 des cohortes, pondérée par leur taille
+            m1 = resultat['retention_cohortes'][1].dropna()
+            if len(m1):
+                self.kpis['retention_m1_moyenne'] = np.average(m1, weights=resultat['taille_cohortes'].loc[m1.index])
+    
+    def calculer_metrics_avancees(self):
+        """Calcule des métriques avancées et ratios (et les analyses dont elles dépendent)"""
+        logging.info("🎯 CALCUL MÉTRIQUES AVANCÉES")
+        
+        for nom in ('taux_croissance_mensuel', 'clv_moyen', 'taux_retention_mensuel'):
+            self.kpi(nom)
         
         logging.info(f"✅ Métriques avancées calculées")
     
@@ -402,6 +770,11 @@ class AnalyseNorthwind:
             f"• {self.kpis.get('nombre_clients', 0)} clients actifs",
             f"• Panier moyen: {self.kpis.get('panier_moyen', 0):.2f} $",
             f"• Délai livraison moyen: {self.kpis.get('delai_livraison_moyen', 0):.1f} jours",
+            f"• Rétention clients dernier mois: {self.kpis.get('taux_retention_mensuel', 0):.1f}% "
+            f"(churn {self.kpis.get('taux_churn_mensuel', 0):.1f}%, rétention M+1 des cohortes "
+            f"{self.kpis.get('retention_m1_moyenne', 0):.1f}%)",
+            f"• Délai livraison p50/p90/p99: {self.kpis.get('delai_livraison_median', 0):.1f} / "
+            f"{self.kpis.get('delai_livraison_p90', 0):.1f} / {self.kpis.get('delai_livraison_p99', 0):.1f} jours",
         ])
         
         # Recommandations
@@ -432,7 +805,15 @@ class AnalyseNorthwind:
             },
             'metrics_operationnelles': {
                 'delai_livraison_moyen': self.kpis.get('delai_livraison_moyen', 0),
+                'delai_livraison_median': self.kpis.get('delai_livraison_median', 0),
+                'delai_livraison_p90': self.kpis.get('delai_livraison_p90', 0),
+                'delai_livraison_p99': self.kpis.get('delai_livraison_p99', 0),
                 'taux_livraison_rapide': self.kpis.get('taux_livraison_rapide', 0)
+            },
+            'retention_clients': {
+                'taux_retention_mensuel': self.kpis.get('taux_retention_mensuel', 0),
+                'taux_churn_mensuel': self.kpis.get('taux_churn_mensuel', 0),
+                'retention_m1_moyenne': self.kpis.get('retention_m1_moyenne', 0)
             }
         }
         
@@ -441,6 +822,7 @@ class AnalyseNorthwind:
         
         logging.info(f"✅ Rapport d'analyse sauvegardé: {rapport_path}")
     
+    @instrumentation.mesurer(entree='kpis')
     def sauvegarder_donnees_analyse(self):
         """Sauvegarde toutes les données d'analyse pour la visualisation"""
         logging.info("💾 SAUVEGARDE DONNÉES POUR VISUALISATION")
@@ -469,6 +851,156 @@ class AnalyseNorthwind:
         
         logging.info("✅ Données d'analyse sauvegardées")
     
+    def _etapes(self):
+        """Étapes de l'analyse complète (ordre du rapport) -> étapes dont elles dépendent"""
+        etapes = {'calculer_kpi_fondamentaux': ()}
+        for etape, (_, dependances) in self.ETAPES_KPI.items():
+            producteurs = (self.graphe_kpi[d][0] for d in dependances)
+            etapes[etape] = tuple(dict.fromkeys(p if p in self.ETAPES_KPI else 'calculer_kpi_fondamentaux'
+                                                for p in producteurs))
+        return etapes
+    
+    def _marquer_evaluee(self, etape):
+        """Étape calculée ailleurs (worker): ses KPI ne sont pas à réévaluer"""
+        if etape in self.ETAPES_KPI:
+            self._etapes_evaluees.add(etape)
+        else:
+            self._etapes_evaluees.update((*self.TOTAUX_VENTES, *self.RATIOS_VENTES))
+    
+    def _executer_etape(self, etape):
+        if etape == 'calculer_kpi_fondamentaux':
+            self.calculer_kpi_fondamentaux()
+        else:
+            self.kpi(self.ETAPES_KPI[etape][0][0])
+    
+    def executer_analyses(self):
+        """Calcule tous les KPI du graphe à partir des données chargées (faits ou cube)"""
+        if self.execution_parallele:
+            return self.executer_analyses_paralleles()
+        
+        debut = time.perf_counter()
+        durees = {}
+        for etape in self._etapes():
+            debut_etape = time.perf_counter()
+            self._executer_etape(etape)
+            durees[etape] = time.perf_counter() - debut_etape
+        self._journaliser_execution('série', durees, time.perf_counter() - debut)
+        if self.sql is not None:
+            logging.info(f"🗄️ SQL: {self.sql.stats['requetes']} requêtes, {self.sql.stats['lignes_rapatriees']} lignes "
+                         f"rapatriées ({self.sql.stats['duree_secondes']:.3f}s)")
+        return self.kpis
+    
+    def _partager_tables(self, dossier):
+        """Écrit les tables lues par les étapes en Arrow IPC non compressé (projetable en mémoire)
+        
+        Avec le cube, les étapes lisent ses cellules et non la table de faits:
+        seuls les cuboïdes sont alors partagés avec les petites tables.
+        """
+        tables = {nom: df for nom, df in self.donnees.items() if not (nom == 'sales_facts' and self.cube is not None)}
+        if self.cube is not None:
+            tables.update({f'cube_{nom}': cellules for nom, cellules in self.cube.cuboides.items()})
+        return {nom: str(stockage.ecrire_table(df, dossier, nom, 'feather', compression='uncompressed'))
+                for nom, df in tables.items()}
+    
+    def executer_analyses_paralleles(self):
+        """Exécute les étapes d'analyse dans un pool de processus
+        
+        Une étape est soumise dès que celles dont elle dépend sont terminées;
+        elle reçoit leurs KPI (petits) et relit les tables partagées par
+        projection mémoire, sans qu'elles soient sérialisées vers les workers.
+        """
+        debut = time.perf_counter()
+        etapes = self._etapes()
+        n_workers = self.n_workers or min(len(etapes), os.cpu_count() or 1)
+        parametres = {'erreur_distincts': self.erreur_distincts, 'utiliser_cube': self.utiliser_cube,
+                      'debut': self.debut, 'fin': self.fin, 'backend': self.backend}
+        durees, rapports = {}, {}
+        
+        with tempfile.TemporaryDirectory(prefix='analyse_') as dossier:
+            tables = self._partager_tables(dossier)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                en_cours = {}
+                restantes = dict(etapes)
+                while restantes or en_cours:
+                    for etape, dependances in list(restantes.items()):
+                        if all(d in durees for d in dependances):
+                            requis = {nom: self.kpis[nom] for nom in self.ETAPES_KPI.get(etape, ((), ()))[1]
+                                      if nom in self.kpis}
+                            future = executor.submit(_executer_etape, etape, tables, parametres, requis, dependances)
+                            en_cours[future] = etape
+                            del restantes[etape]
+                    
+                    terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                    for future in terminees:
+                        etape = en_cours.pop(future)
+                        produits, rapports[etape], durees[etape], mesures = future.result()
+                        instrumentation.ajouter(mesures)
+                        self.kpis.update(produits)
+                        self._marquer_evaluee(etape)
+        
+        # Rapport dans l'ordre de l'analyse série, quel que soit l'ordre de fin des étapes
+        for etape in etapes:
+            self.rapport_analyse.extend(rapports[etape])
+        self._journaliser_execution(f'parallèle ({n_workers} workers)', durees, time.perf_counter() - debut)
+        return self.kpis
+    
+    def _journaliser_execution(self, mode, durees, duree_totale):
+        """Temps par étape et accélération estimée (somme des étapes / durée réelle)"""
+        somme = sum(durees.values())
+        self.stats_execution = {
+            'mode': mode,
+            'etapes': {etape: round(duree, 4) for etape, duree in durees.items()},
+            'somme_etapes_secondes': round(somme, 4),
+            'duree_secondes': round(duree_totale, 4),
+            'acceleration_estimee': round(somme / duree_totale, 2) if duree_totale > 0 else None
+        }
+        logging.info(f"⏱️ Étapes d'analyse, exécution {mode}:")
+        for etape, duree in sorted(durees.items(), key=lambda e: -e[1]):
+            logging.info(f"   {etape:<38} {duree:8.3f}s")
+        logging.info(f"⏱️ Somme des étapes {somme:.3f}s | durée réelle {duree_totale:.3f}s "
+                     f"| accélération x{self.stats_execution['acceleration_estimee']}")
+    
+    def comparer_modes_execution(self):
+        """Mesure les étapes d'analyse en série puis en parallèle et vérifie des KPI identiques"""
+        logging.info("⏱️ COMPARAISON ANALYSE SÉRIE / PARALLÈLE")
+        
+        mode_initial = self.execution_parallele
+        resultats = {}
+        for parallele in (False, True):
+            self.execution_parallele = parallele
+            self._nouvelle_version()
+            self.executer_analyses()
+            resultats[parallele] = (dict(self.kpis), self.stats_execution['duree_secondes'])
+        self.execution_parallele = mode_initial
+        
+        serie, parallele = resultats[False][1], resultats[True][1]
+        durees = {
+            'serie': serie,
+            'parallele': parallele,
+            'acceleration': round(serie / parallele, 2) if parallele > 0 else None,
+            'kpis_identiques': not _comparer_kpis(resultats[True][0], resultats[False][0])
+        }
+        logging.info(f"📊 Série: {serie:.2f}s | Parallèle: {parallele:.2f}s | Accélération: x{durees['acceleration']} "
+                     f"| KPI {'identiques' if durees['kpis_identiques'] else 'DIVERGENTS'}")
+        self.stats_execution['comparaison'] = durees
+        return durees
+    
+    @instrumentation.mesurer()
+    def sauvegarder_etat(self):
+        """Persiste le cube et les empreintes de commandes pour le prochain passage incrémental"""
+        if self.cube is None or self._signatures_faits is None:
+            return
+        if 'sales_facts' in self.donnees:
+            etat = etat_kpi.EtatKPI.depuis_faits(self.cube, self.donnees['sales_facts'], self._signatures_faits)
+        else:
+            etat = self._etat
+        etat.sauvegarder(self.etat_path)
+        # Scores RFM de référence du prochain passage incrémental
+        if 'rfm_clients' in self.kpis:
+            rfm.sauvegarder_scores(self.kpis['rfm_clients'], self.etat_path)
+        else:
+            stockage.supprimer_table(self.etat_path, 'rfm_clients')
+    
     def executer_analyse_complete(self):
         """Exécute l'analyse complète"""
         logging.info("🚀 DÉMARRAGE ANALYSE COMPLÈTE")
@@ -479,18 +1011,12 @@ class AnalyseNorthwind:
             self.charger_donnees_propres()
             
             # 2. Analyses
-            self.calculer_kpi_fondamentaux()
-            self.analyser_tendances_temporelles()
-            self.analyser_performance_produits()
-            self.analyser_comportement_clients()
-            self.analyser_performance_commerciale()
-            self.analyser_efficacite_operationnelle()
-            self.analyser_gestion_stock()
-            self.calculer_metrics_avancees()
+            self.executer_analyses()
             
             # 3. Rapports et sauvegarde
             self.generer_rapport_analyse_complet()
             self.sauvegarder_donnees_analyse()
+            self.sauvegarder_etat()
             
             logging.info("🎉 ANALYSE TERMINÉE AVEC SUCCÈS!")
             return self.kpis
@@ -498,7 +1024,118 @@ class AnalyseNorthwind:
         except Exception as e:
             logging.error(f"💥 ÉCHEC ANALYSE: {e}")
             return None
+    
+    def executer_analyse_incrementale(self):
+        """Analyse à partir de l'état agrégé du passage précédent
+        
+        Seules les partitions de faits modifiées depuis sont relues et leurs
+        commandes nouvelles ajoutées au cube; les KPI dérivés (panier moyen,
+        marge, CLV, croissance) sont ensuite recalculés sur le cube à jour.
+        Sans état exploitable, ou si des commandes déjà comptées ont changé,
+        on retombe sur l'analyse complète.
+        """
+        logging.info("🚀 DÉMARRAGE ANALYSE INCRÉMENTALE")
+        logging.info("=" * 60)
+        
+        if not self.utiliser_cube or self.debut is not None or self.fin is not None:
+            logging.warning("⚠️ Mode incrémental limité à l'historique complet en comptes exacts: analyse complète")
+            return self.executer_analyse_complete()
+        
+        try:
+            etat = etat_kpi.EtatKPI.charger(self.etat_path)
+            if etat is None:
+                logging.warning("⚠️ Aucun état KPI sauvegardé: analyse complète")
+                return self.executer_analyse_complete()
+            
+            # 1. Delta de la table de faits intégré à l'état
+            if etat.mettre_a_jour(self.data_path, encodage.charger_dictionnaires(self.data_path)) is None:
+                logging.warning("⚠️ État KPI non réconciliable: analyse complète")
+                return self.executer_analyse_complete()
+            self._etat = etat
+            self._signatures_faits = etat.signatures
+            
+            # 2. Autres tables (petites) et analyses sur le cube
+            self.charger_donnees_propres(avec_faits=False)
+            self.cube = etat.cube
+            self.executer_analyses()
+            
+            # 3. Rapports et sauvegarde
+            self.generer_rapport_analyse_complet()
+            self.sauvegarder_donnees_analyse()
+            self.sauvegarder_etat()
+            
+            logging.info("🎉 ANALYSE INCRÉMENTALE TERMINÉE AVEC SUCCÈS!")
+            return self.kpis
+            
+        except Exception as e:
+            logging.error(f"💥 ÉCHEC ANALYSE INCRÉMENTALE: {e}")
+            return None
+    
+    def verifier_kpis_incrementaux(self, rtol=1e-9):
+        """Compare les KPI calculés à ceux d'une analyse complète recalculée sur les faits"""
+        logging.info("🔍 VÉRIFICATION INCRÉMENTAL / COMPLET")
+        
+        reference = AnalyseNorthwind()
+        reference.charger_donnees_propres()
+        reference.executer_analyses()
+        
+        ecarts = _comparer_kpis(self.kpis, reference.kpis, rtol)
+        if ecarts:
+            logging.error(f"❌ {len(ecarts)} KPI divergent(s) de l'analyse complète: {ecarts}")
+            return False
+        logging.info(f"✅ {len(reference.kpis)} KPI identiques à l'analyse complète")
+        return True
+
+    def verifier_backend_sql(self, rtol=1e-9):
+        """Compare les KPI calculés en SQL à ceux de l'implémentation pandas (référence)"""
+        logging.info("🔍 VÉRIFICATION SQL / PANDAS")
+        
+        reference = AnalyseNorthwind(debut=self.debut, fin=self.fin)
+        reference.charger_donnees_propres()
+        reference.executer_analyses()
+        
+        ecarts = _comparer_kpis(self.kpis, reference.kpis, rtol)
+        if ecarts:
+            logging.error(f"❌ {len(ecarts)} KPI divergent(s) de l'analyse pandas: {ecarts}")
+            return False
+        logging.info(f"✅ {len(reference.kpis)} KPI identiques à l'analyse pandas")
+        return True
 
 if __name__ == "__main__":
-    analyse = AnalyseNorthwind()
-    kpis = analyse.executer_analyse_complete()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Analyse Northwind")
+    parser.add_argument('--debut', default=None, help="Début de la période analysée (AAAA-MM-JJ)")
+    parser.add_argument('--fin', default=None, help="Fin de la période analysée, incluse (AAAA-MM-JJ)")
+    parser.add_argument('--distincts-approx', type=float, nargs='?', const=0.01, default=None, metavar='ERREUR',
+                        help="Comptes distincts estimés par HyperLogLog (erreur type, 0.01 par défaut)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Mettre à jour l'état KPI avec les seules commandes nouvelles depuis le dernier passage")
+    parser.add_argument('--verifier-incremental', action='store_true',
+                        help="Comparer les KPI à une analyse complète recalculée sur les faits")
+    parser.add_argument('--parallele', action='store_true', help="Exécuter les étapes d'analyse dans un pool de processus")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus pour l'analyse parallèle")
+    parser.add_argument('--comparer-execution', action='store_true', help="Comparer les temps d'analyse série / parallèle")
+    parser.add_argument('--backend', choices=['pandas', 'sql'], default='pandas',
+                        help="sql: agrégats calculés par la base embarquée publiée par etl.py --base-sql")
+    parser.add_argument('--verifier-sql', action='store_true', help="Comparer les KPI du backend SQL à l'analyse pandas")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Mesurer le pic mémoire Python de chaque étape (reports/run_metrics.json)")
+    args = parser.parse_args()
+    
+    if args.tracemalloc:
+        instrumentation.activer_tracemalloc()
+    
+    analyse = AnalyseNorthwind(debut=args.debut, fin=args.fin, erreur_distincts=args.distincts_approx,
+                               execution_parallele=args.parallele, n_workers=args.workers, backend=args.backend)
+    if args.comparer_execution:
+        analyse.charger_donnees_propres()
+        kpis = analyse.comparer_modes_execution()
+    elif args.incremental:
+        kpis = analyse.executer_analyse_incrementale()
+    else:
+        kpis = analyse.executer_analyse_complete()
+    if args.verifier_incremental and kpis is not None:
+        analyse.verifier_kpis_incrementaux()
+    if args.verifier_sql and kpis is not None:
+        analyse.verifier_backend_sql()
\ No newline at end of file
@@ -3,10 +3,14 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import time
+import stockage
+import instrumentation
 
 class AnalyseNorthwind:
-    def __init__(self):
+    def __init__(self, session=None):
         self.data_path = Path('../data/processed')
+        # SessionPipeline: faits reçus en mémoire de l'ETL au lieu d'être relus
+        self.session = session
         self.donnees = {}
         self.kpis = {}
         
@@ -15,13 +19,20 @@ class AnalyseNorthwind:
         print("📥 CHARGEMENT DES DONNÉES NETTOYÉES")
         
         try:
+            if self.session is not None:
+                self.donnees['sales_facts'] = self.session.table('sales_facts', parse_dates=['order_date'])
+                if self.donnees['sales_facts'] is None:
+                    print("❌ Table sales_facts_clean non trouvée")
+                    return False
+                print(f"✅ sales_facts reçu de la session ({len(self.donnees['sales_facts'])} lignes)")
+                return True
+            
             # Charger la table de faits
-            chemin_faits = self.data_path / 'sales_facts_clean.csv'
-            if chemin_faits.exists():
-                self.donnees['sales_facts'] = pd.read_csv(chemin_faits, parse_dates=['order_date'])
-                print(f"✅ sales_facts_clean.csv chargé ({len(self.donnees['sales_facts'])} lignes)")
+            if stockage.table_existe(self.data_path, 'sales_facts'):
+                self.donnees['sales_facts'] = stockage.lire_table(self.data_path, 'sales_facts', parse_dates=['order_date'])
+                print(f"✅ sales_facts_clean chargé ({len(self.donnees['sales_facts'])} lignes)")
             else:
-                print("❌ Fichier sales_facts_clean.csv non trouvé")
+                print("❌ Table sales_facts_clean non trouvée")
                 return False
                 
             return True
@@ -54,6 +65,7 @@ class AnalyseNorthwind:
         print("✅ KPI calculés avec succès")
         return True
     
+    @instrumentation.mesurer(entree='donnees.sales_facts', sortie='kpis')
     def analyser_performance(self):
         """Analyse de performance détaillée"""
         print("📊 ANALYSE DE PERFORMANCE DÉTAILLÉE")
@@ -133,8 +145,8 @@ class AnalyseNorthwind:
             return None
 
 # Fonction pour exécuter directement
-def executer_analyse():
-    analyse = AnalyseNorthwind()
+def executer_analyse(session=None):
+    analyse = AnalyseNorthwind(session)
     return analyse.executer_analyse_complete()
 
 if __name__ == "__main__":
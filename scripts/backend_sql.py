@@ -0,0 +1,329 @@
+# scripts/backend_sql.py
+import pandas as pd
+import numpy as np
+import sqlite3
+import logging
+import time
+import os
+from pathlib import Path
+import cube
+import stockage
+
+try:
+    import duckdb
+    MOTEUR_DEFAUT = 'duckdb'
+except ImportError:
+    duckdb = None
+    MOTEUR_DEFAUT = 'sqlite'
+
+NOM_BASE = 'northwind'
+EXTENSIONS = {'duckdb': '.duckdb', 'sqlite': '.sqlite'}
+# Tables nettoyées chargées dans la base (lues par l'analyse et le dashboard)
+TABLES = ['sales_facts', 'products', 'customers', 'employees', 'orders', 'order_details', 'inventory']
+# Colonnes indexées quand elles existent: clés de jointure, dates et dimensions d'agrégation
+COLONNES_INDEXEES = ['order_id', 'order_date', 'mois_annee', 'customer_company', 'product_name',
+                     'employee_name', 'category', 'company_name']
+# Table interne: empreinte des tables publiées dont la base a été chargée
+TABLE_SOURCE = '_source'
+COLONNES_DATES = ['order_date', 'shipped_date', 'paid_date', 'transaction_created_date', 'transaction_modified_date']
+# Agrégats pandas -> expression SQL (sommes à 0 sur un groupe sans valeur, comme pandas)
+FONCTIONS_SQL = {
+    'sum': 'COALESCE(SUM({0}), 0)',
+    'mean': 'AVG({0})',
+    'min': 'MIN({0})',
+    'max': 'MAX({0})',
+    'nunique': 'COUNT(DISTINCT {0})',
+    'count': 'COUNT({0})',
+    'size': 'COUNT(*)'
+}
+
+
+def _nom(identifiant):
+    return '"' + str(identifiant).replace('"', '""') + '"'
+
+
+def chemin_base(dossier, moteur=None):
+    return Path(dossier) / f"{NOM_BASE}{EXTENSIONS[moteur or MOTEUR_DEFAUT]}"
+
+
+def empreinte_source(dossier):
+    """Empreinte des fichiers publiés des tables chargées dans la base"""
+    return stockage.empreinte_tables(dossier, TABLES)
+
+
+def _empreinte_base(chemin):
+    """Empreinte enregistrée au chargement de la base, ou None (base antérieure ou illisible)"""
+    try:
+        connexion = _connecter(chemin, lecture_seule=True)
+        try:
+            return connexion.execute(f"SELECT valeur FROM {TABLE_SOURCE} WHERE cle = 'empreinte'").fetchone()[0]
+        finally:
+            connexion.close()
+    except Exception:
+        return None
+
+
+def trouver_base(dossier):
+    """Base publiée par l'ETL (DuckDB si le module est installé, sinon SQLite), ou None
+
+    Une base chargée depuis d'autres versions des tables publiées (ETL relancé
+    sans --base-sql, etl_main, pipeline) est périmée: elle est ignorée plutôt
+    que de servir des agrégats obsolètes.
+    """
+    for moteur in (['duckdb'] if duckdb is not None else []) + ['sqlite']:
+        chemin = chemin_base(dossier, moteur)
+        if not chemin.exists():
+            continue
+        if _empreinte_base(chemin) == empreinte_source(dossier):
+            return chemin
+        logging.warning(f"⚠️ {chemin.name} périmée: tables publiées modifiées depuis son chargement "
+                        f"(etl.py --base-sql ou backend_sql.py --charger)")
+    return None
+
+
+def _connecter(chemin, lecture_seule=False):
+    chemin = Path(chemin)
+    if chemin.suffix == EXTENSIONS['duckdb']:
+        if duckdb is None:
+            raise ImportError("duckdb n'est pas installé")
+        return duckdb.connect(str(chemin), read_only=lecture_seule)
+    if lecture_seule:
+        return sqlite3.connect(f"file:{chemin}?mode=ro", uri=True, check_same_thread=False)
+    return sqlite3.connect(str(chemin))
+
+
+def _table_sql(df, moteur):
+    """Types portables: catégories -> valeurs, dates -> texte ISO triable (SQLite)"""
+    df = df.copy()
+    for colonne in df.columns:
+        serie = df[colonne]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(serie.cat.categories.dtype if serie.cat.categories.dtype != 'category' else object)
+        if pd.api.types.is_datetime64_any_dtype(serie) and moteur == 'sqlite':
+            serie = serie.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(serie.notna(), None)
+        df[colonne] = serie
+    return df
+
+
+def preparer_faits(faits):
+    """sales_facts sous les noms canoniques du cube, attributs calendaires inclus (mois_annee, jour_semaine)
+
+    Dates au grain jour, celui du schéma en étoile (clé de dim_date).
+    """
+    base = cube.preparer_faits(faits)
+    if 'order_date' in base.columns:
+        base['order_date'] = base['order_date'].dt.normalize()
+    autres = [c for c in faits.columns if cube.canonique(c) not in base.columns]
+    return pd.concat([base, faits[autres]], axis=1)
+
+
+def charger(tables, dossier, moteur=None):
+    """Charge les tables nettoyées dans la base embarquée et indexe clés et dates
+
+    La base est écrite dans un fichier temporaire puis publiée par
+    renommage: un lecteur ne voit jamais une base à moitié chargée. Elle
+    enregistre l'empreinte des tables publiées dans dossier, qui doivent
+    donc être écrites avant le chargement.
+    """
+    debut = time.perf_counter()
+    moteur = moteur or MOTEUR_DEFAUT
+    chemin = chemin_base(dossier, moteur)
+    empreinte = empreinte_source(dossier)
+    temporaire = chemin.with_name(chemin.name + '.tmp')
+    temporaire.unlink(missing_ok=True)
+
+    connexion = _connecter(temporaire)
+    try:
+        for nom, df in tables.items():
+            if df is None:
+                continue
+            df = _table_sql(preparer_faits(df) if nom == 'sales_facts' else df, moteur)
+            if moteur == 'duckdb':
+                connexion.register('_chargement', df)
+                connexion.execute(f"CREATE TABLE {_nom(nom)} AS SELECT * FROM _chargement")
+                connexion.unregister('_chargement')
+            else:
+                df.to_sql(nom, connexion, index=False, if_exists='replace', chunksize=50_000)
+            for colonne in COLONNES_INDEXEES:
+                if colonne in df.columns:
+                    connexion.execute(f"CREATE INDEX {_nom(f'idx_{nom}_{colonne}')} ON {_nom(nom)} ({_nom(colonne)})")
+            logging.info(f"🗄️ {nom}: {len(df)} lignes chargées dans {chemin.name}")
+        connexion.execute(f"CREATE TABLE {TABLE_SOURCE} (cle VARCHAR, valeur VARCHAR)")
+        connexion.execute(f"INSERT INTO {TABLE_SOURCE} VALUES ('empreinte', ?)", [empreinte])
+        if moteur == 'sqlite':
+            connexion.execute("ANALYZE")
+            connexion.commit()
+    finally:
+        connexion.close()
+    os.replace(temporaire, chemin)
+    logging.info(f"✅ Base {moteur} publiée: {chemin} ({time.perf_counter() - debut:.2f}s)")
+    return chemin
+
+
+class BackendSQL:
+    """Agrégats des ventes calculés par le moteur SQL de la base embarquée.
+
+    Même interface que CubeVentes (agreger, total, a_colonne): l'analyse y
+    délègue ses groupby, seule la table résultat est rapatriée. debut/fin
+    (bornes incluses) restreignent toutes les requêtes à une période, filtrée
+    par l'index sur order_date.
+    """
+
+    def __init__(self, chemin, debut=None, fin=None):
+        self.chemin = Path(chemin)
+        self.moteur = 'duckdb' if self.chemin.suffix == EXTENSIONS['duckdb'] else 'sqlite'
+        self.connexion = _connecter(self.chemin, lecture_seule=True)
+        self.colonnes = {table: self._colonnes(table) for table in self._tables()}
+        self.debut = pd.Timestamp(debut) if debut is not None else None
+        self.fin = pd.Timestamp(fin) if fin is not None else None
+        self.stats = {'requetes': 0, 'lignes_rapatriees': 0, 'duree_secondes': 0.0}
+
+    @classmethod
+    def ouvrir(cls, dossier, debut=None, fin=None):
+        """Backend sur la base publiée dans dossier, ou None si elle est absente ou périmée"""
+        chemin = trouver_base(dossier)
+        return cls(chemin, debut, fin) if chemin is not None else None
+
+    def _tables(self):
+        if self.moteur == 'duckdb':
+            tables = self.connexion.execute("SELECT table_name FROM information_schema.tables").fetchall()
+        else:
+            tables = self.connexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return [t for (t,) in tables if t != TABLE_SOURCE]
+
+    def _colonnes(self, table):
+        curseur = self.connexion.execute(f"SELECT * FROM {_nom(table)} LIMIT 0")
+        return [description[0] for description in curseur.description]
+
+    def requete(self, sql, parametres=()):
+        """Exécute une requête et rapatrie son résultat en DataFrame"""
+        debut = time.perf_counter()
+        if self.moteur == 'duckdb':
+            resultat = self.connexion.execute(sql, list(parametres)).df()
+        else:
+            resultat = pd.read_sql_query(sql, self.connexion, params=list(parametres))
+        self.stats['requetes'] += 1
+        self.stats['lignes_rapatriees'] += len(resultat)
+        self.stats['duree_secondes'] += time.perf_counter() - debut
+        return resultat
+
+    def _convertir_dates(self, df):
+        for colonne in df.columns.intersection(COLONNES_DATES):
+            df[colonne] = pd.to_datetime(df[colonne], errors='coerce')
+        return df
+
+    def lire_table(self, nom, periode=False):
+        """Table entière (petites tables de dimension), ou None si absente"""
+        if nom not in self.colonnes:
+            return None
+        conditions, parametres = self._periode() if periode and 'order_date' in self.colonnes[nom] else ([], [])
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self._convertir_dates(self.requete(f"SELECT * FROM {_nom(nom)}{where}", parametres))
+
+    def _periode(self):
+        conditions, parametres = [], []
+        for borne, operateur in ((self.debut, '>='), (self.fin, '<=')):
+            if borne is not None:
+                conditions.append(f"order_date {operateur} ?")
+                parametres.append(borne.strftime('%Y-%m-%d %H:%M:%S') if self.moteur == 'sqlite' else borne.to_pydatetime())
+        return conditions, parametres
+
+    @property
+    def mesures(self):
+        return [m for m in cube.MESURES if self.a_colonne(m)]
+
+    def a_colonne(self, colonne):
+        return cube.canonique(colonne) in self.colonnes.get('sales_facts', [])
+
+    def agreger(self, cles, specs):
+        """Équivalent de faits.groupby(cles, observed=True).agg(specs), exécuté en SQL"""
+        cles_demandees = [cles] if isinstance(cles, str) else list(cles)
+        cles_sql = [cube.canonique(c) for c in cles_demandees]
+        multi = any(isinstance(f, (list, tuple)) for f in specs.values())
+
+        expressions, etiquettes = [], []
+        for colonne, fonctions in specs.items():
+            for fonction in (fonctions if isinstance(fonctions, (list, tuple)) else [fonctions]):
+                expressions.append(f"{FONCTIONS_SQL[fonction].format(_nom(cube.canonique(colonne)))} AS a{len(expressions)}")
+                etiquettes.append((colonne, fonction) if multi else colonne)
+
+        # Clés manquantes exclues, comme dans un groupby pandas
+        conditions, parametres = self._periode()
+        conditions += [f"{_nom(c)} IS NOT NULL" for c in cles_sql]
+        groupes = ', '.join(_nom(c) for c in cles_sql)
+        resultat = self.requete(f"SELECT {groupes}, {', '.join(expressions)} FROM sales_facts "
+                                f"WHERE {' AND '.join(conditions)} GROUP BY {groupes} ORDER BY {groupes}", parametres)
+
+        resultat = resultat.set_index(cles_sql if len(cles_sql) > 1 else cles_sql[0])
+        resultat.columns = pd.MultiIndex.from_tuples(etiquettes) if multi else etiquettes
+        for position, etiquette in enumerate(etiquettes):
+            colonne = etiquette[0] if multi else etiquette
+            if cube.canonique(colonne) == 'order_date':
+                resultat.isetitem(position, pd.to_datetime(resultat.iloc[:, position], errors='coerce'))
+        resultat.index.names = cles_demandees
+        return resultat
+
+    def total(self, colonne, fonction='sum'):
+        """Agrégat global d'une colonne (sum, mean, nunique...)"""
+        conditions, parametres = self._periode()
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        valeur = self.requete(f"SELECT {FONCTIONS_SQL[fonction].format(_nom(cube.canonique(colonne)))} AS v "
+                              f"FROM sales_facts{where}", parametres)['v'].iloc[0]
+        if cube.canonique(colonne) == 'order_date':
+            return pd.to_datetime(valeur)
+        if valeur is None:
+            return np.nan
+        # Scalaire Python, comme le cube et pandas (sérialisable en JSON)
+        return valeur.item() if isinstance(valeur, np.generic) else valeur
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def verifier(faits, backend):
+    """Agrégats SQL par dimension == groupby pandas sur les faits (référence)"""
+    base = preparer_faits(faits)
+    ecarts = []
+    dimensions = [d for d in ('mois_annee', 'jour_semaine', 'category', 'product_name',
+                              'customer_company', 'employee_name', 'country') if d in base.columns]
+    for dimension in dimensions:
+        specs = {m: 'sum' for m in backend.mesures}
+        specs.update({'order_id': 'nunique', 'order_date': 'max'})
+        attendu = base.groupby(dimension, observed=True).agg(specs)
+        obtenu = backend.agreger(dimension, specs)
+        attendu.index = attendu.index.astype(str)
+        obtenu.index = obtenu.index.astype(str)
+        try:
+            pd.testing.assert_frame_equal(attendu.sort_index(), obtenu.sort_index(), check_dtype=False,
+                                          check_index_type=False, check_categorical=False)
+        except AssertionError as e:
+            ecarts.append(dimension)
+            logging.error(f"❌ SQL {dimension}: {e}")
+    if not ecarts:
+        logging.info(f"✅ Agrégats SQL identiques au groupby pandas sur {len(dimensions)} dimensions")
+    return not ecarts
+
+
+if __name__ == "__main__":
+    import argparse
+    import encodage
+
+    parser = argparse.ArgumentParser(description="Base embarquée (SQLite/DuckDB) des tables nettoyées")
+    parser.add_argument('--charger', action='store_true', help="(Re)charger la base depuis les tables publiées")
+    parser.add_argument('--moteur', choices=list(EXTENSIONS), default=MOTEUR_DEFAUT)
+    parser.add_argument('--verifier', action='store_true', help="Comparer les agrégats SQL au cube pandas")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    dossier = Path('../data/processed')
+    if args.charger:
+        dictionnaires = encodage.charger_dictionnaires(dossier)
+        charger({nom: stockage.lire_table(dossier, nom, parse_dates=['order_date'] if nom == 'sales_facts' else None,
+                                          dictionnaires=dictionnaires) for nom in TABLES}, dossier, args.moteur)
+    if args.verifier:
+        backend = BackendSQL.ouvrir(dossier)
+        faits = stockage.lire_table(dossier, 'sales_facts', parse_dates=['order_date'])
+        if backend is None or faits is None:
+            print("❌ Base absente ou périmée, ou table sales_facts absente (python backend_sql.py --charger)")
+        else:
+            verifier(faits, backend)
@@ -0,0 +1,198 @@
+# scripts/cache_excel.py
+import pandas as pd
+from pathlib import Path
+import hashlib
+import json
+import argparse
+import logging
+import time
+
+# Format colonnaire si pyarrow est disponible, pickle sinon
+try:
+    import pyarrow  # noqa: F401
+    FORMAT_DEFAUT = 'parquet'
+except ImportError:
+    FORMAT_DEFAUT = 'pickle'
+
+
+class CacheExcel:
+    """Cache des classeurs Excel parsés, adressé par le contenu.
+
+    Chaque entrée de l'index est identifiée par le nom du fichier et stocke
+    sa taille, son mtime et son empreinte SHA-256. Si taille et mtime n'ont
+    pas bougé, le fichier en cache est lu directement; sinon l'empreinte est
+    recalculée et le classeur n'est reparsé que si le contenu a changé.
+    """
+
+    def __init__(self, cache_path=Path('../data/cache/raw')):
+        self.cache_path = Path(cache_path)
+        self.index_path = self.cache_path / 'index.json'
+        self.index = self._charger_index()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _charger_index(self):
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                logging.warning("⚠️ Index du cache illisible, reconstruction")
+        return {}
+
+    def _sauvegarder_index(self):
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+
+    @staticmethod
+    def empreinte(chemin, taille_bloc=1 << 20):
+        """SHA-256 du contenu du fichier, lu par blocs"""
+        h = hashlib.sha256()
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(taille_bloc), b''):
+                h.update(bloc)
+        return h.hexdigest()
+
+    def _entree_valide(self, chemin):
+        """Entrée d'index à jour pour ce fichier, ou None si absente/périmée"""
+        entree = self.index.get(chemin.name)
+        stat = chemin.stat()
+
+        if entree is None or entree['taille'] != stat.st_size:
+            return None
+
+        if entree['mtime_ns'] != stat.st_mtime_ns:
+            # Fichier touché: on ne le reparse que si le contenu a réellement changé
+            if self.empreinte(chemin) != entree['sha256']:
+                return None
+            entree['mtime_ns'] = stat.st_mtime_ns
+            self._sauvegarder_index()
+        return entree
+
+    def lire(self, chemin):
+        """Retourne le DataFrame en cache pour ce fichier, ou None si absent/périmé"""
+        chemin = Path(chemin)
+        entree = self._entree_valide(chemin)
+        if entree is None:
+            self.stats['misses'] += 1
+            return None
+
+        fichier_cache = self.cache_path / entree['fichier_cache']
+        try:
+            if entree['format'] == 'parquet':
+                df = pd.read_parquet(fichier_cache)
+            else:
+                df = pd.read_pickle(fichier_cache)
+        except Exception as e:
+            logging.warning(f"⚠️ Entrée de cache illisible pour {chemin.name}: {e}")
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return df
+
+    def lire_par_blocs(self, chemin, taille_bloc):
+        """Itérateur de DataFrames de taille_bloc lignes lus dans l'entrée parquet du cache
+
+        Retourne None si l'entrée est absente, périmée ou non parquet: seul le
+        parquet se relit par lots sans charger le fichier entier.
+        """
+        chemin = Path(chemin)
+        entree = self._entree_valide(chemin)
+        if entree is None or entree['format'] != 'parquet':
+            return None
+
+        import pyarrow.parquet as pq
+        fichier = pq.ParquetFile(self.cache_path / entree['fichier_cache'])
+        self.stats['hits'] += 1
+        return (lot.to_pandas() for lot in fichier.iter_batches(batch_size=taille_bloc))
+
+    def ecrire(self, chemin, df):
+        """Enregistre le DataFrame parsé pour ce fichier"""
+        chemin = Path(chemin)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        stat = chemin.stat()
+        sha = self.empreinte(chemin)
+
+        ancienne = self.index.get(chemin.name)
+        format_cache = FORMAT_DEFAUT
+        # Nommé par classeur et contenu: deux classeurs identiques ne partagent
+        # pas de fichier, que la mise à jour de l'un supprimerait
+        base = f"{chemin.stem}_{sha[:16]}"
+        fichier_cache = f"{base}.{format_cache}"
+
+        try:
+            if format_cache == 'parquet':
+                df.to_parquet(self.cache_path / fichier_cache, index=False)
+            else:
+                df.to_pickle(self.cache_path / fichier_cache)
+        except Exception:
+            # Colonnes objet de types mixtes: parquet refuse, pickle accepte tout
+            format_cache = 'pickle'
+            fichier_cache = f"{base}.pickle"
+            df.to_pickle(self.cache_path / fichier_cache)
+
+        self.index[chemin.name] = {
+            'taille': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha,
+            'format': format_cache,
+            'fichier_cache': fichier_cache,
+            'lignes': len(df)
+        }
+        if ancienne and ancienne['fichier_cache'] != fichier_cache:
+            self._supprimer_fichier(ancienne['fichier_cache'])
+        self._sauvegarder_index()
+
+    def _supprimer_fichier(self, fichier_cache):
+        """Supprime un fichier du cache que plus aucune entrée ne référence"""
+        # Les index antérieurs au nommage par classeur peuvent partager un fichier
+        if all(entree['fichier_cache'] != fichier_cache for entree in self.index.values()):
+            (self.cache_path / fichier_cache).unlink(missing_ok=True)
+
+    def charger(self, chemin, lecteur=pd.read_excel):
+        """Lit depuis le cache ou parse le fichier puis met le cache à jour"""
+        df = self.lire(chemin)
+        if df is None:
+            df = lecteur(chemin)
+            self.ecrire(chemin, df)
+        return df
+
+    def invalider(self, fichier=None):
+        """Supprime l'entrée d'un fichier (nom du classeur) ou tout le cache"""
+        noms = [fichier] if fichier else list(self.index)
+        for nom in noms:
+            entree = self.index.pop(nom, None)
+            if entree is None:
+                logging.warning(f"⚠️ Pas d'entrée de cache pour: {nom}")
+                continue
+            self._supprimer_fichier(entree['fichier_cache'])
+            self.stats['invalidations'] += 1
+            logging.info(f"🗑️ Cache invalidé: {nom}")
+        self._sauvegarder_index()
+        return self.stats['invalidations']
+
+    def resume_stats(self):
+        """Résumé des hits/misses de la session"""
+        total = self.stats['hits'] + self.stats['misses']
+        taux = self.stats['hits'] / total * 100 if total else 0
+        return {**self.stats, 'taux_hit': round(taux, 1), 'entrees': len(self.index)}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Gestion du cache des classeurs Excel bruts")
+    parser.add_argument('--invalider', nargs='?', const='', default=None, metavar='FICHIER',
+                        help="Invalider un classeur (ex: 'Orders.xlsx') ou tout le cache si aucun nom")
+    parser.add_argument('--stats', action='store_true', help="Afficher le contenu du cache")
+    args = parser.parse_args()
+
+    cache = CacheExcel()
+    if args.invalider is not None:
+        cache.invalider(args.invalider or None)
+    if args.stats or args.invalider is None:
+        print(f"📦 Cache: {cache.cache_path} ({len(cache.index)} entrées)")
+        for nom, entree in cache.index.items():
+            date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entree['mtime_ns'] / 1e9))
+            print(f"  - {nom}: {entree['lignes']} lignes, {entree['format']}, sha256 {entree['sha256'][:12]}…, modifié {date}")
@@ -0,0 +1,108 @@
+# scripts/calendrier.py
+import pandas as pd
+import numpy as np
+
+JOURS_ORDRE = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Premier mois de l'exercice fiscal (1 = exercice calé sur l'année civile)
+MOIS_DEBUT_EXERCICE = 1
+
+# Attributs texte stockés en catégorielles: les libellés sont construits une
+# fois par jour du calendrier, jamais par ligne de faits
+ATTRIBUTS_LIBELLES = ['month_name', 'day_name', 'periode_mois', 'periode_trimestre',
+                      'periode_semaine', 'periode_exercice']
+
+
+def generer_dim_date(debut, fin, mois_debut_exercice=MOIS_DEBUT_EXERCICE):
+    """Génère la dimension calendrier au grain jour entre deux dates (incluses)
+
+    Clé entière date_key = AAAAMMJJ. Les attributs fiscaux suivent un
+    exercice démarrant au mois mois_debut_exercice et nommé d'après l'année
+    civile de sa fin (exercice juillet 2005 - juin 2006 = FY2006).
+    """
+    jours = pd.date_range(pd.Timestamp(debut).normalize(), pd.Timestamp(fin).normalize(), freq='D')
+    iso = jours.isocalendar()
+
+    decalage = (jours.month - mois_debut_exercice) % 12
+    annee_fiscale = jours.year + (jours.month >= mois_debut_exercice).astype(int) * (mois_debut_exercice > 1)
+
+    dim = pd.DataFrame({
+        'date_key': (jours.year * 10000 + jours.month * 100 + jours.day).astype('int32'),
+        'date': jours,
+        'year': jours.year.astype('int16'),
+        'quarter': jours.quarter.astype('int8'),
+        'month': jours.month.astype('int8'),
+        'month_name': jours.month_name(),
+        'day_of_month': jours.day.astype('int8'),
+        'day_of_year': jours.dayofyear.astype('int16'),
+        'iso_year': iso['year'].to_numpy().astype('int16'),
+        'iso_week': iso['week'].to_numpy().astype('int8'),
+        'weekday': iso['day'].to_numpy().astype('int8'),
+        'day_name': jours.day_name(),
+        'is_weekend': iso['day'].to_numpy() >= 6,
+        'periode_mois': jours.strftime('%Y-%m'),
+        'periode_trimestre': jours.year.astype(str) + '-Q' + jours.quarter.astype(str),
+        'periode_semaine': [f"{a}-W{s:02d}" for a, s in zip(iso['year'], iso['week'])],
+        'fiscal_year': np.asarray(annee_fiscale, dtype='int16'),
+        'fiscal_month': (decalage + 1).astype('int8'),
+        'fiscal_quarter': (decalage // 3 + 1).astype('int8')
+    })
+    dim['periode_exercice'] = 'FY' + dim['fiscal_year'].astype(str) + '-Q' + dim['fiscal_quarter'].astype(str)
+
+    for col in ATTRIBUTS_LIBELLES:
+        dim[col] = pd.Categorical(dim[col], categories=pd.unique(dim[col]), ordered=True)
+    dim['day_name'] = dim['day_name'].cat.set_categories(JOURS_ORDRE, ordered=True)
+
+    return dim
+
+
+def dim_date_pour(dates, mois_debut_exercice=MOIS_DEBUT_EXERCICE):
+    """Calendrier couvrant exactement la plage d'un vecteur de dates"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    if dates.notna().sum() == 0:
+        return generer_dim_date('2000-01-01', '1999-12-31', mois_debut_exercice)
+    return generer_dim_date(dates.min(), dates.max(), mois_debut_exercice)
+
+
+def positions(dates, dim):
+    """Ligne du calendrier pour chaque date (-1 si manquante ou hors plage)
+
+    Recherche arithmétique: nombre de jours depuis le premier jour du calendrier.
+    """
+    valeurs = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy().astype('datetime64[D]')
+    if len(dim) == 0:
+        return np.full(len(valeurs), -1, dtype='int64')
+    debut = np.datetime64(dim['date'].iloc[0], 'D')
+    pos = (valeurs - debut).astype('int64')
+    invalides = np.isnat(valeurs) | (pos < 0) | (pos >= len(dim))
+    pos[invalides] = -1
+    return pos
+
+
+def attribut(dim, pos, nom):
+    """Extrait un attribut du calendrier pour des positions données"""
+    colonne = dim[nom]
+    manquant = pos < 0
+    if isinstance(colonne.dtype, pd.CategoricalDtype):
+        codes = colonne.cat.codes.to_numpy()[np.where(manquant, 0, pos)]
+        codes[manquant] = -1
+        return pd.Categorical.from_codes(codes, dtype=colonne.dtype).remove_unused_categories()
+    valeurs = colonne.to_numpy()[np.where(manquant, 0, pos)]
+    if manquant.any():
+        valeurs = np.where(manquant, np.nan, valeurs.astype('float64'))
+    return valeurs
+
+
+def enrichir(df, colonne_date, attributs, noms=None, dim=None):
+    """Ajoute à df des attributs calendaires lus dans la dimension date
+
+    attributs: colonnes de dim_date à reprendre; noms: nom des colonnes créées
+    (par défaut identiques). Retourne la dimension utilisée pour réemploi.
+    """
+    if dim is None:
+        dim = dim_date_pour(df[colonne_date])
+    pos = positions(df[colonne_date], dim)
+    noms = noms or attributs
+    for nom_attribut, nom_colonne in zip(attributs, noms):
+        df[nom_colonne] = attribut(dim, pos, nom_attribut)
+    return dim
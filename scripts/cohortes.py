@@ -0,0 +1,194 @@
+# scripts/cohortes.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+
+_MOT = 64
+
+
+def _popcount(mots):
+    """Nombre de bits à 1 par mot uint64"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(mots)
+    # numpy < 2.0: table des 256 octets
+    table = np.array([bin(i).count('1') for i in range(256)], dtype='uint8')
+    octets = mots.view('uint8').reshape(*mots.shape, 8)
+    return table[octets].sum(axis=-1, dtype='uint8')
+
+
+def bitsets(codes_lignes, codes_clients, n_lignes, n_clients):
+    """Un bitset de clients par ligne (période ou cohorte): tableau uint64 (n_lignes, mots)
+
+    Les bits sont posés sans boucle: les paires (ligne, mot) sont triées puis
+    leurs bits combinés par bitwise_or.reduceat.
+    """
+    n_mots = max(1, -(-n_clients // _MOT))
+    resultat = np.zeros(n_lignes * n_mots, dtype='uint64')
+    if len(codes_clients) == 0:
+        return resultat.reshape(n_lignes, n_mots)
+
+    cles = codes_lignes.astype('int64') * n_mots + codes_clients // _MOT
+    bits = np.left_shift(np.uint64(1), (codes_clients % _MOT).astype('uint64'))
+    ordre = np.argsort(cles, kind='stable')
+    cles, bits = cles[ordre], bits[ordre]
+    debuts = np.flatnonzero(np.r_[True, cles[1:] != cles[:-1]])
+    resultat[cles[debuts]] = np.bitwise_or.reduceat(bits, debuts)
+    return resultat.reshape(n_lignes, n_mots)
+
+
+def _codes_periodes(periodes):
+    """Mois consécutifs: code = mois écoulés depuis le premier mois observé
+
+    Seules les étiquettes distinctes sont analysées (quelques centaines).
+    """
+    codes, uniques = pd.factorize(pd.Series(periodes).astype(str), sort=False)
+    mois = pd.PeriodIndex(uniques, freq='M')
+    ordinal = mois.year.to_numpy() * 12 + mois.month.to_numpy() - 1
+    premier = ordinal.min()
+    n_periodes = int(ordinal.max() - premier + 1)
+    etiquettes = pd.period_range(mois.min(), periods=n_periodes, freq='M').strftime('%Y-%m')
+    return (ordinal - premier).astype('int64')[codes], n_periodes, etiquettes
+
+
+def analyser_cohortes(clients, periodes, montants=None):
+    """Matrices de rétention par cohorte d'acquisition (mois du premier achat)
+
+    clients, periodes, montants: une entrée par couple (client, mois) actif,
+    les mois au format 'AAAA-MM'. Les clients sont codés en entiers et
+    l'activité de chaque mois tient dans un bitset: la rétention d'une cohorte
+    à M+k est le popcount de (cohorte & actifs du mois), le churn celui de
+    (actifs du mois précédent & ~actifs du mois).
+    """
+    debut = time.perf_counter()
+    codes_clients, uniques = pd.factorize(pd.Series(clients), sort=False)
+    codes_clients = codes_clients.astype('int64')
+    codes_periodes, n_periodes, etiquettes = _codes_periodes(periodes)
+    n_clients = len(uniques)
+
+    # Cohorte de chaque client: premier mois actif
+    cohorte = np.full(n_clients, n_periodes, dtype='int64')
+    np.minimum.at(cohorte, codes_clients, codes_periodes)
+
+    actifs = bitsets(codes_periodes, codes_clients, n_periodes, n_clients)
+    cohortes = bitsets(cohorte, np.arange(n_clients, dtype='int64'), n_periodes, n_clients)
+
+    # Clients de la cohorte k encore actifs k+m mois plus tard
+    comptes = np.zeros((n_periodes, n_periodes), dtype='int64')
+    for k in np.flatnonzero(cohortes.any(axis=1)):
+        comptes[k, :n_periodes - k] = _popcount(cohortes[k] & actifs[k:]).sum(axis=1)
+    taille = comptes[:, 0]
+    decalages = np.arange(n_periodes)
+    observable = decalages[None, :] < (n_periodes - np.arange(n_periodes))[:, None]
+
+    def matrice(valeurs, base):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pourcentages = np.where(observable, valeurs / base[:, None] * 100, np.nan)
+        lignes = base > 0
+        return pd.DataFrame(pourcentages[lignes], index=pd.Index(etiquettes[lignes], name='cohorte'),
+                            columns=pd.Index(decalages, name='mois_depuis_acquisition'))
+
+    resultat = {
+        'retention_cohortes': matrice(comptes, taille),
+        'taille_cohortes': pd.Series(taille[taille > 0], index=pd.Index(etiquettes[taille > 0], name='cohorte'),
+                                     name='nb_clients')
+    }
+
+    # Rétention du CA: CA de la cohorte à M+k rapporté à son CA du mois d'acquisition
+    if montants is not None:
+        decalage = codes_periodes - cohorte[codes_clients]
+        ca = np.bincount(cohorte[codes_clients] * n_periodes + decalage,
+                         weights=np.asarray(montants, dtype='float64'),
+                         minlength=n_periodes * n_periodes).reshape(n_periodes, n_periodes)
+        resultat['retention_ca_cohortes'] = matrice(ca, np.where(taille > 0, ca[:, 0], 0))
+
+    # Churn mois par mois: clients du mois précédent absents ce mois-ci
+    actifs_mois = _popcount(actifs).sum(axis=1)
+    perdus = _popcount(actifs[:-1] & ~actifs[1:]).sum(axis=1)
+    nouveaux = taille[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux_churn = np.where(actifs_mois[:-1] > 0, perdus / actifs_mois[:-1] * 100, np.nan)
+    resultat['churn_mensuel'] = pd.DataFrame({
+        'clients_actifs': actifs_mois[1:],
+        'clients_perdus': perdus,
+        'nouveaux_clients': nouveaux,
+        'clients_revenus': actifs_mois[1:] - (actifs_mois[:-1] - perdus) - nouveaux,
+        'taux_churn': taux_churn,
+        'taux_retention': 100 - taux_churn
+    }, index=pd.Index(etiquettes[1:], name='mois'))
+
+    logging.info(f"👥 Cohortes: {n_clients:,} clients x {n_periodes} mois "
+                 f"({time.perf_counter() - debut:.2f}s)")
+    return resultat
+
+
+def retention_reference(clients, periodes):
+    """Comptes de rétention par groupby pandas (référence de vérification)"""
+    activite = pd.DataFrame({'client': np.asarray(clients), 'periode': pd.PeriodIndex(pd.Index(periodes).astype(str), freq='M')})
+    activite = activite.drop_duplicates()
+    premier = activite.groupby('client')['periode'].transform('min')
+    activite['cohorte'] = premier.dt.strftime('%Y-%m')
+    activite['decalage'] = (activite['periode'] - premier).apply(lambda d: d.n)
+    return activite.groupby(['cohorte', 'decalage']).size().unstack(fill_value=0)
+
+
+def mesurer(n_clients=1_000_000, n_periodes=120, activite=0.15, graine=0):
+    """Temps du moteur sur une activité synthétique et contrôle des comptes par bincount"""
+    rng = np.random.default_rng(graine)
+    premier = rng.integers(0, n_periodes, n_clients)
+    # Chaque client actif un mois sur 1/activite après son acquisition (au moins son premier mois)
+    nb = 1 + rng.binomial(n_periodes - premier, activite)
+    clients = np.repeat(np.arange(n_clients), nb)
+    decalages = (rng.random(len(clients)) * (n_periodes - np.repeat(premier, nb))).astype('int64')
+    decalages[np.r_[0, np.cumsum(nb)[:-1]]] = 0
+    periodes_codes = np.repeat(premier, nb) + decalages
+    cles = np.unique(clients * n_periodes + periodes_codes)
+    clients, periodes_codes = cles // n_periodes, cles % n_periodes
+    etiquettes = pd.period_range('2000-01', periods=n_periodes, freq='M').strftime('%Y-%m')
+    print(f"🧪 {n_clients:,} clients, {n_periodes} mois, {len(clients):,} couples (client, mois) actifs")
+
+    debut = time.perf_counter()
+    resultat = analyser_cohortes(clients, etiquettes[periodes_codes])
+    duree = time.perf_counter() - debut
+
+    # Contrôle: mêmes comptes par bincount sur les couples actifs
+    cohorte = premier[clients]
+    attendu = np.bincount(cohorte * n_periodes + periodes_codes - cohorte,
+                          minlength=n_periodes * n_periodes).reshape(n_periodes, n_periodes)
+    obtenu = (resultat['retention_cohortes'] / 100).mul(resultat['taille_cohortes'], axis=0).round()
+    identique = np.array_equal(np.nan_to_num(obtenu.to_numpy()).astype('int64'),
+                               attendu[np.bincount(premier, minlength=n_periodes) > 0])
+    print(f"⏱️ Matrice de rétention + churn: {duree:.2f}s | {'✅ comptes identiques' if identique else '❌ comptes différents'}")
+    return {'duree_secondes': duree, 'identique': identique}
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    import stockage
+    import cube
+
+    parser = argparse.ArgumentParser(description="Rétention par cohortes d'acquisition")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=1_000_000, default=None, metavar='CLIENTS',
+                        help="Mesurer le moteur sur une activité synthétique")
+    parser.add_argument('--periodes', type=int, default=120, help="Nombre de mois du benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        mesurer(args.benchmark, args.periodes)
+    else:
+        faits = stockage.lire_table(Path('../data/processed'), 'sales_facts', parse_dates=['order_date'])
+        if faits is None:
+            print("❌ Table sales_facts_clean non trouvée")
+        else:
+            activite = cube.CubeVentes.construire(faits).agreger(['customer_company', 'mois_annee'],
+                                                                 {'line_total': 'sum'}).reset_index()
+            resultat = analyser_cohortes(activite['customer_company'], activite['mois_annee'], activite['line_total'])
+            print(resultat['retention_cohortes'].round(1).to_string())
+            print(resultat['churn_mensuel'].round(1).to_string())
+            reference = retention_reference(activite['customer_company'], activite['mois_annee'])
+            obtenu = (resultat['retention_cohortes'] / 100).mul(resultat['taille_cohortes'], axis=0).round()
+            reference = reference.reindex(index=obtenu.index, columns=obtenu.columns, fill_value=0)
+            identique = np.array_equal(obtenu.fillna(0).to_numpy(), reference.to_numpy())
+            print(f"{'✅' if identique else '❌'} Comptes identiques au groupby pandas")
@@ -0,0 +1,292 @@
+# scripts/cube.py
+import pandas as pd
+import logging
+import time
+import calendrier
+import stockage
+
+# Nom canonique -> noms acceptés (nommage etl.py, puis nommage des scripts *_main)
+COLONNES = {
+    'order_year': ('order_year', 'annee'),
+    'order_month': ('order_month',),
+    'mois_annee': ('mois_annee', 'mois'),
+    'jour_semaine': ('jour_semaine',),
+    'category': ('category', 'Category'),
+    'product_name': ('product_name', 'Product Name'),
+    'customer_company': ('customer_company', 'Customer'),
+    'employee_name': ('employee_name', 'Employee'),
+    'country': ('country', 'Country'),
+    'line_total': ('line_total', 'Line Total'),
+    'profit': ('profit', 'Profit'),
+    'quantity': ('quantity', 'Quantity'),
+    'unit_price': ('unit_price', 'Unit Price'),
+    'standard_cost': ('standard_cost', 'Standard Cost'),
+    'order_id': ('order_id', 'Order ID'),
+    'order_date': ('order_date', 'Order Date')
+}
+_CANONIQUE = {nom: canonique for canonique, noms in COLONNES.items() for nom in noms}
+
+MESURES = ['line_total', 'profit', 'quantity', 'unit_price', 'standard_cost']
+# Dimensions dont la valeur est unique par commande (date, client, commercial, pays)
+DIMENSIONS_COMMANDE = ['order_year', 'order_month', 'mois_annee', 'jour_semaine',
+                       'customer_company', 'employee_name', 'country']
+
+# Cuboïdes matérialisés, du plus petit au plus fin. Le nombre de commandes
+# distinctes d'une cellule s'additionne exactement lors d'un cumul tant que
+# la dimension "ligne" du cuboïde (produit, catégorie) reste dans les clés:
+# toutes les autres dimensions ont une seule valeur par commande.
+CUBOIDES = {
+    'commande': (DIMENSIONS_COMMANDE, None),
+    'categorie': (['order_year', 'order_month', 'mois_annee', 'category',
+                   'customer_company', 'employee_name', 'country'], 'category'),
+    'produit': (['order_year', 'order_month', 'mois_annee', 'category', 'product_name',
+                 'customer_company', 'employee_name', 'country'], 'product_name')
+}
+
+
+def canonique(nom):
+    return _CANONIQUE.get(nom, nom)
+
+
+def preparer_faits(df):
+    """Table de base: colonnes utiles sous leur nom canonique, attributs calendaires ajoutés"""
+    base = {}
+    for nom in df.columns:
+        cible = _CANONIQUE.get(nom)
+        if cible is not None and cible not in base:
+            base[cible] = df[nom]
+    base = pd.DataFrame(base)
+
+    if 'order_date' in base.columns:
+        base['order_date'] = pd.to_datetime(base['order_date'], errors='coerce')
+        # Attributs lus dans la dimension date, jamais formatés par ligne
+        calendrier.enrichir(base, 'order_date', ['year', 'month', 'periode_mois', 'day_name'],
+                            ['order_year', 'order_month', 'mois_annee', 'jour_semaine'])
+        # Semaine complète: catégories identiques d'un cube à l'autre (fusion)
+        base['jour_semaine'] = base['jour_semaine'].cat.set_categories(calendrier.JOURS_ORDRE, ordered=True)
+    return base
+
+
+def _harmoniser(a, b):
+    """Aligne les catégories des dimensions catégorielles de deux tables de cellules"""
+    for colonne in a.columns.intersection(b.columns):
+        types = (a[colonne].dtype, b[colonne].dtype)
+        if not any(isinstance(t, pd.CategoricalDtype) for t in types) or types[0] == types[1]:
+            continue
+        categories = pd.Index([])
+        for t, serie in zip(types, (a[colonne], b[colonne])):
+            valeurs = t.categories if isinstance(t, pd.CategoricalDtype) else pd.Index(serie.dropna().unique())
+            categories = categories.union(valeurs.astype(object))
+        ordonnee = any(isinstance(t, pd.CategoricalDtype) and t.ordered for t in types)
+        type_commun = pd.CategoricalDtype(categories, ordered=ordonnee)
+        a[colonne] = a[colonne].astype(object).astype(type_commun)
+        b[colonne] = b[colonne].astype(object).astype(type_commun)
+    return a, b
+
+
+def _agregats_cellule(base, mesures):
+    agregats = {}
+    for mesure in mesures:
+        agregats[mesure] = (mesure, 'sum')
+        agregats[f'n_{mesure}'] = (mesure, 'count')
+    if 'order_id' in base.columns:
+        agregats['nb_commandes'] = ('order_id', 'nunique')
+    if 'order_date' in base.columns:
+        agregats['date_min'] = ('order_date', 'min')
+        agregats['date_max'] = ('order_date', 'max')
+    return agregats
+
+
+class CubeVentes:
+    """Cube d'agrégats des ventes (sommes, comptes, commandes distinctes, dates min/max).
+
+    Construit en un passage par cuboïde sur la table de faits, il répond
+    ensuite aux groupby().agg() des analyses par cumul de cellules, sans
+    relire les faits. Les noms de colonnes des deux nommages sont acceptés
+    et les résultats portent les noms demandés.
+    """
+
+    def __init__(self, cuboides, mesures):
+        self.cuboides = cuboides
+        self.mesures = mesures
+
+    @classmethod
+    def construire(cls, df):
+        debut = time.perf_counter()
+        base = preparer_faits(df)
+        mesures = [m for m in MESURES if m in base.columns]
+        agregats = _agregats_cellule(base, mesures)
+
+        cuboides = {}
+        for nom, (dimensions, _) in CUBOIDES.items():
+            dimensions = [d for d in dimensions if d in base.columns]
+            cellules = base.groupby(dimensions, observed=True, dropna=False, sort=False).agg(
+                nb_lignes=(dimensions[0], 'size'), **agregats)
+            cuboides[nom] = cellules.reset_index()
+
+        tailles = ', '.join(f"{nom} {len(c):,}" for nom, c in cuboides.items())
+        logging.info(f"🧊 Cube des ventes: {len(base):,} lignes -> cellules {tailles} "
+                     f"({time.perf_counter() - debut:.2f}s)")
+        return cls(cuboides, mesures)
+
+    def fusionner(self, autre):
+        """Cube des faits réunis: sommes et comptes additionnés, dates min/max combinées
+
+        Les commandes distinctes s'additionnent: les faits de autre doivent
+        porter sur des commandes absentes de ce cube.
+        """
+        mesures = [m for m in MESURES if m in self.mesures or m in autre.mesures]
+        cuboides = {}
+        for nom, cellules in self.cuboides.items():
+            a, b = _harmoniser(cellules.copy(), autre.cuboides[nom].copy())
+            dimensions = [d for d in CUBOIDES[nom][0] if d in a.columns]
+            agregats = {c: 'sum' for c in a.columns if c not in dimensions and not c.startswith('date_')}
+            agregats.update({'date_min': 'min', 'date_max': 'max'} if 'date_min' in a.columns else {})
+            cuboides[nom] = (pd.concat([a, b], ignore_index=True)
+                             .groupby(dimensions, observed=True, dropna=False, sort=False)
+                             .agg(agregats).reset_index())
+        return CubeVentes(cuboides, mesures)
+
+    def sauvegarder(self, dossier):
+        """Persiste les cuboïdes (un fichier par cuboïde)"""
+        for nom, cellules in self.cuboides.items():
+            stockage.ecrire_table(cellules, dossier, f'cube_{nom}')
+
+    @classmethod
+    def charger(cls, dossier):
+        """Cube persisté par sauvegarder(), ou None s'il est absent ou incomplet"""
+        cuboides = {}
+        for nom in CUBOIDES:
+            cellules = stockage.lire_table(dossier, f'cube_{nom}', dictionnaires={})
+            if cellules is None:
+                return None
+            cuboides[nom] = cellules
+        return cls.depuis_cuboides(cuboides)
+
+    @classmethod
+    def depuis_cuboides(cls, cuboides):
+        """Cube à partir de tables de cellules déjà calculées (relues ou partagées)"""
+        return cls(cuboides, [m for m in MESURES if m in cuboides['commande'].columns])
+
+    def _dimensions(self, nom):
+        return [d for d in CUBOIDES[nom][0] if d in self.cuboides[nom].columns]
+
+    def _cuboide_pour(self, cles, colonne=None, fonction=None):
+        """Plus petit cuboïde qui contient les clés et calcule exactement l'agrégat demandé"""
+        requises = set(cles) | ({colonne} if fonction == 'nunique' and colonne != 'order_id' else set())
+        for nom, (_, grain) in CUBOIDES.items():
+            if not requises <= set(self._dimensions(nom)):
+                continue
+            # Commandes distinctes: le grain ligne du cuboïde doit figurer dans les clés
+            if fonction == 'nunique' and colonne == 'order_id' and grain is not None and grain not in cles:
+                continue
+            return nom
+        raise KeyError(f"Agrégat {colonne}/{fonction} par {list(cles)} non disponible dans le cube")
+
+    def _agreger_colonne(self, groupes, colonne, fonction):
+        if fonction == 'sum' and colonne in self.mesures:
+            return groupes[colonne].sum()
+        if fonction == 'mean' and colonne in self.mesures:
+            return groupes[colonne].sum() / groupes[f'n_{colonne}'].sum()
+        if fonction == 'count' and colonne in self.mesures:
+            return groupes[f'n_{colonne}'].sum()
+        if fonction in ('size', 'count'):
+            return groupes['nb_lignes'].sum()
+        if fonction == 'nunique' and colonne == 'order_id':
+            return groupes['nb_commandes'].sum()
+        if fonction == 'nunique':
+            return groupes[colonne].nunique()
+        if colonne == 'order_date' and fonction in ('min', 'max'):
+            return groupes[f'date_{fonction}'].agg(fonction)
+        raise KeyError(f"Agrégat {colonne}/{fonction} non disponible dans le cube")
+
+    def agreger(self, cles, specs):
+        """Équivalent de faits.groupby(cles, observed=True).agg(specs), calculé sur les cellules"""
+        cles_demandees = [cles] if isinstance(cles, str) else list(cles)
+        cles_cube = [canonique(c) for c in cles_demandees]
+        multi = any(isinstance(f, (list, tuple)) for f in specs.values())
+
+        groupes = {}
+        colonnes = {}
+        for colonne, fonctions in specs.items():
+            for fonction in (fonctions if isinstance(fonctions, (list, tuple)) else [fonctions]):
+                nom = self._cuboide_pour(cles_cube, canonique(colonne), fonction)
+                if nom not in groupes:
+                    groupes[nom] = self.cuboides[nom].groupby(cles_cube if len(cles_cube) > 1 else cles_cube[0],
+                                                              observed=True, sort=True)
+                etiquette = (colonne, fonction) if multi else colonne
+                colonnes[etiquette] = self._agreger_colonne(groupes[nom], canonique(colonne), fonction)
+
+        resultat = pd.DataFrame(colonnes)
+        if multi:
+            resultat.columns = pd.MultiIndex.from_tuples(resultat.columns)
+        resultat.index.names = cles_demandees
+        return resultat
+
+    def total(self, colonne, fonction='sum'):
+        """Agrégat global d'une colonne (sum, mean, nunique...)"""
+        nom = self._cuboide_pour([], canonique(colonne), fonction)
+        cellules = self.cuboides[nom]
+        colonne = canonique(colonne)
+        if fonction == 'nunique' and colonne == 'order_id':
+            return int(cellules['nb_commandes'].sum())
+        if fonction == 'nunique':
+            return cellules[colonne].nunique()
+        if fonction == 'mean':
+            return cellules[colonne].sum() / cellules[f'n_{colonne}'].sum()
+        if colonne == 'order_date' and fonction in ('min', 'max'):
+            return cellules[f'date_{fonction}'].agg(fonction)
+        return cellules[colonne].sum()
+
+    def a_colonne(self, colonne):
+        """Vrai si la colonne (dimension ou mesure) est disponible dans le cube"""
+        colonne = canonique(colonne)
+        return any(colonne in c.columns for c in self.cuboides.values())
+
+
+def construire(df):
+    return CubeVentes.construire(df)
+
+
+def verifier(df, cube_ventes=None):
+    """Compare les réponses du cube aux groupby sur les faits (dimensions et mesures présentes)"""
+    cube_ventes = cube_ventes or CubeVentes.construire(df)
+    base = preparer_faits(df)
+    ecarts = []
+    dimensions = [d for d in ('mois_annee', 'jour_semaine', 'category', 'product_name',
+                              'customer_company', 'employee_name', 'country') if d in base.columns]
+    for dimension in dimensions:
+        specs = {m: 'sum' for m in cube_ventes.mesures}
+        if 'order_id' in base.columns:
+            specs['order_id'] = 'nunique'
+        attendu = base.groupby(dimension, observed=True).agg(specs)
+        obtenu = cube_ventes.agreger(dimension, specs)
+        try:
+            pd.testing.assert_frame_equal(attendu, obtenu, check_dtype=False, check_index_type=False,
+                                          check_categorical=False)
+        except AssertionError as e:
+            ecarts.append(dimension)
+            logging.error(f"❌ Cube {dimension}: {e}")
+    if not ecarts:
+        logging.info(f"✅ Cube identique aux faits sur {len(dimensions)} dimensions")
+    return not ecarts
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Cube d'agrégats des ventes")
+    parser.add_argument('--verifier', action='store_true', help="Comparer le cube aux groupby sur les faits")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    faits = stockage.lire_table(Path('../data/processed'), 'sales_facts', parse_dates=['order_date'])
+    if faits is None:
+        print("❌ Table sales_facts_clean non trouvée")
+    else:
+        cube_ventes = CubeVentes.construire(faits)
+        for nom, cellules in cube_ventes.cuboides.items():
+            print(f"🧊 {nom}: {len(cellules):,} cellules")
+        if args.verifier:
+            verifier(faits, cube_ventes)
@@ -8,10 +8,15 @@ import numpy as np
 from pathlib import Path
 import warnings
 import os
+import calendrier
+import stockage
+import index_temporel
+from analysis import AnalyseNorthwind
+import backend_sql
 warnings.filterwarnings('ignore')
 
 class DashboardNorthwind:
-    def __init__(self):
+    def __init__(self, debut=None, fin=None, erreur_distincts=None, backend='pandas'):
         # Chemin relatif corrigé
         current_dir = Path(__file__).parent
         self.data_path = current_dir / 'data' / 'processed'
@@ -19,6 +24,16 @@ class DashboardNorthwind:
         # Créer le dossier si nécessaire
         self.data_path.mkdir(parents=True, exist_ok=True)
         self.donnees = {}
+        # Période affichée (bornes incluses): seules les partitions concernées sont lues
+        self.debut = debut
+        self.fin = fin
+        # None: nunique exact; sinon comptes distincts estimés par HyperLogLog à cette erreur type
+        self.erreur_distincts = erreur_distincts
+        self._analyse = None
+        # 'sql': KPI calculés par la base embarquée (etl.py --base-sql), une analyse par période
+        self.backend = backend
+        # Faits triés par date pour le filtre de période (tranches par recherche dichotomique)
+        self.index_temporel = None
         
     def charger_donnees(self):
         """Charge les données pour le dashboard"""
@@ -32,27 +47,33 @@ class DashboardNorthwind:
                 return False
                 
             # Liste les fichiers disponibles
-            fichiers = list(self.data_path.glob('*.csv'))
+            fichiers = [f for f in self.data_path.glob('*_clean*') if f.is_dir() or f.suffix in stockage.EXTENSIONS.values()]
             print(f"📋 Fichiers trouvés: {[f.name for f in fichiers]}")
             
             # Charger la table de faits
-            chemin_faits = self.data_path / 'sales_facts_clean.csv'
-            if chemin_faits.exists():
-                self.donnees['sales_facts'] = pd.read_csv(chemin_faits)
+            if stockage.table_existe(self.data_path, 'sales_facts'):
+                self.donnees['sales_facts'] = stockage.lire_table(self.data_path, 'sales_facts',
+                                                                  debut=self.debut, fin=self.fin)
+                if self.donnees['sales_facts'] is None:
+                    print("❌ Aucune vente sur la période demandée")
+                    return False
                 print(f"✅ Données de vente chargées: {len(self.donnees['sales_facts'])} lignes")
                 
                 # Convertir les dates si la colonne existe
                 if 'order_date' in self.donnees['sales_facts'].columns:
                     self.donnees['sales_facts']['order_date'] = pd.to_datetime(self.donnees['sales_facts']['order_date'])
             else:
-                print("❌ Fichier sales_facts_clean.csv non trouvé")
+                print("❌ Table sales_facts_clean non trouvée")
                 print("💡 Essayez de générer d'abord les données avec analysis_main.py")
                 return False
                 
+            if self.backend == 'sql' and backend_sql.trouver_base(self.data_path) is None:
+                print("⚠️ Base SQL absente ou périmée (etl.py --base-sql): KPI calculés par pandas")
+                self.backend = 'pandas'
+            
             # Charger les produits (optionnel)
-            chemin_produits = self.data_path / 'products_clean.csv'
-            if chemin_produits.exists():
-                self.donnees['products'] = pd.read_csv(chemin_produits)
+            if stockage.table_existe(self.data_path, 'products'):
+                self.donnees['products'] = stockage.lire_table(self.data_path, 'products')
                 print(f"✅ Données produits chargées: {len(self.donnees['products'])} produits")
                 
             return True
@@ -88,20 +109,46 @@ class DashboardNorthwind:
         print("✅ Données d'exemple créées")
         return True
 
-    def calculer_kpi(self, df):
+    def analyse_kpi(self, df, periode=None):
+        """KPI de l'analyse évalués à la demande sur les ventes affichées (un graphe par table)
+        
+        Seuls les KPI demandés et leurs dépendances sont calculés: pas
+        d'analyse produits, stock ou rétention pour les cartes du dashboard.
+        En mode SQL, la période (debut, fin) est filtrée et agrégée par la base.
+        """
+        if self.backend == 'sql':
+            periode = periode or (self.debut, self.fin)
+            if self._analyse is None or self._analyse[0] != periode:
+                analyse = AnalyseNorthwind(*periode, erreur_distincts=self.erreur_distincts, backend='sql')
+                analyse.data_path = self.data_path
+                analyse.charger_donnees_propres()
+                self._analyse = (periode, analyse)
+            return self._analyse[1]
+        if self._analyse is None or self._analyse[0] is not df:
+            analyse = AnalyseNorthwind(erreur_distincts=self.erreur_distincts)
+            analyse.definir_ventes(df)
+            self._analyse = (df, analyse)
+        return self._analyse[1]
+    
+    def calculer_kpi(self, df, periode=None):
         """Calcule les KPI pour le dashboard"""
         try:
+            # Cube (exact), HyperLogLog (--distincts-approx) ou SQL selon le mode de l'analyse
+            analyse = self.analyse_kpi(df, periode)
             kpis = {
-                'ca_total': df['Line Total'].sum(),
-                'profit_total': df['Profit'].sum() if 'Profit' in df.columns else df['Line Total'].sum() * 0.2,
-                'nb_commandes': df['order_id'].nunique(),
-                'nb_clients': df['customer_company'].nunique(),
-                'nb_produits': df['product_name'].nunique(),
-                'quantite_totale': df['Quantity'].sum() if 'Quantity' in df.columns else 0
+                'ca_total': analyse.kpi('chiffre_affaires_total'),
+                'nb_commandes': analyse.kpi('nombre_commandes'),
+                'nb_clients': analyse.kpi('nombre_clients'),
+                'nb_produits': analyse.kpi('nombre_produits_vendus'),
+                'quantite_totale': analyse.kpi('quantite_totale_vendue') if analyse.a_colonne_ventes('quantity') else 0,
+                'panier_moyen': analyse.kpi('panier_moyen')
             }
-            
-            kpis['marge_moyenne'] = (kpis['profit_total'] / kpis['ca_total'] * 100) if kpis['ca_total'] > 0 else 0
-            kpis['panier_moyen'] = kpis['ca_total'] / kpis['nb_commandes'] if kpis['nb_commandes'] > 0 else 0
+            if analyse.a_colonne_ventes('profit'):
+                kpis['profit_total'] = analyse.kpi('profit_total')
+                kpis['marge_moyenne'] = analyse.kpi('marge_moyenne')
+            else:
+                kpis['profit_total'] = kpis['ca_total'] * 0.2
+                kpis['marge_moyenne'] = 20.0 if kpis['ca_total'] > 0 else 0
             
             return kpis
         except Exception as e:
@@ -113,6 +160,51 @@ class DashboardNorthwind:
                 'marge_moyenne': 0, 'panier_moyen': 0
             }
 
+    def figure_retention(self, df):
+        """Matrice de rétention par cohorte d'acquisition (% de clients encore actifs)"""
+        matrice = self.analyse_kpi(df).kpi('retention_cohortes')
+        if matrice is None:
+            return go.Figure()
+        figure = px.imshow(matrice, text_auto='.0f', aspect='auto', color_continuous_scale='Blues',
+                           labels={'x': 'Mois depuis le premier achat', 'y': 'Cohorte', 'color': '% clients'},
+                           title="Rétention clients par cohorte d'acquisition")
+        figure.update_yaxes(type='category')
+        return figure
+
+    def figure_segments_rfm(self, df):
+        """Clients et chiffre d'affaires par segment RFM"""
+        segments = self.analyse_kpi(df).kpi('segments_rfm')
+        if segments is None:
+            return go.Figure()
+        return px.bar(segments.reset_index(), x='segment', y='nb_clients', color='montant',
+                      color_continuous_scale='Viridis', hover_data=['part_clients', 'recence_moyenne'],
+                      labels={'segment': 'Segment RFM', 'nb_clients': 'Clients', 'montant': "CA ($)"},
+                      title='Segmentation RFM des clients')
+
+    def vue_periode(self, debut, fin):
+        """KPI et CA journalier de la période choisie, calculés sur une tranche de l'index temporel"""
+        # Date de fin incluse jusqu'à la fin du jour
+        fin = pd.Timestamp(fin) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns') if fin else None
+        kpis = self.calculer_kpi(self.index_temporel.tranche(debut, fin), (debut, fin))
+        journalier = self.index_temporel.sommes_journalieres('line_total', debut, fin).reset_index()
+        figure = px.bar(journalier, x='jour', y='line_total', title="Chiffre d'affaires journalier",
+                        labels={'jour': 'Jour', 'line_total': 'CA ($)'})
+        texte = f"{kpis['ca_total']:,.0f} $ | {kpis['nb_commandes']} commandes | {kpis['nb_clients']} clients"
+        return texte, figure
+    
+    def filtre_periode(self):
+        """Sélecteur de période et zone des KPI filtrés (vide sans dates de commande)"""
+        if self.index_temporel is None or not len(self.index_temporel.jours):
+            return html.Div()
+        jours = pd.to_datetime(self.index_temporel.jours[[0, -1]] * 86_400 * 10**9)
+        return html.Div([
+            html.H4("📅 Période", style={'color': '#2E86AB'}),
+            dcc.DatePickerRange(id='periode-ventes', min_date_allowed=jours[0], max_date_allowed=jours[1],
+                                start_date=jours[0], end_date=jours[1], display_format='YYYY-MM-DD'),
+            html.H3(id='kpi-periode', style={'color': '#2E86AB'}),
+            dcc.Graph(id='ventes-periode')
+        ], style={'textAlign': 'center', 'margin': '20px'})
+    
     def creer_dashboard(self):
         """Crée l'application Dash"""
         print("🚀 CRÉATION DU DASHBOARD INTERACTIF")
@@ -124,6 +216,9 @@ class DashboardNorthwind:
                 return None
             
         df = self.donnees['sales_facts']
+        if 'order_date' in df.columns:
+            self.index_temporel = index_temporel.IndexTemporel(df)
+            df = self.donnees['sales_facts'] = self.index_temporel.faits
         
         # Initialiser l'app Dash
         app = dash.Dash(__name__)
@@ -134,8 +229,7 @@ class DashboardNorthwind:
         # Préparer les données pour les graphiques
         if 'order_date' in df.columns:
             df['order_date'] = pd.to_datetime(df['order_date'])
-            df['mois'] = df['order_date'].dt.to_period('M').astype(str)
-            df['annee'] = df['order_date'].dt.year
+            calendrier.enrichir(df, 'order_date', ['periode_mois', 'year'], ['mois', 'annee'])
         else:
             # Créer des dates fictives si non disponibles
             df['mois'] = '2023-01'
@@ -164,9 +258,25 @@ class DashboardNorthwind:
                     figure=px.bar(df.head(20), x='product_name', y='Line Total', 
                                  title='Exemple de graphique - Top 20 ventes')
                 )
+            ]),
+            
+            self.filtre_periode(),
+            
+            html.Div([
+                dcc.Graph(figure=self.figure_retention(df))
+            ]),
+            
+            html.Div([
+                dcc.Graph(figure=self.figure_segments_rfm(df))
             ])
         ])
         
+        if self.index_temporel is not None:
+            @app.callback(Output('kpi-periode', 'children'), Output('ventes-periode', 'figure'),
+                          Input('periode-ventes', 'start_date'), Input('periode-ventes', 'end_date'))
+            def mettre_a_jour_periode(debut, fin):
+                return self.vue_periode(debut, fin)
+        
         return app
     
     def lancer_dashboard(self, port=8050):  # Changement de port
@@ -187,9 +297,21 @@ class DashboardNorthwind:
             print("❌ Impossible de créer le dashboard")
 
 # Fonction pour exécuter directement
-def executer_dashboard(port=8050):
-    dashboard = DashboardNorthwind()
+def executer_dashboard(port=8050, debut=None, fin=None, erreur_distincts=None, backend='pandas'):
+    dashboard = DashboardNorthwind(debut=debut, fin=fin, erreur_distincts=erreur_distincts, backend=backend)
     dashboard.lancer_dashboard(port)
 
 if __name__ == "__main__":
-    executer_dashboard()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Dashboard Northwind")
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--debut', default=None, help="Début de la période affichée (AAAA-MM-JJ)")
+    parser.add_argument('--fin', default=None, help="Fin de la période affichée, incluse (AAAA-MM-JJ)")
+    parser.add_argument('--distincts-approx', type=float, nargs='?', const=0.01, default=None, metavar='ERREUR',
+                        help="Comptes distincts estimés par HyperLogLog (erreur type, 0.01 par défaut)")
+    parser.add_argument('--backend', choices=['pandas', 'sql'], default='pandas',
+                        help="KPI calculés en mémoire (pandas) ou par la base embarquée (etl.py --base-sql)")
+    args = parser.parse_args()
+    
+    executer_dashboard(args.port, args.debut, args.fin, args.distincts_approx, args.backend)
\ No newline at end of file
@@ -3,6 +3,7 @@ import dash
 from dash import dcc, html
 import pandas as pd
 from pathlib import Path
+import stockage
 import plotly.express as px
 
 def lancer_dashboard_simple():
@@ -11,8 +12,7 @@ def lancer_dashboard_simple():
     
     try:
         # Charger les données
-        data_path = Path('../data/processed/sales_facts_clean.csv')
-        df = pd.read_csv(data_path)
+        df = stockage.lire_table(Path('../data/processed'), 'sales_facts')
         print(f"✅ Données chargées: {len(df)} lignes")
         
         # Application Dash simple
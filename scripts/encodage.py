@@ -0,0 +1,182 @@
+# scripts/encodage.py
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import json
+import logging
+
+# Colonnes texte répétées sur chaque ligne de faits, stockées en catégorielles.
+# Les alias (nommage des scripts *_main) partagent le dictionnaire de la colonne cible.
+COLONNES_CATEGORIELLES = [
+    'employee_name', 'customer_company', 'product_name', 'category',
+    'country', 'payment_type', 'shipping_company'
+]
+ALIAS = {
+    'Category': 'category',
+    'Product Name': 'product_name',
+    'Employee': 'employee_name',
+    'Customer': 'customer_company',
+    'Payment Type': 'payment_type',
+    'Ship Via': 'shipping_company'
+}
+
+FICHIER_DICTIONNAIRES = 'dictionnaires.json'
+
+
+def _colonne_schema(colonne):
+    """Nom du dictionnaire à utiliser pour une colonne, ou None si non encodée"""
+    if colonne in COLONNES_CATEGORIELLES:
+        return colonne
+    return ALIAS.get(colonne)
+
+
+def charger_dictionnaires(dossier):
+    """Dictionnaires persistés {colonne: [valeurs dans l'ordre des codes]}"""
+    chemin = Path(dossier) / FICHIER_DICTIONNAIRES
+    if not chemin.exists():
+        return {}
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def sauvegarder_dictionnaires(dictionnaires, dossier):
+    """Persiste les dictionnaires à côté des tables nettoyées"""
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    with open(dossier / FICHIER_DICTIONNAIRES, 'w', encoding='utf-8') as f:
+        json.dump(dictionnaires, f, indent=2, ensure_ascii=False)
+
+
+def _aligner(serie, dictionnaires, nom):
+    """Convertit une série en catégorielle dont les codes suivent le dictionnaire
+
+    Les valeurs déjà connues gardent leur code; les nouvelles valeurs sont
+    ajoutées en fin de dictionnaire (codes stables d'une exécution à l'autre).
+    """
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+
+    connues = dictionnaires.get(nom, [])
+    observees = [str(v) for v in serie.cat.categories]
+    deja = set(connues)
+    nouvelles = sorted(v for v in observees if v not in deja)
+    categories = connues + nouvelles
+    dictionnaires[nom] = categories
+
+    if serie.cat.categories.dtype != object and not pd.api.types.is_string_dtype(serie.cat.categories.dtype):
+        serie = serie.cat.rename_categories([str(v) for v in serie.cat.categories])
+    return serie.cat.set_categories(categories)
+
+
+def encoder(df, dictionnaires):
+    """Encode en place les colonnes du schéma présentes dans df; met à jour les dictionnaires"""
+    for colonne in df.columns:
+        nom = _colonne_schema(colonne)
+        if nom is not None:
+            df[colonne] = _aligner(df[colonne], dictionnaires, nom)
+    return df
+
+
+def encoder_tables(tables, dictionnaires):
+    """Encode toutes les tables d'un dictionnaire {nom: DataFrame}"""
+    for df in tables.values():
+        encoder(df, dictionnaires)
+    return dictionnaires
+
+
+def lire_csv(chemin, dictionnaires=None, **kwargs):
+    """read_csv qui parse directement les colonnes du schéma en catégorielles
+
+    Le parseur construit les catégorielles sans passer par une colonne objet;
+    les catégories sont ensuite alignées sur les dictionnaires persistés.
+    """
+    chemin = Path(chemin)
+    if dictionnaires is None:
+        dictionnaires = charger_dictionnaires(chemin.parent)
+
+    colonnes = pd.read_csv(chemin, nrows=0).columns
+    types = {c: 'category' for c in colonnes if _colonne_schema(c) is not None}
+    types.update(kwargs.pop('dtype', None) or {})
+
+    df = pd.read_csv(chemin, dtype=types, **kwargs)
+    for colonne in types:
+        if colonne in df.columns and isinstance(df[colonne].dtype, pd.CategoricalDtype):
+            df[colonne] = _aligner(df[colonne], dictionnaires, _colonne_schema(colonne))
+    return df
+
+
+def generer_faits_synthetiques(n_lignes, graine=42):
+    """Table de faits synthétique encodée (cardinalités proches d'un catalogue réel)"""
+    rng = np.random.default_rng(graine)
+
+    cardinalites = {
+        'employee_name': ('Employee', 50),
+        'customer_company': ('Company', 5000),
+        'product_name': ('Northwind Traders Product', 2000),
+        'category': ('Category', 20),
+        'country': ('Country', 40),
+        'payment_type': ('Payment', 4),
+        'shipping_company': ('Shipping Company', 5)
+    }
+    df = pd.DataFrame({
+        nom: pd.Categorical.from_codes(rng.integers(0, taille, n_lignes),
+                                       categories=pd.Index([f"{prefixe} {i:05d}" for i in range(taille)], dtype=object))
+        for nom, (prefixe, taille) in cardinalites.items()
+    })
+    df['order_id'] = rng.integers(0, n_lignes // 3 + 1, n_lignes)
+    df['line_total'] = rng.uniform(1, 5000, n_lignes).round(2)
+    df['profit'] = (df['line_total'] * rng.uniform(0.05, 0.4, n_lignes)).round(2)
+    return df
+
+
+def mesurer_gains(n_lignes=10_000_000, repetitions=3):
+    """Mesure mémoire et temps de groupby: colonnes objet vs catégorielles"""
+    import time
+
+    def chrono(fonction):
+        meilleur = float('inf')
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction()
+            meilleur = min(meilleur, time.perf_counter() - debut)
+        return meilleur
+
+    print(f"🧪 Table synthétique: {n_lignes:,} lignes")
+    encode = generer_faits_synthetiques(n_lignes)
+    # Colonnes texte "comme lues depuis un CSV": une chaîne Python par cellule
+    brut = encode.astype({colonne: object for colonne in COLONNES_CATEGORIELLES})
+
+    resultats = {
+        'memoire_objet_mo': brut.memory_usage(deep=True).sum() / 1e6,
+        'memoire_categorielle_mo': encode.memory_usage(deep=True).sum() / 1e6
+    }
+    for colonne in ('product_name', 'customer_company', 'employee_name'):
+        t_objet = chrono(lambda: brut.groupby(colonne)['line_total'].sum())
+        t_cat = chrono(lambda: encode.groupby(colonne, observed=True)['line_total'].sum())
+        resultats[f'groupby_{colonne}'] = (t_objet, t_cat)
+
+    print(f"💾 Mémoire: {resultats['memoire_objet_mo']:,.0f} Mo (objet) -> "
+          f"{resultats['memoire_categorielle_mo']:,.0f} Mo (catégorielle), "
+          f"x{resultats['memoire_objet_mo'] / resultats['memoire_categorielle_mo']:.1f}")
+    for cle, valeur in resultats.items():
+        if cle.startswith('groupby_'):
+            t_objet, t_cat = valeur
+            print(f"⏱️ {cle}: {t_objet:.3f}s (objet) -> {t_cat:.3f}s (catégorielle), x{t_objet / t_cat:.1f}")
+    return resultats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encodage catégoriel des colonnes texte")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=10_000_000, default=None, metavar='LIGNES',
+                        help="Mesurer mémoire et groupby sur une table synthétique (10M lignes par défaut)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        mesurer_gains(args.benchmark)
+    else:
+        dictionnaires = charger_dictionnaires(Path('../data/processed'))
+        for nom, valeurs in dictionnaires.items():
+            print(f"📖 {nom}: {len(valeurs)} valeurs")
@@ -0,0 +1,166 @@
+# scripts/etat_kpi.py
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import logging
+import json
+import time
+import stockage
+import cube
+
+NOM_FAITS = 'sales_facts'
+# Unité de relecture d'une table de faits non partitionnée (fichier unique ou morceaux)
+UNITE_TABLE = 'table'
+
+
+def _unite(partition):
+    """Clé texte d'une partition (année, mois); 'defaut' pour les dates manquantes"""
+    return 'defaut' if partition is None else f"{partition[0]}-{partition[1]:02d}"
+
+
+def _fichiers(repertoire):
+    return [[f.name, f.stat().st_size, f.stat().st_mtime_ns] for f in sorted(repertoire.glob('part-*'))]
+
+
+def signatures_faits(dossier):
+    """Signature (nom, taille, mtime) des fichiers de la table de faits, par unité de relecture
+
+    Table partitionnée: une unité par partition année/mois, seules les
+    partitions réécrites seront relues. Sinon la table entière forme une unité.
+    """
+    dossier = Path(dossier)
+    if stockage.disposition_table(dossier, NOM_FAITS) == 'partitions':
+        racine = stockage.chemin_dataset(dossier, NOM_FAITS)
+        return {_unite(p): _fichiers(stockage._repertoire_partition(racine, p))
+                for p in stockage.lister_partitions(dossier, NOM_FAITS)}
+    chemin = stockage.trouver_table(dossier, NOM_FAITS)
+    if chemin is None:
+        return {}
+    if chemin.is_dir():
+        return {UNITE_TABLE: _fichiers(chemin)}
+    return {UNITE_TABLE: [[chemin.name, chemin.stat().st_size, chemin.stat().st_mtime_ns]]}
+
+
+def empreintes_commandes(faits, partitionnee=True):
+    """Empreinte de chaque commande des faits: unité de stockage, nombre de lignes, montant"""
+    base = cube.preparer_faits(faits)
+    dates = base['order_date']
+    if partitionnee:
+        unites = np.where(dates.isna(), 'defaut',
+                          dates.dt.year.astype('Int64').astype(str) + '-' + dates.dt.month.astype('Int64').astype(str).str.zfill(2))
+    else:
+        unites = np.full(len(base), UNITE_TABLE)
+    empreintes = (base.assign(unite=unites)
+                  .groupby('order_id', observed=True, sort=False)
+                  .agg(unite=('unite', 'first'), nb_lignes=('order_id', 'size'), line_total=('line_total', 'sum')))
+    return empreintes
+
+
+class EtatKPI:
+    """État agrégé des ventes conservé entre deux analyses.
+
+    Le cube (sommes, comptes, commandes distinctes, dates min/max) est
+    fusionnable: des faits de commandes nouvelles s'y ajoutent en un temps
+    proportionnel au delta. Les empreintes par commande permettent de
+    reconnaître les faits déjà comptés quand une partition est réécrite, et
+    les signatures de fichiers de ne relire que les partitions modifiées.
+    """
+
+    def __init__(self, cube_ventes, empreintes, signatures):
+        self.cube = cube_ventes
+        self.empreintes = empreintes
+        self.signatures = signatures
+        # Lignes de faits intégrées par la dernière mise à jour (None: aucune)
+        self.delta = None
+        self.stats = {}
+
+    @classmethod
+    def depuis_faits(cls, cube_ventes, faits, signatures):
+        """État d'une analyse complète (cube déjà construit sur ces faits)"""
+        partitionnee = UNITE_TABLE not in signatures
+        return cls(cube_ventes, empreintes_commandes(faits, partitionnee), signatures)
+
+    def sauvegarder(self, dossier):
+        dossier = Path(dossier)
+        dossier.mkdir(parents=True, exist_ok=True)
+        self.cube.sauvegarder(dossier)
+        stockage.ecrire_table(self.empreintes.reset_index(), dossier, 'empreintes')
+        meta = {
+            'signatures': self.signatures,
+            'nb_commandes': int(len(self.empreintes)),
+            'date_mise_a_jour': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(dossier / 'etat_kpi.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        logging.info(f"💾 État KPI sauvegardé ({len(self.empreintes)} commandes)")
+
+    @classmethod
+    def charger(cls, dossier):
+        """État persisté, ou None s'il est absent ou incomplet"""
+        dossier = Path(dossier)
+        if not (dossier / 'etat_kpi.json').exists():
+            return None
+        with open(dossier / 'etat_kpi.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        cube_ventes = cube.CubeVentes.charger(dossier)
+        empreintes = stockage.lire_table(dossier, 'empreintes', dictionnaires={})
+        if cube_ventes is None or empreintes is None:
+            return None
+        return cls(cube_ventes, empreintes.set_index('order_id'), meta['signatures'])
+
+    def _lire_unites(self, dossier, unites, dictionnaires):
+        if UNITE_TABLE in unites:
+            return stockage.lire_table(dossier, NOM_FAITS, parse_dates=['order_date'], dictionnaires=dictionnaires)
+        partitions = [p for p in stockage.lister_partitions(dossier, NOM_FAITS) if _unite(p) in unites]
+        return stockage.lire_partitions(dossier, NOM_FAITS, partitions=partitions, dictionnaires=dictionnaires)
+
+    def mettre_a_jour(self, dossier, dictionnaires=None):
+        """Intègre au cube les commandes apparues dans la table de faits
+
+        Retourne le nombre de lignes ajoutées, ou None si une commande déjà
+        comptée a changé ou disparu: les cellules ne se soustraient pas, une
+        reconstruction complète est alors nécessaire.
+        """
+        debut = time.perf_counter()
+        signatures = signatures_faits(dossier)
+        if (UNITE_TABLE in signatures) != (UNITE_TABLE in self.signatures):
+            logging.warning("⚠️ Disposition de la table de faits modifiée")
+            return None
+        disparues = set(self.signatures) - set(signatures)
+        if disparues:
+            logging.warning(f"⚠️ Partitions supprimées depuis le dernier état: {sorted(disparues)}")
+            return None
+
+        modifiees = {u for u, fichiers in signatures.items() if self.signatures.get(u) != fichiers}
+        self.stats = {'unites_relues': len(modifiees), 'unites': len(signatures), 'lignes_ajoutees': 0}
+        if not modifiees:
+            self.signatures = signatures
+            logging.info("✅ Table de faits inchangée, état KPI à jour")
+            return 0
+
+        faits = self._lire_unites(dossier, modifiees, dictionnaires)
+        faits = faits if faits is not None else pd.DataFrame(columns=['order_id', 'order_date', 'line_total'])
+        relues = empreintes_commandes(faits, UNITE_TABLE not in signatures)
+
+        # Commandes déjà comptées: même empreinte, sinon reconstruction
+        connues = relues.index.intersection(self.empreintes.index)
+        avant, apres = self.empreintes.loc[connues], relues.loc[connues]
+        changees = ((avant['unite'] != apres['unite']) | (avant['nb_lignes'] != apres['nb_lignes'])
+                    | ~np.isclose(avant['line_total'], apres['line_total'], rtol=1e-9, equal_nan=True))
+        absentes = self.empreintes.index[self.empreintes['unite'].isin(modifiees)].difference(relues.index)
+        if changees.any() or len(absentes):
+            logging.warning(f"⚠️ {int(changees.sum())} commande(s) modifiée(s), {len(absentes)} retirée(s) "
+                            f"depuis le dernier état")
+            return None
+
+        nouvelles = relues.index.difference(connues)
+        delta = faits[faits['order_id'].isin(nouvelles)]
+        if len(delta):
+            self.cube = self.cube.fusionner(cube.CubeVentes.construire(delta))
+            self.empreintes = pd.concat([self.empreintes, relues.loc[nouvelles]])
+            self.delta = delta
+        self.signatures = signatures
+        self.stats['lignes_ajoutees'] = len(delta)
+        logging.info(f"🔁 État KPI: {len(nouvelles)} commande(s) nouvelle(s), {len(delta)} ligne(s) intégrée(s) "
+                     f"({len(modifiees)}/{len(signatures)} unité(s) relue(s), {time.perf_counter() - debut:.2f}s)")
+        return len(delta)
@@ -5,6 +5,22 @@ from pathlib import Path
 import warnings
 from datetime import datetime
 import logging
+import os
+import time
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+import tempfile
+from cache_excel import CacheExcel
+import schema_etoile
+import calendrier
+import encodage
+import stockage
+import instrumentation
+import lecteur_excel
+import profilage
+import backend_sql
+import index_temporel
 
 # Configuration du logging
 logging.basicConfig(
@@ -18,56 +34,185 @@ logging.basicConfig(
 
 warnings.filterwarnings('ignore')
 
+def _lire_classeur(chemin, lecteur='pandas'):
+    """Lit un classeur Excel (fonction de module pour être exécutable dans un worker)"""
+    if lecteur == 'flux':
+        return lecteur_excel.lire_classeur(chemin)
+    return pd.read_excel(chemin)
+
 class ETLNorthwind:
-    def __init__(self):
+    # Classeurs bruts à charger (nom logique -> fichier Excel)
+    FICHIERS_BRUTS = {
+        'orders': 'Orders.xlsx',
+        'order_details': 'Order Details.xlsx', 
+        'products': 'Products.xlsx',
+        'customers': 'Customers.xlsx',
+        'employees': 'Employees.xlsx',
+        'inventory': 'Inventory Transactions.xlsx',
+        'inventory_types': 'Inventory Transaction Types.xlsx',
+        'orders_status': 'Orders Status.xlsx',
+        'order_details_status': 'Order Details Status.xlsx',
+        'orders_tax_status': 'Orders Tax Status.xlsx',
+        'privileges': 'Privileges.xlsx',
+        'employee_privileges': 'Employee Privileges.xlsx'
+    }
+    
+    # Tables construites commande par commande (les autres sont des dimensions)
+    TABLES_INCREMENTALES = ['orders', 'order_details', 'sales_facts']
+    
+    # Tables publiées en partitions order_year=/order_month= (d'après order_date)
+    TABLES_PARTITIONNEES = ['sales_facts']
+    
+    def __init__(self, chargement_parallele=False, n_workers=None, utiliser_cache=True,
+                 format_sortie=stockage.FORMAT_DEFAUT, compression='zstd', export_excel=False, partitionner=True,
+                 lecteur='pandas', base_sql=False):
         self.data_path = Path('../data')
         self.raw_path = self.data_path / 'raw'
         self.processed_path = self.data_path / 'processed'
         self.donnees_brutes = {}
         self.donnees_propres = {}
         self.stats_etl = {}
+        self.chargement_parallele = chargement_parallele
+        self.n_workers = n_workers
+        self.cache = CacheExcel(self.data_path / 'cache' / 'raw') if utiliser_cache else None
+        self.dictionnaires = encodage.charger_dictionnaires(self.processed_path)
+        if format_sortie not in stockage.FORMATS_PUBLICATION:
+            raise ValueError(f"Format de sortie non publiable: {format_sortie} (xlsx: utiliser export_excel)")
+        self.format_sortie = format_sortie
+        self.compression = compression
+        self.export_excel = export_excel
+        self.partitionner = partitionner
+        # 'pandas' (pd.read_excel) ou 'flux' (lecteur openpyxl en lecture seule, mémoire bornée)
+        self.lecteur = lecteur
+        # Tables nettoyées chargées aussi dans une base embarquée (SQLite/DuckDB) indexée
+        self.base_sql = base_sql
+        self._executeur_excel = None
+        self._exports_excel = []
+        # Profils des tables nettoyées, calculés une fois et partagés qualité / rapport
+        self.profileur = profilage.ProfileurDonnees()
         
-    def charger_donnees_brutes(self):
-        """Charge toutes les données brutes avec gestion d'erreurs"""
+    def charger_donnees_brutes(self, exclure=()):
+        """Charge toutes les données brutes (sauf les tables exclure) avec gestion d'erreurs"""
         logging.info("📥 CHARGEMENT DES DONNÉES BRUTES")
         
-        fichiers = {
-            'orders': 'Orders.xlsx',
-            'order_details': 'Order Details.xlsx', 
-            'products': 'Products.xlsx',
-            'customers': 'Customers.xlsx',
-            'employees': 'Employees.xlsx',
-            'inventory': 'Inventory Transactions.xlsx',
-            'inventory_types': 'Inventory Transaction Types.xlsx',
-            'orders_status': 'Orders Status.xlsx',
-            'order_details_status': 'Order Details Status.xlsx',
-            'orders_tax_status': 'Orders Tax Status.xlsx',
-            'privileges': 'Privileges.xlsx',
-            'employee_privileges': 'Employee Privileges.xlsx'
+        debut = time.perf_counter()
+        
+        # Fichiers présents sur disque
+        a_lire = {}
+        for nom, fichier in self.FICHIERS_BRUTS.items():
+            if nom in exclure:
+                continue
+            chemin = self.raw_path / fichier
+            if chemin.exists():
+                a_lire[nom] = chemin
+            else:
+                logging.warning(f"⚠️ Fichier non trouvé: {fichier}")
+        
+        # Classeurs inchangés depuis le dernier parsing: lecture depuis le cache
+        if self.cache is not None:
+            for nom, chemin in list(a_lire.items()):
+                df = self.cache.lire(chemin)
+                if df is not None:
+                    self.donnees_brutes[nom] = df
+                    del a_lire[nom]
+                    logging.info(f"✅ {chemin.name} chargé depuis le cache ({len(df)} lignes)")
+        
+        if not a_lire:
+            mode = "cache"
+        elif self.chargement_parallele and len(a_lire) > 1:
+            n_workers = self.n_workers or min(len(a_lire), os.cpu_count() or 1)
+            self._charger_parallele(a_lire, n_workers)
+            mode = f"parallèle ({n_workers} workers)"
+        else:
+            self._charger_serie(a_lire)
+            mode = "série"
+        
+        # Mise à jour du cache pour les classeurs reparsés
+        if self.cache is not None:
+            for nom, chemin in a_lire.items():
+                if nom in self.donnees_brutes:
+                    try:
+                        self.cache.ecrire(chemin, self.donnees_brutes[nom])
+                    except Exception as e:
+                        logging.warning(f"⚠️ Mise en cache impossible pour {chemin.name}: {e}")
+        
+        # Ordre stable, indépendant de l'ordre d'arrivée des résultats
+        self.donnees_brutes = {nom: self.donnees_brutes[nom] for nom in self.FICHIERS_BRUTS if nom in self.donnees_brutes}
+        
+        duree = time.perf_counter() - debut
+        self.stats_etl['chargement'] = {
+            'mode': mode,
+            'fichiers_charges': len(self.donnees_brutes),
+            'duree_secondes': round(duree, 3)
         }
+        logging.info(f"⏱️ Chargement {mode}: {duree:.2f}s")
         
-        for nom, fichier in fichiers.items():
-            try:
-                chemin = self.raw_path / fichier
-                if chemin.exists():
-                    self.donnees_brutes[nom] = pd.read_excel(chemin)
-                    logging.info(f"✅ {fichier} chargé ({len(self.donnees_brutes[nom])} lignes)")
-                else:
-                    logging.warning(f"⚠️ Fichier non trouvé: {fichier}")
-            except Exception as e:
-                logging.error(f"❌ Erreur avec {fichier}: {e}")
+        if self.cache is not None:
+            self.stats_etl['cache'] = self.cache.resume_stats()
+            logging.info(f"📦 Cache: {self.stats_etl['cache']['hits']} hits, {self.stats_etl['cache']['misses']} misses")
                 
         return self.donnees_brutes
     
-    def nettoyer_orders(self):
-        """Nettoie la table Orders de manière robuste"""
+    def _charger_serie(self, a_lire):
+        """Lit les classeurs un par un"""
+        for nom, chemin in a_lire.items():
+            try:
+                self.donnees_brutes[nom] = _lire_classeur(chemin, self.lecteur)
+                logging.info(f"✅ {chemin.name} chargé ({len(self.donnees_brutes[nom])} lignes)")
+            except Exception as e:
+                logging.error(f"❌ Erreur avec {chemin.name}: {e}")
+    
+    def _charger_parallele(self, a_lire, n_workers):
+        """Lit les classeurs dans un pool de processus (parsing openpyxl CPU-bound)"""
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(_lire_classeur, chemin, self.lecteur): (nom, chemin) for nom, chemin in a_lire.items()}
+            
+            # Remplissage au fil de l'eau, dans l'ordre de fin de lecture
+            for future in as_completed(futures):
+                nom, chemin = futures[future]
+                try:
+                    self.donnees_brutes[nom] = future.result()
+                    logging.info(f"✅ {chemin.name} chargé ({len(self.donnees_brutes[nom])} lignes)")
+                except Exception as e:
+                    logging.error(f"❌ Erreur avec {chemin.name}: {e}")
+    
+    def comparer_modes_chargement(self):
+        """Mesure le temps de chargement en série puis en parallèle"""
+        logging.info("⏱️ COMPARAISON CHARGEMENT SÉRIE / PARALLÈLE")
+        
+        mode_initial = self.chargement_parallele
+        cache_initial = self.cache
+        self.cache = None  # mesurer le parsing réel, pas la lecture du cache
+        durees = {}
+        
+        for parallele in (False, True):
+            self.chargement_parallele = parallele
+            self.donnees_brutes = {}
+            self.charger_donnees_brutes()
+            durees['parallele' if parallele else 'serie'] = self.stats_etl['chargement']['duree_secondes']
+        
+        self.chargement_parallele = mode_initial
+        self.cache = cache_initial
+        durees['acceleration'] = round(durees['serie'] / durees['parallele'], 2) if durees['parallele'] > 0 else None
+        
+        logging.info(f"📊 Série: {durees['serie']:.2f}s | Parallèle: {durees['parallele']:.2f}s | Accélération: x{durees['acceleration']}")
+        self.stats_etl['comparaison_chargement'] = durees
+        return durees
+    
+    @instrumentation.mesurer(entree=('df_brut', 'donnees_brutes.orders'))
+    def nettoyer_orders(self, df_brut=None):
+        """Nettoie la table Orders de manière robuste
+        
+        df_brut permet de ne nettoyer qu'un sous-ensemble des commandes brutes
+        (chargement incrémental); par défaut toute la table est traitée.
+        """
         logging.info("🧹 NETTOYAGE TABLE ORDERS")
         
-        if 'orders' not in self.donnees_brutes:
+        if df_brut is None and 'orders' not in self.donnees_brutes:
             logging.error("❌ Table 'orders' non chargée")
             return None
             
-        df = self.donnees_brutes['orders'].copy()
+        df = (self.donnees_brutes['orders'] if df_brut is None else df_brut).copy()
         
         # 1. Renommage des colonnes
         rename_map = {
@@ -115,10 +260,11 @@ class ETLNorthwind:
         
         # 5. Colonnes calculées
         df['delivery_days'] = (df['shipped_date'] - df['order_date']).dt.days
-        df['order_year'] = df['order_date'].dt.year
-        df['order_month'] = df['order_date'].dt.month
-        df['order_quarter'] = df['order_date'].dt.quarter
-        df['order_day_name'] = df['order_date'].dt.day_name()
+        calendrier.enrichir(
+            df, 'order_date',
+            ['year', 'month', 'quarter', 'day_name'],
+            ['order_year', 'order_month', 'order_quarter', 'order_day_name']
+        )
         
         # 6. Gestion des statuts
         if 'status_id' in df.columns:
@@ -127,7 +273,7 @@ class ETLNorthwind:
         
         self.donnees_propres['orders'] = df
         self.stats_etl['orders'] = {
-            'lignes_originales': len(self.donnees_brutes['orders']),
+            'lignes_originales': len(self.donnees_brutes['orders']) if df_brut is None else len(df_brut),
             'lignes_nettoyees': len(df),
             'dates_manquantes': df['order_date'].isna().sum()
         }
@@ -135,15 +281,16 @@ class ETLNorthwind:
         logging.info(f"✅ Orders nettoyée: {len(df)} lignes")
         return df
     
-    def nettoyer_order_details(self):
-        """Nettoie la table Order Details"""
+    @instrumentation.mesurer(entree=('df_brut', 'donnees_brutes.order_details'))
+    def nettoyer_order_details(self, df_brut=None):
+        """Nettoie la table Order Details (ou le sous-ensemble df_brut)"""
         logging.info("🧹 NETTOYAGE TABLE ORDER DETAILS")
         
-        if 'order_details' not in self.donnees_brutes:
+        if df_brut is None and 'order_details' not in self.donnees_brutes:
             logging.error("❌ Table 'order_details' non chargée")
             return None
             
-        df = self.donnees_brutes['order_details'].copy()
+        df = (self.donnees_brutes['order_details'] if df_brut is None else df_brut).copy()
         
         # Renommage
         rename_map = {
@@ -180,6 +327,7 @@ class ETLNorthwind:
         logging.info(f"✅ Order Details nettoyée: {len(df)} lignes")
         return df
     
+    @instrumentation.mesurer(entree='donnees_brutes.products')
     def nettoyer_products(self):
         """Nettoie la table Products"""
         logging.info("🧹 NETTOYAGE TABLE PRODUCTS")
@@ -225,6 +373,7 @@ class ETLNorthwind:
         logging.info(f"✅ Products nettoyée: {len(df)} produits")
         return df
     
+    @instrumentation.mesurer(entree='donnees_brutes.customers')
     def nettoyer_customers(self):
         """Nettoie la table Customers"""
         logging.info("🧹 NETTOYAGE TABLE CUSTOMERS")
@@ -260,6 +409,7 @@ class ETLNorthwind:
         logging.info(f"✅ Customers nettoyée: {len(df)} clients")
         return df
     
+    @instrumentation.mesurer(entree='donnees_brutes.employees')
     def nettoyer_employees(self):
         """Nettoie la table Employees"""
         logging.info("🧹 NETTOYAGE TABLE EMPLOYEES")
@@ -299,14 +449,17 @@ class ETLNorthwind:
         logging.info(f"✅ Employees nettoyée: {len(df)} employés")
         return df
     
+    @instrumentation.mesurer(entree='donnees_propres.order_details')
     def creer_table_faits(self):
         """Crée la table de faits principale avec jointures"""
         logging.info("🔗 CRÉATION TABLE DE FAITS")
         
         try:
             # Jointure Orders + Order Details
+            # (status_id de la commande prioritaire sur celui de la ligne)
             faits = self.donnees_propres['order_details'].merge(
-                self.donnees_propres['orders'], on='order_id', how='left'
+                self.donnees_propres['orders'], on='order_id', how='left',
+                suffixes=('_ligne', '')
             )
             
             # Jointure Products
@@ -336,7 +489,9 @@ class ETLNorthwind:
                 'shipping_fee', 'payment_type', 'delivery_days', 'status_id'
             ]
             
-            faits = faits[colonnes_finales]
+            # Faits rangés par date: une période est une tranche contiguë (index_temporel.py)
+            faits = faits[colonnes_finales].sort_values('order_date', kind='mergesort', na_position='last',
+                                                        ignore_index=True)
             
             self.donnees_propres['sales_facts'] = faits
             logging.info(f"✅ Table de faits créée: {len(faits)} lignes")
@@ -346,6 +501,44 @@ class ETLNorthwind:
             logging.error(f"❌ Erreur création table de faits: {e}")
             return None
     
+    def construire_schema_etoile(self):
+        """Construit le schéma en étoile (dimensions + faits à clés entières)"""
+        logging.info("⭐ CONSTRUCTION DU SCHÉMA EN ÉTOILE")
+        
+        try:
+            schema = schema_etoile.construire_schema_etoile(
+                self.donnees_propres['orders'],
+                self.donnees_propres['order_details'],
+                self.donnees_propres['products'],
+                self.donnees_propres['customers'],
+                self.donnees_propres['employees']
+            )
+        except Exception as e:
+            logging.error(f"❌ Erreur construction schéma en étoile: {e}")
+            return None
+        
+        self.donnees_propres.update(schema)
+        
+        if 'sales_facts' in self.donnees_propres:
+            large = self.donnees_propres['sales_facts'].memory_usage(deep=True).sum()
+            etoile = schema['fact_sales'].memory_usage(deep=True).sum()
+            self.stats_etl['schema_etoile'] = {'memoire_faits_large': int(large), 'memoire_fact_sales': int(etoile)}
+            logging.info(f"✅ fact_sales: {etoile / 1024:.1f} Ko contre {large / 1024:.1f} Ko pour sales_facts (x{large / etoile:.1f})")
+        
+        return schema
+    
+    def encoder_colonnes_texte(self):
+        """Encode les colonnes texte répétées (noms, catégories, pays...) en catégorielles"""
+        logging.info("🔤 ENCODAGE CATÉGORIEL DES COLONNES TEXTE")
+        
+        encodage.encoder_tables(self.donnees_propres, self.dictionnaires)
+        
+        if 'sales_facts' in self.donnees_propres:
+            logging.info(f"✅ sales_facts encodée: {self.donnees_propres['sales_facts'].memory_usage(deep=True).sum() / 1024:.1f} Ko")
+        for nom, valeurs in self.dictionnaires.items():
+            logging.info(f"📖 Dictionnaire {nom}: {len(valeurs)} valeurs")
+    
+    @instrumentation.mesurer(entree='donnees_propres')
     def analyser_qualite_donnees(self):
         """Analyse la qualité des données après nettoyage"""
         logging.info("🔍 ANALYSE QUALITÉ DONNÉES")
@@ -353,42 +546,112 @@ class ETLNorthwind:
         rapport_qualite = []
         
         for nom, df in self.donnees_propres.items():
+            profil = self.profileur.profiler(nom, df)
             stats = {
                 'table': nom,
-                'lignes': len(df),
-                'colonnes': len(df.columns),
-                'valeurs_manquantes': df.isnull().sum().sum(),
-                'doublons': df.duplicated().sum()
+                'lignes': profil['lignes'],
+                'colonnes': profil['colonnes'],
+                'valeurs_manquantes': profil['valeurs_manquantes'],
+                'doublons': profil['doublons'],
+                'types': profil['types']
             }
             
             # Analyse spécifique par table
-            if 'order_date' in df.columns:
-                stats['periode'] = f"{df['order_date'].min()} to {df['order_date'].max()}"
+            date = profil['par_colonne'].get('order_date', {})
+            if 'min' in date:
+                stats['periode'] = f"{date['min']} to {date['max']}"
             
             rapport_qualite.append(stats)
-            logging.info(f"📊 {nom}: {len(df)} lignes, {df.isnull().sum().sum()} valeurs manquantes")
+            logging.info(f"📊 {nom}: {profil['lignes']} lignes, {profil['valeurs_manquantes']} valeurs manquantes")
         
         return rapport_qualite
     
+    @instrumentation.mesurer(entree='donnees_propres')
     def sauvegarder_donnees_propres(self):
-        """Sauvegarde toutes les données nettoyées"""
+        """Sauvegarde toutes les données nettoyées, retourne les tables publiées"""
         logging.info("💾 SAUVEGARDE DONNÉES NETTOYÉES")
         
         self.processed_path.mkdir(parents=True, exist_ok=True)
+        encodage.sauvegarder_dictionnaires(self.dictionnaires, self.processed_path)
         
+        publiees = {}
         for nom, df in self.donnees_propres.items():
             try:
-                # Sauvegarde en CSV
-                chemin_csv = self.processed_path / f"{nom}_clean.csv"
-                df.to_csv(chemin_csv, index=False, encoding='utf-8')
+                chemin = self._publier_table(nom, df)
+                publiees[nom] = df
                 
-                # Sauvegarde en Excel pour analyse manuelle
-                chemin_excel = self.processed_path / f"{nom}_clean.xlsx"
-                df.to_excel(chemin_excel, index=False)
+                # Export Excel pour analyse manuelle: optionnel et hors du chemin critique
+                if self.export_excel:
+                    self._exporter_excel(nom, df)
                 
-                logging.info(f"✅ {nom} sauvegardé ({len(df)} lignes)")
+                logging.info(f"✅ {nom} sauvegardé ({len(df)} lignes, {chemin.name})")
             except Exception as e:
                 logging.error(f"❌ Erreur sauvegarde {nom}: {e}")
+        
+        if 'fact_sales' in self.donnees_propres:
+            schema_etoile.enregistrer_source(self.processed_path)
+        return publiees
+    
+    @instrumentation.mesurer(entree=('tables', 'donnees_propres'))
+    def publier_base_sql(self, tables=None):
+        """Charge les tables nettoyées dans la base embarquée (index sur clés et dates)"""
+        logging.info("🗄️ CHARGEMENT DE LA BASE SQL")
+        if tables is None:
+            tables = {nom: self.donnees_propres.get(nom) for nom in backend_sql.TABLES}
+        try:
+            return backend_sql.charger(tables, self.processed_path)
+        except Exception as e:
+            logging.error(f"❌ Erreur chargement base SQL: {e}")
+            return None
+    
+    def _partitionnee(self, nom):
+        return self.partitionner and nom in self.TABLES_PARTITIONNEES
+    
+    def _publier_table(self, nom, df, partitions=None):
+        """Écrit une table nettoyée dans le format de sortie configuré
+
+        partitions: pour une table partitionnée, seules ces partitions (année, mois)
+        sont réécrites; None réécrit la table entière.
+        """
+        # Faits triés une fois par creer_table_faits; seul un delta fusionné (incrémental) est à retrier
+        if nom == 'sales_facts' and not index_temporel.est_triee(df['order_date']):
+            df = df.sort_values('order_date', kind='mergesort', na_position='last', ignore_index=True)
+        try:
+            if self._partitionnee(nom):
+                return stockage.ecrire_partitions(df, self.processed_path, nom, format_fichier=self.format_sortie,
+                                                  compression=self.compression, partitions=partitions)
+            return stockage.ecrire_table(df, self.processed_path, nom, self.format_sortie, self.compression)
+        except Exception as e:
+            # Types mixtes refusés par le format colonnaire: repli sur CSV
+            if self.format_sortie == 'csv':
+                raise
+            logging.warning(f"⚠️ {nom}: écriture {self.format_sortie} impossible ({e}), repli CSV")
+            return stockage.ecrire_table(df, self.processed_path, nom, 'csv')
+    
+    def _exporter_excel(self, nom, df):
+        """Soumet l'export .xlsx d'une table au worker d'arrière-plan"""
+        if self._executeur_excel is None:
+            self._executeur_excel = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export_excel')
+        
+        future = self._executeur_excel.submit(stockage.ecrire_table, df, self.processed_path, nom, 'xlsx')
+        
+        def journaliser(f):
+            if f.exception() is not None:
+                logging.error(f"❌ Export Excel {nom}: {f.exception()}")
+            else:
+                logging.info(f"📗 Export Excel terminé: {f.result().name}")
+        
+        future.add_done_callback(journaliser)
+        self._exports_excel.append(future)
+    
+    def attendre_exports_excel(self):
+        """Attend la fin des exports Excel en arrière-plan"""
+        if self._executeur_excel is None:
+            return
+        wait(self._exports_excel)
+        self._executeur_excel.shutdown()
+        self._executeur_excel = None
+        self._exports_excel = []
     
     def generer_rapport_etl(self):
         """Génère un rapport détaillé de l'ETL"""
@@ -405,16 +668,19 @@ class ETLNorthwind:
         rapport_content.append("📊 STATISTIQUES PAR TABLE:")
         rapport_content.append("-" * 30)
         
-        for nom, df in self.donnees_propres.items():
+        profils = self.profileur.profiler_tables(self.donnees_propres)
+        for nom, profil in profils.items():
             rapport_content.append(f"\n{nom.upper()}:")
-            rapport_content.append(f"  Lignes: {len(df)}")
-            rapport_content.append(f"  Colonnes: {len(df.columns)}")
-            rapport_content.append(f"  Valeurs manquantes: {df.isnull().sum().sum()}")
-            rapport_content.append(f"  Doublons: {df.duplicated().sum()}")
+            rapport_content.append(f"  Lignes: {profil['lignes']}")
+            rapport_content.append(f"  Colonnes: {profil['colonnes']}")
+            rapport_content.append(f"  Valeurs manquantes: {profil['valeurs_manquantes']}")
+            rapport_content.append(f"  Doublons: {profil['doublons']}")
+            rapport_content.append(f"  Types: {', '.join(f'{t} x{n}' for t, n in profil['types'].items())}")
         
         # Métriques business
         if 'sales_facts' in self.donnees_propres:
             faits = self.donnees_propres['sales_facts']
+            distincts = {colonne: p['distincts'] for colonne, p in profils['sales_facts']['par_colonne'].items()}
             ca_total = faits['line_total'].sum()
             profit_total = faits['profit'].sum()
             
@@ -424,9 +690,9 @@ class ETLNorthwind:
                 f"Chiffre d'affaires total: {ca_total:,.2f} $",
                 f"Profit total: {profit_total:,.2f} $", 
                 f"Marge moyenne: {(profit_total/ca_total*100):.1f}%",
-                f"Commandes totales: {faits['order_id'].nunique()}",
-                f"Clients uniques: {faits['customer_company'].nunique()}",
-                f"Produits uniques: {faits['product_name'].nunique()}"
+                f"Commandes totales: {distincts['order_id']}",
+                f"Clients uniques: {distincts['customer_company']}",
+                f"Produits uniques: {distincts['product_name']}"
             ])
         
         # Sauvegarde du rapport
@@ -454,16 +720,24 @@ class ETLNorthwind:
             
             # 3. Table de faits
             self.creer_table_faits()
+            self.construire_schema_etoile()
+            self.encoder_colonnes_texte()
             
             # 4. Analyse qualité
             self.analyser_qualite_donnees()
             
             # 5. Sauvegarde
             self.sauvegarder_donnees_propres()
+            if self.base_sql:
+                self.publier_base_sql()
             
             # 6. Rapport
             self.generer_rapport_etl()
             
+            # 7. Watermark pour les prochains chargements incrémentaux
+            self.sauvegarder_watermark()
+            self.attendre_exports_excel()
+            
             logging.info("🎉 ETL TERMINÉ AVEC SUCCÈS!")
             return self.donnees_propres
             
@@ -471,6 +745,451 @@ class ETLNorthwind:
             logging.error(f"💥 ECHEC ETL: {e}")
             return None
 
+    # ------------------------------------------------------------------
+    # ETL EN FLUX (ORDER DETAILS PAR BLOCS)
+    # ------------------------------------------------------------------
+    
+    def _blocs_order_details(self, taille_bloc):
+        """Itérateur de blocs bruts de Order Details: lots parquet du cache, sinon lecture openpyxl"""
+        chemin = self.raw_path / self.FICHIERS_BRUTS['order_details']
+        blocs = self.cache.lire_par_blocs(chemin, taille_bloc) if self.cache is not None else None
+        if blocs is None:
+            logging.info(f"📖 {chemin.name}: pas d'entrée parquet en cache, lecture du classeur par blocs")
+            blocs = iter(lecteur_excel.LecteurExcel(chemin, taille_bloc=taille_bloc))
+        return blocs
+    
+    def _traiter_bloc(self, bloc):
+        """Nettoie un bloc de lignes de détail et le joint aux tables en mémoire"""
+        details = self.nettoyer_order_details(bloc)
+        faits = self.creer_table_faits()
+        return details, faits
+    
+    def estimer_taille_bloc(self, budget_memoire_mo, lignes_sonde=1000):
+        """Nombre de lignes par bloc pour rester dans le budget mémoire
+        
+        Un bloc sonde est traité de bout en bout; son empreinte (brut +
+        nettoyé + faits) donne le coût par ligne, doublé pour les copies
+        temporaires des jointures.
+        """
+        blocs = self._blocs_order_details(lignes_sonde)
+        sonde = next(blocs, None)
+        blocs.close()
+        if sonde is None or len(sonde) == 0:
+            return lignes_sonde
+        
+        details, faits = self._traiter_bloc(sonde)
+        octets = sum(df.memory_usage(deep=True).sum() for df in (sonde, details, faits))
+        par_ligne = 2 * octets / len(sonde)
+        taille = max(lignes_sonde, int(budget_memoire_mo * 1024 ** 2 / par_ligne))
+        logging.info(f"📏 ~{par_ligne:.0f} octets/ligne: blocs de {taille:,} lignes pour {budget_memoire_mo} Mo")
+        return taille
+    
+    def executer_etl_flux(self, budget_memoire_mo=256, taille_bloc=None):
+        """ETL hors mémoire: les lignes de détail sont traitées par blocs bornés
+        
+        Commandes, produits, clients et employés restent en mémoire. Chaque
+        bloc de Order Details est nettoyé, joint à ces tables, encodé puis
+        ajouté aux jeux publiés (fichiers part-NNNNN) sans jamais matérialiser
+        les tables order_details / sales_facts complètes.
+        """
+        logging.info("🚀 DÉMARRAGE ETL EN FLUX")
+        logging.info("=" * 60)
+        
+        try:
+            # 1. Petites tables en mémoire
+            self.charger_donnees_brutes(exclure=('order_details',))
+            self.nettoyer_orders()
+            self.nettoyer_products()
+            self.nettoyer_customers()
+            self.nettoyer_employees()
+            
+            # 2. Taille de bloc dérivée du budget mémoire
+            taille_bloc = taille_bloc or self.estimer_taille_bloc(budget_memoire_mo)
+            format_flux = self.format_sortie if self.format_sortie in ('parquet', 'feather', 'csv') else 'csv'
+            colonne_date = 'order_date' if self._partitionnee('sales_facts') else None
+            
+            # 3. Blocs: nettoyage, jointures, encodage et ajout aux jeux publiés
+            debut = time.perf_counter()
+            stats = {'taille_bloc': taille_bloc, 'blocs': 0, 'lignes': 0, 'pic_bloc_mo': 0.0,
+                     'chiffre_affaires': 0.0, 'profit': 0.0}
+            for numero, bloc in enumerate(self._blocs_order_details(taille_bloc)):
+                details, faits = self._traiter_bloc(bloc)
+                if faits is None:
+                    raise ValueError(f"bloc {numero}: table de faits non construite")
+                encodage.encoder(details, self.dictionnaires)
+                encodage.encoder(faits, self.dictionnaires)
+                
+                stockage.ajouter_morceau(details, self.processed_path, 'order_details', numero,
+                                         format_fichier=format_flux, compression=self.compression)
+                stockage.ajouter_morceau(faits, self.processed_path, 'sales_facts', numero, colonne_date=colonne_date,
+                                         format_fichier=format_flux, compression=self.compression)
+                
+                octets = sum(df.memory_usage(deep=True).sum() for df in (bloc, details, faits))
+                stats['blocs'] += 1
+                stats['lignes'] += len(faits)
+                stats['pic_bloc_mo'] = max(stats['pic_bloc_mo'], round(octets / 1024 ** 2, 2))
+                stats['chiffre_affaires'] += float(faits['line_total'].sum())
+                stats['profit'] += float(faits['profit'].sum())
+            
+            if stats['blocs'] == 0:
+                raise ValueError("aucune ligne de détail lue")
+            stats['duree_secondes'] = round(time.perf_counter() - debut, 3)
+            self.stats_etl['flux'] = stats
+            logging.info(f"✅ {stats['lignes']:,} lignes de faits en {stats['blocs']} blocs "
+                         f"(pic {stats['pic_bloc_mo']} Mo par bloc, {stats['duree_secondes']}s)")
+            
+            # 4. Publication des tables en mémoire (le dernier bloc n'est pas une table complète)
+            for nom in ('order_details', 'sales_facts'):
+                self.donnees_propres.pop(nom, None)
+            encodage.encoder_tables(self.donnees_propres, self.dictionnaires)
+            self.sauvegarder_donnees_propres()
+            
+            # Schéma en étoile et watermark décrivent la table complète: non produits
+            # en flux, les versions précédentes sont retirées plutôt que laissées périmées
+            for nom in schema_etoile.TABLES_SCHEMA:
+                stockage.supprimer_table(self.processed_path, nom)
+            for fichier in ('etl_watermark.json', 'etl_empreintes.csv'):
+                (self.processed_path / fichier).unlink(missing_ok=True)
+            logging.info("ℹ️ Schéma en étoile et watermark non produits en mode flux")
+            
+            self.generer_rapport_etl()
+            self.attendre_exports_excel()
+            
+            logging.info("🎉 ETL EN FLUX TERMINÉ AVEC SUCCÈS!")
+            return stats
+            
+        except Exception as e:
+            logging.error(f"💥 ECHEC ETL EN FLUX: {e}")
+            return None
+    
+    def verifier_flux(self):
+        """Compare order_details et sales_facts publiées en flux au chemin en mémoire
+        
+        La référence est reconstruite entièrement en mémoire: à réserver à des
+        volumes qui tiennent en RAM (validation du mode flux).
+        """
+        logging.info("🔍 VÉRIFICATION FLUX / EN MÉMOIRE")
+        
+        reference = self._reconstruction_en_memoire()
+        if reference.get('sales_facts') is None:
+            logging.error("❌ Reconstruction en mémoire impossible")
+            return False
+        
+        resultats = [self._comparer_a_reference(nom, reference[nom]) for nom in ('order_details', 'sales_facts')]
+        return all(resultats)
+
+    # ------------------------------------------------------------------
+    # ETL INCRÉMENTAL
+    # ------------------------------------------------------------------
+    
+    def calculer_empreintes_commandes(self):
+        """Empreinte par commande: hash de la ligne Orders + somme des hash de ses lignes de détail"""
+        orders = self.donnees_brutes['orders']
+        details = self.donnees_brutes['order_details']
+        
+        empreintes = pd.Series(
+            pd.util.hash_pandas_object(orders, index=False).values,
+            index=orders['Order ID'].values
+        )
+        hash_details = pd.Series(
+            pd.util.hash_pandas_object(details, index=False).values,
+            index=details['Order ID'].values
+        )
+        # Somme modulo 2^64: insensible à l'ordre des lignes de détail
+        somme_details = hash_details.groupby(level=0).sum()
+        empreintes = empreintes.add(somme_details.reindex(empreintes.index, fill_value=0)).astype('uint64')
+        empreintes.index.name = 'order_id'
+        return empreintes.rename('empreinte')
+    
+    def charger_watermark(self):
+        """Charge le watermark et les empreintes du dernier chargement"""
+        chemin_watermark = self.processed_path / 'etl_watermark.json'
+        chemin_empreintes = self.processed_path / 'etl_empreintes.csv'
+        
+        if not chemin_watermark.exists() or not chemin_empreintes.exists():
+            return None, None
+        
+        with open(chemin_watermark, encoding='utf-8') as f:
+            watermark = json.load(f)
+        empreintes = pd.read_csv(chemin_empreintes, index_col='order_id', dtype={'empreinte': 'uint64'})['empreinte']
+        return watermark, empreintes
+    
+    @instrumentation.mesurer()
+    def sauvegarder_watermark(self, empreintes=None):
+        """Enregistre le max order_id / order_date traité et les empreintes par commande"""
+        if 'orders' not in self.donnees_brutes or 'order_details' not in self.donnees_brutes:
+            return
+        
+        if empreintes is None:
+            empreintes = self.calculer_empreintes_commandes()
+        
+        orders = self.donnees_brutes['orders']
+        dates = pd.to_datetime(orders['Order Date'], errors='coerce')
+        watermark = {
+            'max_order_id': int(orders['Order ID'].max()),
+            'max_order_date': str(dates.max()),
+            'nb_commandes': int(len(empreintes)),
+            'date_execution': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        self.processed_path.mkdir(parents=True, exist_ok=True)
+        with open(self.processed_path / 'etl_watermark.json', 'w', encoding='utf-8') as f:
+            json.dump(watermark, f, indent=2)
+        empreintes.to_csv(self.processed_path / 'etl_empreintes.csv', header=True)
+        
+        logging.info(f"🔖 Watermark: order_id ≤ {watermark['max_order_id']}, order_date ≤ {watermark['max_order_date']}")
+    
+    def _lire_table_propre(self, nom, dossier=None, partitions=None):
+        """Relit une table nettoyée déjà publiée (format détecté), éventuellement limitée à des partitions"""
+        dossier = dossier or self.processed_path
+        if partitions is not None:
+            df = stockage.lire_partitions(dossier, nom, partitions=partitions, dictionnaires=self.dictionnaires)
+        else:
+            df = stockage.lire_table(dossier, nom, dictionnaires=self.dictionnaires)
+        if df is None:
+            return None
+        for col in ('order_date', 'shipped_date', 'paid_date'):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format='mixed', errors='coerce').astype('datetime64[ns]')
+        return df
+    
+    def executer_etl_incremental(self):
+        """ETL incrémental: ne traite que les commandes nouvelles ou modifiées
+        
+        Les commandes au-delà du watermark (order_id) sont nouvelles; celles dont
+        l'empreinte a changé sont retraitées. Les dimensions, petites, sont
+        renettoyées intégralement. Sans watermark ou sans table de faits publiée,
+        on retombe sur une reconstruction complète.
+        """
+        logging.info("🚀 DÉMARRAGE ETL INCRÉMENTAL")
+        logging.info("=" * 60)
+        
+        try:
+            watermark, anciennes_empreintes = self.charger_watermark()
+            if watermark is None or not stockage.table_existe(self.processed_path, 'sales_facts'):
+                logging.warning("⚠️ Aucun watermark exploitable: reconstruction complète")
+                return self.executer_etl_complet()
+            
+            # 1. Chargement (le cache évite de reparser les classeurs inchangés)
+            self.charger_donnees_brutes()
+            
+            # 2. Détection du delta
+            empreintes = self.calculer_empreintes_commandes()
+            communes = empreintes.index.intersection(anciennes_empreintes.index)
+            nouvelles = empreintes.index[empreintes.index > watermark['max_order_id']]
+            nouvelles = nouvelles.difference(communes)
+            modifiees = communes[empreintes.loc[communes].values != anciennes_empreintes.loc[communes].values]
+            supprimees = anciennes_empreintes.index.difference(empreintes.index)
+            # Commandes insérées sous le watermark: traitées comme modifiées
+            inserees = empreintes.index.difference(anciennes_empreintes.index).difference(nouvelles)
+            modifiees = modifiees.union(inserees)
+            
+            logging.info(f"🔎 Delta: {len(nouvelles)} nouvelles, {len(modifiees)} modifiées, {len(supprimees)} supprimées")
+            
+            if len(nouvelles) == 0 and len(modifiees) == 0 and len(supprimees) == 0:
+                logging.info("✅ Aucune commande à traiter, données déjà à jour")
+                return self.donnees_propres
+            
+            # 3. Nettoyage: dimensions complètes, commandes du delta uniquement
+            self.nettoyer_products()
+            self.nettoyer_customers()
+            self.nettoyer_employees()
+            
+            ids_delta = nouvelles.union(modifiees)
+            orders_brut = self.donnees_brutes['orders']
+            details_brut = self.donnees_brutes['order_details']
+            self.nettoyer_orders(orders_brut[orders_brut['Order ID'].isin(ids_delta)])
+            self.nettoyer_order_details(details_brut[details_brut['Order ID'].isin(ids_delta)])
+            
+            # 4. Faits du delta, joints aux dimensions
+            if self.creer_table_faits() is None:
+                raise ValueError("table de faits du delta non construite")
+            
+            self.encoder_colonnes_texte()
+            encodage.sauvegarder_dictionnaires(self.dictionnaires, self.processed_path)
+            
+            # 5. Publication: ajout en fin de fichier (CSV) si le delta ne contient que
+            # des nouvelles commandes; sinon fusion avec l'existant et réécriture
+            ajout_seul = len(modifiees) == 0 and len(supprimees) == 0
+            ids_retires = modifiees.union(supprimees)
+            self.processed_path.mkdir(parents=True, exist_ok=True)
+            
+            # Partitions des commandes retirées, d'après leur date publiée (avant réécriture de orders)
+            partitions_retirees = set()
+            if len(ids_retires):
+                anciennes = self._lire_table_propre('orders')
+                if anciennes is not None:
+                    partitions_retirees = stockage.partitions_de(
+                        anciennes.loc[anciennes['order_id'].isin(ids_retires), 'order_date'])
+            
+            for nom in self.TABLES_INCREMENTALES:
+                delta = self.donnees_propres[nom]
+                chemin = stockage.trouver_table(self.processed_path, nom)
+                
+                if self._partitionnee(nom) and stockage.est_partitionnee(self.processed_path, nom):
+                    # Seules les partitions du delta et des commandes retirées sont relues et réécrites
+                    touchees = stockage.partitions_de(delta['order_date']) | partitions_retirees
+                    existant = self._lire_table_propre(nom, partitions=touchees)
+                    if existant is not None:
+                        existant = existant[~existant['order_id'].isin(ids_retires)]
+                        delta = pd.concat([existant, delta.reindex(columns=existant.columns)], ignore_index=True)
+                    self._publier_table(nom, delta, partitions=touchees)
+                    self.donnees_propres[nom] = delta
+                    mode_publication = f"{len(touchees)} partition(s) réécrite(s)"
+                elif ajout_seul and chemin is not None and chemin.suffix == '.csv' and self.format_sortie == 'csv':
+                    delta = delta.reindex(columns=pd.read_csv(chemin, nrows=0).columns)
+                    delta.to_csv(chemin, mode='a', header=False, index=False, encoding='utf-8',
+                                 date_format='%Y-%m-%d %H:%M:%S')
+                    self.donnees_propres[nom] = delta
+                    mode_publication = 'ajout'
+                else:
+                    existant = self._lire_table_propre(nom)
+                    if existant is not None:
+                        existant = existant[~existant['order_id'].isin(ids_retires)]
+                        delta = pd.concat([existant, delta.reindex(columns=existant.columns)], ignore_index=True)
+                    self._publier_table(nom, delta)
+                    self.donnees_propres[nom] = delta
+                    mode_publication = 'réécriture'
+                
+                logging.info(f"✅ {nom}: {len(self.donnees_propres[nom])} lignes publiées ({mode_publication})")
+            
+            for nom in ('products', 'customers', 'employees'):
+                self._publier_table(nom, self.donnees_propres[nom])
+            
+            # Schéma en étoile: clés recalculées sur les tables publiées complètes
+            # (pas de reparsing ni de nettoyage, uniquement des recherches de clés)
+            delta_propres = {nom: self.donnees_propres[nom] for nom in ('orders', 'order_details')}
+            for nom in ('orders', 'order_details'):
+                self.donnees_propres[nom] = self._lire_table_propre(nom)
+            schema = self.construire_schema_etoile()
+            if schema is not None:
+                for nom, df in schema.items():
+                    self._publier_table(nom, df)
+                schema_etoile.enregistrer_source(self.processed_path)
+            self.donnees_propres.update(delta_propres)
+            
+            # Base SQL rechargée depuis les tables publiées complètes
+            if self.base_sql:
+                self.publier_base_sql({nom: self._lire_table_propre(nom) for nom in backend_sql.TABLES})
+            
+            # 6. Nouveau watermark
+            self.sauvegarder_watermark(empreintes)
+            self.stats_etl['incremental'] = {
+                'nouvelles': len(nouvelles),
+                'modifiees': len(modifiees),
+                'supprimees': len(supprimees),
+                'mode_publication': 'ajout' if ajout_seul else 'réécriture'
+            }
+            
+            logging.info("🎉 ETL INCRÉMENTAL TERMINÉ AVEC SUCCÈS!")
+            return self.donnees_propres
+            
+        except Exception as e:
+            logging.error(f"💥 ECHEC ETL INCRÉMENTAL: {e}")
+            return None
+    
+    def _reconstruction_en_memoire(self):
+        """Tables nettoyées et table de faits reconstruites par le chemin complet en mémoire"""
+        reference = ETLNorthwind(utiliser_cache=self.cache is not None)
+        reference.charger_donnees_brutes()
+        for etape in (reference.nettoyer_orders, reference.nettoyer_order_details, reference.nettoyer_products,
+                      reference.nettoyer_customers, reference.nettoyer_employees, reference.creer_table_faits):
+            etape()
+        return reference.donnees_propres
+    
+    def _comparer_a_reference(self, nom, reference, cles=('order_id', 'product_name', 'quantity', 'unit_price')):
+        """Compare une table publiée à sa reconstruction en mémoire (tri canonique stable)"""
+        publiee = self._lire_table_propre(nom)
+        if publiee is None:
+            logging.error(f"❌ Table {nom} non publiée")
+            return False
+        
+        # Même aller-retour disque (format et disposition) que la table publiée
+        format_publie = stockage.format_table(self.processed_path, nom)
+        disposition = stockage.disposition_table(self.processed_path, nom)
+        with tempfile.TemporaryDirectory() as dossier:
+            if disposition == 'fichier':
+                stockage.ecrire_table(reference, dossier, nom, format_publie)
+            else:
+                stockage.ajouter_morceau(reference, dossier, nom, 0, format_fichier=format_publie,
+                                         colonne_date='order_date' if disposition == 'partitions' else None)
+            reference = self._lire_table_propre(nom, Path(dossier))
+        
+        for df in (publiee, reference):
+            for col in df.columns:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype(object)
+        
+        cles = list(cles)
+        publiee = publiee[reference.columns].sort_values(cles, kind='mergesort').reset_index(drop=True)
+        reference = reference.sort_values(cles, kind='mergesort').reset_index(drop=True)
+        
+        try:
+            pd.testing.assert_frame_equal(publiee, reference, check_dtype=False, check_exact=False, rtol=1e-9)
+        except AssertionError as e:
+            logging.error(f"❌ Divergence {nom} / reconstruction en mémoire: {e}")
+            return False
+        
+        logging.info(f"✅ {nom} identique à la reconstruction en mémoire ({len(reference)} lignes)")
+        return True
+    
+    def verifier_coherence_incrementale(self):
+        """Compare la table de faits publiée avec une reconstruction complète en mémoire"""
+        logging.info("🔍 VÉRIFICATION INCRÉMENTAL / COMPLET")
+        
+        if not stockage.table_existe(self.processed_path, 'sales_facts'):
+            logging.error("❌ Aucune table de faits publiée")
+            return False
+        
+        complete = self._reconstruction_en_memoire().get('sales_facts')
+        if complete is None:
+            logging.error("❌ Reconstruction complète impossible")
+            return False
+        
+        return self._comparer_a_reference('sales_facts', complete)
+
 if __name__ == "__main__":
-    etl = ETLNorthwind()
-    donnees_propres = etl.executer_etl_complet()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ETL Northwind")
+    parser.add_argument('--parallele', action='store_true', help="Charger les classeurs bruts dans un pool de processus")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus pour le chargement parallèle")
+    parser.add_argument('--comparer-chargement', action='store_true', help="Comparer les temps de chargement série / parallèle")
+    parser.add_argument('--sans-cache', action='store_true', help="Reparser tous les classeurs sans utiliser le cache")
+    parser.add_argument('--incremental', action='store_true', help="Ne traiter que les commandes nouvelles ou modifiées depuis le dernier watermark")
+    parser.add_argument('--verifier-incremental', action='store_true', help="Comparer la table de faits publiée à une reconstruction complète")
+    parser.add_argument('--format', choices=stockage.FORMATS_PUBLICATION, default=stockage.FORMAT_DEFAUT,
+                        help="Format des tables nettoyées (Excel: --export-excel)")
+    parser.add_argument('--compression', default='zstd', help="Compression parquet/feather (zstd, snappy, lz4...)")
+    parser.add_argument('--export-excel', action='store_true', help="Exporter aussi chaque table en .xlsx (en arrière-plan)")
+    parser.add_argument('--sans-partitions', action='store_true', help="Publier sales_facts en un seul fichier au lieu de partitions année/mois")
+    parser.add_argument('--lecteur', choices=['pandas', 'flux'], default='pandas', help="Lecteur des classeurs bruts (flux: openpyxl en lecture seule)")
+    parser.add_argument('--flux', action='store_true', help="Traiter Order Details par blocs bornés (hors mémoire)")
+    parser.add_argument('--budget-memoire', type=int, default=256, metavar='MO', help="Budget mémoire par bloc en mode flux (Mo)")
+    parser.add_argument('--taille-bloc', type=int, default=None, help="Lignes par bloc en mode flux (sinon dérivé du budget)")
+    parser.add_argument('--verifier-flux', action='store_true', help="Comparer les tables publiées en flux au chemin en mémoire")
+    parser.add_argument('--base-sql', action='store_true', help="Charger aussi les tables nettoyées dans une base SQLite/DuckDB indexée")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Mesurer le pic mémoire Python de chaque étape (reports/run_metrics.json)")
+    args = parser.parse_args()
+    
+    if args.tracemalloc:
+        instrumentation.activer_tracemalloc()
+    
+    etl = ETLNorthwind(chargement_parallele=args.parallele, n_workers=args.workers, utiliser_cache=not args.sans_cache,
+                       format_sortie=args.format, compression=args.compression, export_excel=args.export_excel,
+                       partitionner=not args.sans_partitions, lecteur=args.lecteur, base_sql=args.base_sql)
+    if args.comparer_chargement:
+        etl.comparer_modes_chargement()
+    elif args.flux:
+        etl.executer_etl_flux(args.budget_memoire, args.taille_bloc)
+        if args.verifier_flux:
+            etl.verifier_flux()
+    elif args.verifier_flux:
+        etl.verifier_flux()
+    elif args.incremental:
+        donnees_propres = etl.executer_etl_incremental()
+        if args.verifier_incremental:
+            etl.verifier_coherence_incrementale()
+    elif args.verifier_incremental:
+        etl.verifier_coherence_incrementale()
+    else:
+        donnees_propres = etl.executer_etl_complet()
\ No newline at end of file
@@ -3,15 +3,22 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import warnings
+from cache_excel import CacheExcel
+import encodage
+import stockage
+import instrumentation
 warnings.filterwarnings('ignore')
 
 class ETLNorthwind:
-    def __init__(self):
+    def __init__(self, utiliser_cache=True, session=None):
         self.data_path = Path('../data')
         self.raw_path = self.data_path / 'raw'
         self.processed_path = self.data_path / 'processed'
         self.donnees_brutes = {}
         self.donnees_propres = {}
+        self.cache = CacheExcel(self.data_path / 'cache' / 'raw') if utiliser_cache else None
+        # SessionPipeline: tables passées en mémoire aux étapes suivantes, écriture en arrière-plan
+        self.session = session
         
     def charger_donnees_brutes(self):
         """Charge les données brutes"""
@@ -30,17 +37,25 @@ class ETLNorthwind:
             for nom, fichier in fichiers.items():
                 chemin = self.raw_path / fichier
                 if chemin.exists():
-                    self.donnees_brutes[nom] = pd.read_excel(chemin)
+                    if self.cache is not None:
+                        self.donnees_brutes[nom] = self.cache.charger(chemin)
+                    else:
+                        self.donnees_brutes[nom] = pd.read_excel(chemin)
                     print(f"✅ {fichier} chargé ({len(self.donnees_brutes[nom])} lignes)")
                 else:
                     print(f"❌ Fichier manquant: {fichier}")
             
+            if self.cache is not None:
+                stats = self.cache.resume_stats()
+                print(f"📦 Cache: {stats['hits']} hits, {stats['misses']} misses")
+            
             return self.donnees_brutes
             
         except Exception as e:
             print(f"❌ Erreur lors du chargement: {e}")
             return None
     
+    @instrumentation.mesurer(entree='donnees_brutes.orders')
     def nettoyer_orders(self):
         """Nettoie la table Orders"""
         print("🧹 NETTOYAGE TABLE ORDERS")
@@ -66,6 +81,7 @@ class ETLNorthwind:
         print(f"✅ Orders nettoyée: {len(df)} lignes")
         return df
     
+    @instrumentation.mesurer(entree='donnees_brutes.order_details')
     def nettoyer_order_details(self):
         """Nettoie la table Order Details"""
         print("🧹 NETTOYAGE TABLE ORDER DETAILS")
@@ -88,6 +104,7 @@ class ETLNorthwind:
         print(f"✅ Order Details nettoyée: {len(df)} lignes")
         return df
     
+    @instrumentation.mesurer(entree='donnees_brutes.products')
     def nettoyer_products(self):
         """Nettoie la table Products"""
         print("🧹 NETTOYAGE TABLE PRODUCTS")
@@ -109,6 +126,7 @@ class ETLNorthwind:
         print(f"✅ Products nettoyée: {len(df)} produits")
         return df
     
+    @instrumentation.mesurer(entree='donnees_propres.order_details')
     def creer_table_faits(self):
         """Crée la table de faits principale"""
         print("🔗 CRÉATION TABLE DE FAITS")
@@ -149,6 +167,7 @@ class ETLNorthwind:
             print(f"❌ Erreur création table de faits: {e}")
             return None
     
+    @instrumentation.mesurer(entree='donnees_propres')
     def sauvegarder_donnees(self):
         """Sauvegarde les données nettoyées"""
         print("💾 SAUVEGARDE DES DONNÉES NETTOYÉES")
@@ -156,11 +175,22 @@ class ETLNorthwind:
         # Créer le dossier s'il n'existe pas
         self.processed_path.mkdir(exist_ok=True)
         
+        # Colonnes texte en catégorielles + dictionnaires persistés pour les lecteurs
+        dictionnaires = encodage.charger_dictionnaires(self.processed_path)
+        encodage.encoder_tables(self.donnees_propres, dictionnaires)
+        encodage.sauvegarder_dictionnaires(dictionnaires, self.processed_path)
+        
+        if self.session is not None:
+            for nom, df in self.donnees_propres.items():
+                self.session.publier(nom, df)
+            print(f"📤 {len(self.donnees_propres)} tables transmises en mémoire, écriture en arrière-plan")
+            return
+        
         for nom, df in self.donnees_propres.items():
             try:
-                chemin = self.processed_path / f"{nom}_clean.csv"
-                df.to_csv(chemin, index=False)
-                print(f"✅ {nom}_clean.csv sauvegardé ({len(df)} lignes)")
+                # CSV conservé; les variantes parquet/feather périmées sont retirées
+                chemin = stockage.ecrire_table(df, self.processed_path, nom, 'csv')
+                print(f"✅ {chemin.name} sauvegardé ({len(df)} lignes)")
             except Exception as e:
                 print(f"❌ Erreur sauvegarde {nom}: {e}")
     
@@ -193,8 +223,8 @@ class ETLNorthwind:
             return None
 
 # Fonction pour exécuter directement
-def executer_etl():
-    etl = ETLNorthwind()
+def executer_etl(session=None):
+    etl = ETLNorthwind(session=session)
     return etl.executer_etl_complet()
 
 if __name__ == "__main__":
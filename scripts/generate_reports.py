@@ -5,6 +5,12 @@ from pathlib import Path
 from datetime import datetime
 import json
 import shutil
+import stockage
+
+try:
+    import panier
+except ImportError:  # scipy absent: pas de section ventes croisées
+    panier = None
 
 class RapportFinal:
     def __init__(self):
@@ -195,7 +201,7 @@ class RapportFinal:
         
         try:
             # Charger les données pour les stats
-            df = pd.read_csv(self.data_path / 'processed/sales_facts_clean.csv')
+            df = stockage.lire_table(self.data_path / 'processed', 'sales_facts')
             
             # Calculer les métriques business
             ca_total = df['Line Total'].sum()
@@ -238,6 +244,31 @@ class RapportFinal:
             for i, (client, ca) in enumerate(top_clients.items(), 1):
                 rapport.append(f"{i}. **{client}**: {ca:,.0f} $")
             
+            # Segments RFM persistés par l'analyse (analysis.py)
+            segments_path = self.data_path / 'analysis' / 'segments_rfm.csv'
+            if segments_path.exists():
+                segments = pd.read_csv(segments_path, index_col=0)
+                rapport.extend([
+                    "",
+                    "### Segmentation RFM des Clients",
+                ])
+                for segment, row in segments.iterrows():
+                    rapport.append(f"- **{segment}**: {int(row['nb_clients'])} clients "
+                                   f"({row['part_clients']:.1f}%), {row['montant']:,.0f} $")
+            
+            # Ventes croisées: règles d'association des paniers
+            if panier is not None:
+                regles = panier.analyser_paniers(df)['regles_association'].head(5)
+                if not regles.empty:
+                    rapport.extend([
+                        "",
+                        "### Top 5 Associations de Produits (ventes croisées)",
+                    ])
+                    for i, regle in enumerate(regles.itertuples(), 1):
+                        rapport.append(f"{i}. **{regle.antecedent}** → **{regle.consequent}**: "
+                                       f"confiance {regle.confiance:.0%}, lift {regle.lift:.1f} "
+                                       f"({regle.nb_commandes} commandes)")
+            
             rapport.extend([
                 "",
                 "## 💡 INSIGHTS CLÉS",
@@ -0,0 +1,170 @@
+# scripts/index_temporel.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+import cube
+
+_NS_JOUR = 86_400 * 10**9
+# Dates manquantes rangées après toutes les autres
+_FIN = np.iinfo('int64').max
+
+
+def _horodatages(dates):
+    """Dates en entiers (ns depuis 1970), dates manquantes -> _FIN"""
+    valeurs = pd.to_datetime(dates, errors='coerce').to_numpy(dtype='datetime64[ns]').view('int64').copy()
+    valeurs[valeurs == np.iinfo('int64').min] = _FIN
+    return valeurs
+
+
+def est_triee(dates):
+    """Dates croissantes, dates manquantes en fin (ordre des faits publiés par l'ETL)"""
+    valeurs = _horodatages(dates)
+    return bool(np.all(valeurs[1:] >= valeurs[:-1]))
+
+
+class IndexTemporel:
+    """Faits de vente triés par date, avec les offsets des frontières de jours.
+
+    Les lignes sont rangées par date croissante (tri stable, dates manquantes
+    en fin): une période est une tranche contiguë de la table. Ses bornes se
+    trouvent par recherche dichotomique dans l'index des jours puis dans le
+    jour concerné; la tranche est une vue, sans masque sur toute la table.
+    """
+
+    def __init__(self, faits, colonne_date='order_date'):
+        debut = time.perf_counter()
+        colonne_date = self._resoudre(faits, colonne_date)
+        valeurs = _horodatages(faits[colonne_date])
+        # Table déjà triée (ETL): ni copie ni réordonnancement
+        self.deja_triee = bool(np.all(valeurs[1:] >= valeurs[:-1]))
+        if not self.deja_triee:
+            ordre = np.argsort(valeurs, kind='stable')
+            faits = faits.iloc[ordre].reset_index(drop=True)
+            valeurs = valeurs[ordre]
+        self.faits = faits
+        self.colonne_date = colonne_date
+        self.n_dates = int(np.searchsorted(valeurs, _FIN))
+        self._valeurs = valeurs[:self.n_dates]
+
+        # Lignes du k-ième jour distinct: offsets[k]:offsets[k + 1]
+        jours = self._valeurs // _NS_JOUR
+        frontieres = np.flatnonzero(np.r_[True, jours[1:] != jours[:-1]]) if self.n_dates else np.array([], 'int64')
+        self.jours = jours[frontieres]
+        self.offsets = np.r_[frontieres, self.n_dates].astype('int64')
+        logging.debug(f"🗓️ Index temporel: {self.n_dates} lignes, {len(self.jours)} jours "
+                      f"({'déjà triées' if self.deja_triee else 'triées'}, {time.perf_counter() - debut:.3f}s)")
+
+    @staticmethod
+    def _resoudre(faits, nom):
+        """Nom de colonne effectif (nommage etl.py ou *_main)"""
+        for alias in cube.COLONNES.get(cube.canonique(nom), (nom,)):
+            if alias in faits.columns:
+                return alias
+        raise KeyError(nom)
+
+    def _position(self, date, cote):
+        """Première ligne de date >= date (cote='left') ou > date (cote='right')"""
+        valeur = pd.Timestamp(date).as_unit('ns').value
+        jour = valeur // _NS_JOUR
+        k = int(np.searchsorted(self.jours, jour))
+        if k == len(self.jours) or self.jours[k] != jour:
+            return int(self.offsets[k])
+        debut, fin = self.offsets[k], self.offsets[k + 1]
+        return int(debut + np.searchsorted(self._valeurs[debut:fin], valeur, side=cote))
+
+    def bornes(self, debut=None, fin=None):
+        """Positions [i, j) des lignes de la période (bornes incluses)"""
+        i = 0 if debut is None else self._position(debut, 'left')
+        j = self.n_dates if fin is None else self._position(fin, 'right')
+        return i, max(i, j)
+
+    def tranche(self, debut=None, fin=None):
+        """Faits de la période [debut, fin] (vue); sans borne, toute la table"""
+        if debut is None and fin is None:
+            return self.faits
+        i, j = self.bornes(debut, fin)
+        return self.faits.iloc[i:j]
+
+    def mois(self, periode):
+        """Faits d'un mois ('AAAA-MM' ou Period)"""
+        periode = pd.Period(periode, freq='M')
+        return self.tranche(periode.start_time, periode.end_time)
+
+    def _sommes(self, colonne, frontieres):
+        valeurs = self.faits[self._resoudre(self.faits, colonne)].to_numpy(dtype='float64', na_value=0.0)
+        if not len(frontieres):
+            return np.array([], dtype='float64')
+        return np.add.reduceat(np.nan_to_num(valeurs[:self.n_dates]), frontieres)
+
+    def sommes_journalieres(self, colonne='line_total', debut=None, fin=None):
+        """Somme d'une mesure par jour, en un passage sur les frontières de jours"""
+        serie = pd.Series(self._sommes(colonne, self.offsets[:-1]),
+                          index=pd.to_datetime(self.jours * _NS_JOUR).rename('jour'), name=cube.canonique(colonne))
+        if debut is None and fin is None:
+            return serie
+        k0 = 0 if debut is None else np.searchsorted(self.jours, pd.Timestamp(debut).as_unit('ns').value // _NS_JOUR)
+        k1 = len(self.jours) if fin is None else np.searchsorted(
+            self.jours, pd.Timestamp(fin).as_unit('ns').value // _NS_JOUR, side='right')
+        return serie.iloc[k0:k1]
+
+    def sommes_mensuelles(self, colonne='line_total'):
+        """Somme d'une mesure par mois observé ('AAAA-MM'), sans groupby"""
+        mois = pd.to_datetime(self.jours * _NS_JOUR).to_period('M')
+        codes = mois.year * 12 + mois.month
+        premiers = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], 'int64')
+        return pd.Series(self._sommes(colonne, self.offsets[premiers]),
+                         index=pd.Index(mois[premiers].strftime('%Y-%m'), name='mois_annee'),
+                         name=cube.canonique(colonne))
+
+
+def verifier(faits, n_requetes=200, graine=0):
+    """Tranches par recherche dichotomique == masques booléens; temps des deux méthodes"""
+    rng = np.random.default_rng(graine)
+    debut = time.perf_counter()
+    index = IndexTemporel(faits)
+    construction = time.perf_counter() - debut
+    dates = pd.to_datetime(index.faits[index.colonne_date])
+    bornes = np.sort(rng.choice(pd.date_range(dates.min() - pd.Timedelta(days=3), dates.max() + pd.Timedelta(days=3),
+                                              freq='h'), (n_requetes, 2)), axis=1)
+
+    duree_index = duree_masque = 0.0
+    identiques = 0
+    for borne_debut, borne_fin in bornes:
+        debut = time.perf_counter()
+        tranche = index.tranche(borne_debut, borne_fin)
+        duree_index += time.perf_counter() - debut
+        debut = time.perf_counter()
+        masque = index.faits[(dates >= borne_debut) & (dates <= borne_fin)]
+        duree_masque += time.perf_counter() - debut
+        identiques += tranche.index.equals(masque.index)
+    logging.info(f"{'✅' if identiques == n_requetes else '❌'} {identiques}/{n_requetes} tranches identiques aux masques "
+                 f"| index {construction:.3f}s, requêtes: dichotomie {duree_index * 1000:.1f} ms vs masques "
+                 f"{duree_masque * 1000:.1f} ms")
+    return identiques == n_requetes
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    import stockage
+
+    parser = argparse.ArgumentParser(description="Index temporel de sales_facts (tranches par recherche dichotomique)")
+    parser.add_argument('--benchmark', type=int, default=None, metavar='LIGNES',
+                        help="Faits synthétiques au lieu de sales_facts")
+    parser.add_argument('--requetes', type=int, default=200, help="Nombre de périodes aléatoires comparées")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        faits = pd.DataFrame({
+            'order_date': pd.Timestamp('2015-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 3650, args.benchmark)), unit='D'),
+            'line_total': rng.lognormal(5, 1, args.benchmark)
+        })
+    else:
+        faits = stockage.lire_table(Path('../data/processed'), 'sales_facts', parse_dates=['order_date'])
+    if faits is None:
+        print("❌ Table sales_facts_clean non trouvée")
+    else:
+        verifier(faits, args.requetes)
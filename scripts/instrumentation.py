@@ -0,0 +1,275 @@
+# scripts/instrumentation.py
+import pandas as pd
+from pathlib import Path
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: pas de pic RSS via getrusage
+    resource = None
+
+METRIQUES_PATH = Path('../reports/run_metrics.json')
+# Une copie par exécution, pour comparer deux exécutions
+HISTORIQUE_PATH = Path('../reports/metriques')
+
+_debut_execution = time.strftime('%Y%m%d_%H%M%S')
+_mesures = []
+# Étapes en cours: pics tracemalloc des étapes imbriquées
+_pile = []
+_ecriture_enregistree = False
+
+
+def activer_tracemalloc():
+    """Pic mémoire Python par étape (tracemalloc); ralentit les allocations, désactivé par défaut"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _rss_pic_mo():
+    """Pic de mémoire résidente du processus depuis son démarrage (Mo)"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ko sous Linux, octets sous macOS
+    return round(pic / (1024**2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def compter_lignes(valeur):
+    """Lignes d'un DataFrame/Series, ou somme sur un dict de tables; None si non mesurable"""
+    if isinstance(valeur, (pd.DataFrame, pd.Series)):
+        return len(valeur)
+    if isinstance(valeur, dict):
+        lignes = [compter_lignes(v) for v in valeur.values()]
+        lignes = [n for n in lignes if n is not None]
+        return sum(lignes) if lignes else None
+    return None
+
+
+def _resoudre(objet, chemin):
+    """'donnees_brutes.orders' -> objet.donnees_brutes.get('orders')"""
+    attribut, _, cle = chemin.partition('.')
+    valeur = getattr(objet, attribut, None)
+    if cle and isinstance(valeur, dict):
+        valeur = valeur.get(cle)
+    return valeur
+
+
+class Mesure:
+    """Durées, lignes et pics mémoire d'une étape; lignes renseignables pendant l'étape"""
+
+    def __init__(self, nom, lignes_entree=None):
+        self.nom = nom
+        self.lignes_entree = lignes_entree
+        self.lignes_sortie = None
+
+    def __enter__(self):
+        self._debut = time.perf_counter()
+        self._debut_cpu = time.process_time()
+        if tracemalloc.is_tracing():
+            courant, pic = tracemalloc.get_traced_memory()
+            if _pile:
+                _pile[-1]._pic = max(_pile[-1]._pic, pic)
+            tracemalloc.reset_peak()
+            self._base, self._pic = courant, courant
+        _pile.append(self)
+        return self
+
+    def __exit__(self, type_exc, exc, trace):
+        _pile.pop()
+        resultat = {
+            'etape': self.nom,
+            'duree_secondes': round(time.perf_counter() - self._debut, 4),
+            'cpu_secondes': round(time.process_time() - self._debut_cpu, 4),
+            'lignes_entree': self.lignes_entree,
+            'lignes_sortie': self.lignes_sortie,
+            'tracemalloc_pic_mo': None,
+            'rss_pic_mo': _rss_pic_mo(),
+            'pid': os.getpid(),
+            'succes': type_exc is None
+        }
+        if tracemalloc.is_tracing() and hasattr(self, '_base'):
+            pic = max(self._pic, tracemalloc.get_traced_memory()[1])
+            resultat['tracemalloc_pic_mo'] = round((pic - self._base) / 1024**2, 2)
+            if _pile:
+                _pile[-1]._pic = max(_pile[-1]._pic, pic)
+        enregistrer(resultat)
+        if self.lignes_entree is None and self.lignes_sortie is None:
+            lignes = ''
+        elif self.lignes_sortie is None:
+            # Étape sans table produite (contrôle, profilage): lignes parcourues seules
+            lignes = f", {self.lignes_entree} lignes"
+        else:
+            lignes = f", {self.lignes_entree if self.lignes_entree is not None else '?'} -> {self.lignes_sortie} lignes"
+        logging.info(f"⏱️ {self.nom}: {resultat['duree_secondes']:.3f}s (CPU {resultat['cpu_secondes']:.3f}s){lignes}")
+        return False
+
+
+def _lignes_entree(signature, entree, args, kwargs):
+    """Lignes de la première source renseignée de entree: argument de l'appel, sinon attribut de l'instance"""
+    arguments = signature.bind(*args, **kwargs).arguments
+    instance = args[0] if args else None
+    if entree is None:
+        # Sans source déclarée: DataFrames passés en argument
+        return compter_lignes({nom: valeur for nom, valeur in arguments.items() if valeur is not instance})
+    for source in (entree if isinstance(entree, (list, tuple)) else [entree]):
+        valeur = arguments.get(source) if source in signature.parameters else _resoudre(instance, source)
+        if valeur is not None:
+            return compter_lignes(valeur)
+    return None
+
+
+def mesurer(nom=None, entree=None, sortie=None):
+    """Décorateur: mesure chaque appel de la fonction comme une étape
+
+    Lignes en entrée: entree, un nom de paramètre ('df_brut') ou un attribut
+    de l'instance ('donnees_brutes.orders', 'donnees_propres'), ou un tuple de
+    sources essayées dans l'ordre ('df_brut', 'donnees_brutes.orders'): un
+    paramètre n'est retenu que s'il est passé et non None. Sans entree, les
+    DataFrames passés en argument. Lignes en sortie: résultat, ou attribut
+    sortie; pour un dict (ex. 'kpis'), seules les entrées ajoutées ou
+    remplacées pendant l'appel sont comptées.
+    """
+    def decorateur(fonction):
+        signature = inspect.signature(fonction)
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            instance = args[0] if args else None
+            lignes_entree = _lignes_entree(signature, entree, args, kwargs)
+            avant = dict(_resoudre(instance, sortie) or {}) if sortie is not None else None
+            with Mesure(nom or fonction.__qualname__, lignes_entree) as mesure:
+                resultat = fonction(*args, **kwargs)
+                if sortie is None:
+                    mesure.lignes_sortie = compter_lignes(resultat)
+                else:
+                    apres = _resoudre(instance, sortie)
+                    if isinstance(apres, dict):
+                        apres = {cle: valeur for cle, valeur in apres.items() if avant.get(cle) is not valeur}
+                    mesure.lignes_sortie = compter_lignes(apres)
+            return resultat
+        return enveloppe
+    return decorateur
+
+
+def enregistrer(resultat):
+    global _ecriture_enregistree
+    _mesures.append(resultat)
+    if not _ecriture_enregistree:
+        # Une écriture par exécution, à la sortie du processus principal
+        # (les workers d'un pool ne passent pas par atexit)
+        atexit.register(ecrire_metriques)
+        _ecriture_enregistree = True
+
+
+def extraire():
+    """Mesures du processus, vidées (retour d'un worker vers le processus principal)"""
+    mesures = list(_mesures)
+    _mesures.clear()
+    return mesures
+
+
+def ajouter(mesures):
+    """Intègre les mesures d'un worker"""
+    for resultat in mesures:
+        enregistrer(resultat)
+
+
+def ecrire_metriques(chemin=None):
+    """Écrit reports/run_metrics.json et sa copie horodatée dans reports/metriques"""
+    if not _mesures:
+        return None
+    execution = f"{_debut_execution}_{os.getpid()}"
+    metriques = {
+        'execution': execution,
+        'commande': ' '.join([Path(sys.argv[0]).name] + sys.argv[1:]),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'tracemalloc': tracemalloc.is_tracing(),
+        'etapes': _mesures
+    }
+    chemin = Path(chemin) if chemin is not None else METRIQUES_PATH
+    try:
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        HISTORIQUE_PATH.mkdir(parents=True, exist_ok=True)
+        for destination in (chemin, HISTORIQUE_PATH / f'run_metrics_{execution}.json'):
+            with open(destination, 'w', encoding='utf-8') as f:
+                json.dump(metriques, f, indent=2, ensure_ascii=False)
+    except OSError as e:
+        logging.warning(f"⚠️ Métriques non écrites: {e}")
+        return None
+    return chemin
+
+
+def _par_etape(metriques):
+    """Mesures agrégées par nom d'étape (appels répétés additionnés, pics au maximum)"""
+    etapes = pd.DataFrame(metriques['etapes'])
+    if etapes.empty:
+        return etapes
+    return etapes.groupby('etape', sort=False).agg(
+        appels=('etape', 'size'), duree_secondes=('duree_secondes', 'sum'), cpu_secondes=('cpu_secondes', 'sum'),
+        lignes_entree=('lignes_entree', 'max'), lignes_sortie=('lignes_sortie', 'max'),
+        tracemalloc_pic_mo=('tracemalloc_pic_mo', 'max'), rss_pic_mo=('rss_pic_mo', 'max'))
+
+
+def comparer(chemin_a, chemin_b):
+    """Écarts par étape entre deux exécutions (b par rapport à a)"""
+    runs = []
+    for chemin in (chemin_a, chemin_b):
+        with open(chemin, encoding='utf-8') as f:
+            runs.append(json.load(f))
+    a, b = (_par_etape(run) for run in runs)
+    comparaison = a.join(b, how='outer', lsuffix='_a', rsuffix='_b')
+    for mesure in ('duree_secondes', 'cpu_secondes', 'lignes_sortie', 'tracemalloc_pic_mo', 'rss_pic_mo'):
+        comparaison[f'{mesure}_ecart'] = comparaison[f'{mesure}_b'] - comparaison[f'{mesure}_a']
+    comparaison['duree_ratio'] = comparaison['duree_secondes_b'] / comparaison['duree_secondes_a']
+    print(f"🔍 {runs[0]['execution']} ({runs[0]['commande']}) -> {runs[1]['execution']} ({runs[1]['commande']})")
+    colonnes = ['duree_secondes_a', 'duree_secondes_b', 'duree_ratio', 'cpu_secondes_ecart',
+                'lignes_sortie_a', 'lignes_sortie_b', 'tracemalloc_pic_mo_ecart', 'rss_pic_mo_ecart']
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(comparaison[colonnes].round(3).to_string())
+    return comparaison
+
+
+def dernieres_executions():
+    """Dernière exécution et la précédente de la même commande (à défaut, la précédente)"""
+    fichiers = sorted(HISTORIQUE_PATH.glob('run_metrics_*.json'), key=lambda p: p.stat().st_mtime)
+    if len(fichiers) < 2:
+        return fichiers
+
+    def script(chemin):
+        with open(chemin, encoding='utf-8') as f:
+            return json.load(f)['commande'].split(' ')[0]
+
+    derniere = script(fichiers[-1])
+    precedente = next((f for f in reversed(fichiers[:-1]) if script(f) == derniere), fichiers[-2])
+    return [precedente, fichiers[-1]]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Métriques d'exécution par étape (reports/run_metrics.json)")
+    parser.add_argument('--comparer', nargs='*', metavar='RUN',
+                        help="Comparer deux fichiers de métriques (par défaut la dernière exécution et la précédente de la même commande)")
+    args = parser.parse_args()
+
+    if args.comparer is not None:
+        fichiers = args.comparer if len(args.comparer) == 2 else dernieres_executions()
+        if len(fichiers) < 2:
+            print("❌ Deux exécutions sont nécessaires (reports/metriques/run_metrics_*.json)")
+        else:
+            comparer(*fichiers)
+    elif METRIQUES_PATH.exists():
+        with open(METRIQUES_PATH, encoding='utf-8') as f:
+            metriques = json.load(f)
+        print(f"⏱️ {metriques['execution']} ({metriques['commande']})")
+        print(_par_etape(metriques).round(3).to_string())
+    else:
+        print("❌ Aucune métrique: lancez etl.py, analysis.py ou visualizations.py")
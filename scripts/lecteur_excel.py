@@ -0,0 +1,228 @@
+# scripts/lecteur_excel.py
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import logging
+import time
+
+# Chaînes lues comme valeurs manquantes par pd.read_excel (na_values par défaut)
+VALEURS_MANQUANTES_EXCEL = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                            '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+                            'n/a', 'nan', 'null']
+_MANQUANTES = frozenset(VALEURS_MANQUANTES_EXCEL)
+
+
+def _typer_colonne(valeurs, dtype=None):
+    """Colonne typée à partir des valeurs brutes d'une cellule openpyxl, comme pd.read_excel
+
+    dtype: type imposé (schéma commun des blocs d'une feuille)
+    """
+    valeurs = [np.nan if v is None or (isinstance(v, str) and v in _MANQUANTES) else v for v in valeurs]
+    serie = pd.Series(valeurs, dtype=object).infer_objects()
+    if serie.isna().all():
+        serie = serie.astype('float64')
+    elif not pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_datetime64_any_dtype(serie):
+        # Nombres saisis comme texte: convertis comme le fait le parseur de pd.read_excel
+        try:
+            serie = pd.to_numeric(serie)
+        except (ValueError, TypeError):
+            pass
+    return serie if dtype is None else serie.astype(dtype)
+
+
+def _classe(valeur):
+    """Classe de valeur qui détermine le type inféré (texte: selon sa conversion numérique)"""
+    if not isinstance(valeur, str):
+        return type(valeur)
+    for classe, conversion in (('texte_entier', int), ('texte_decimal', float)):
+        try:
+            conversion(valeur)
+            return classe
+        except ValueError:
+            pass
+    return 'texte'
+
+
+def _dedoublonner(noms):
+    """Noms de colonnes uniques suffixés .1, .2... comme pd.read_excel"""
+    comptes = {}
+    resultat = []
+    for nom in noms:
+        compte = comptes.get(nom, 0)
+        while compte > 0:
+            comptes[nom] = compte + 1
+            nom = f"{nom}.{compte}"
+            compte = comptes.get(nom, 0)
+        resultat.append(nom)
+        comptes[nom] = compte + 1
+    return resultat
+
+
+class LecteurExcel:
+    """Lecture d'une feuille Excel ligne à ligne (openpyxl en lecture seule).
+
+    Contrairement à pd.read_excel, le classeur n'est jamais matérialisé: les
+    lignes sont parcourues en flux et accumulées colonne par colonne, puis
+    chaque bloc de taille_bloc lignes est converti en DataFrame typé. La
+    mémoire est bornée par la taille d'un bloc. colonnes restreint la lecture
+    à un sous-ensemble des colonnes de l'en-tête.
+
+    Quand la feuille dépasse un bloc, une première passe relève les classes
+    de valeurs de chaque colonne (mémoire constante) pour en déduire les types
+    de la feuille entière: tous les blocs ont ce schéma commun, celui de
+    pd.read_excel, et les morceaux écrits en flux restent homogènes.
+    """
+
+    def __init__(self, chemin, colonnes=None, taille_bloc=50_000, feuille=0):
+        self.chemin = Path(chemin)
+        self.colonnes = list(colonnes) if colonnes is not None else None
+        self.taille_bloc = taille_bloc
+        self.feuille = feuille
+        self.stats = {'lignes': 0, 'blocs': 0, 'duree_secondes': 0.0, 'lignes_par_seconde': 0.0}
+
+    def __iter__(self):
+        return self._parcourir(schema_commun=True)
+
+    def _parcourir(self, schema_commun):
+        from openpyxl import load_workbook
+
+        debut = time.perf_counter()
+        classeur = load_workbook(self.chemin, read_only=True, data_only=True)
+        try:
+            feuille = classeur.worksheets[self.feuille] if isinstance(self.feuille, int) else classeur[self.feuille]
+            lignes = feuille.iter_rows(values_only=True)
+            entete = next(lignes, None)
+            if entete is None:
+                return
+
+            entete = _dedoublonner([str(nom) if nom is not None else f"Unnamed: {i}" for i, nom in enumerate(entete)])
+            if self.colonnes is None:
+                noms = entete
+            else:
+                manquantes = [c for c in self.colonnes if c not in entete]
+                if manquantes:
+                    raise ValueError(f"Colonnes absentes de {self.chemin.name}: {manquantes}")
+                noms = self.colonnes
+            positions = [entete.index(nom) for nom in noms]
+            largeur = len(entete)
+
+            valeurs = [[] for _ in noms]
+            n = 0
+            types = None
+            for ligne in lignes:
+                if all(v is None for v in ligne):
+                    continue
+                if n == self.taille_bloc:
+                    # Au moins deux blocs: types de la feuille entière avant le premier
+                    if schema_commun and types is None:
+                        types = self._schema(feuille, noms, positions)
+                    yield self._bloc(noms, valeurs, debut, types)
+                    valeurs = [[] for _ in noms]
+                    n = 0
+                if len(ligne) < largeur:
+                    ligne = tuple(ligne) + (None,) * (largeur - len(ligne))
+                for colonne, position in zip(valeurs, positions):
+                    colonne.append(ligne[position])
+                n += 1
+            if n:
+                yield self._bloc(noms, valeurs, debut, types)
+        finally:
+            classeur.close()
+            self._journaliser()
+
+    def _schema(self, feuille, noms, positions):
+        """Types de chaque colonne sur la feuille entière, d'après une valeur par classe rencontrée"""
+        exemples = [{} for _ in noms]
+        manquantes = [False for _ in noms]
+        lignes = feuille.iter_rows(values_only=True)
+        next(lignes, None)  # en-tête
+        for ligne in lignes:
+            if all(v is None for v in ligne):
+                continue
+            for i, position in enumerate(positions):
+                valeur = ligne[position] if position < len(ligne) else None
+                if valeur is None or (isinstance(valeur, str) and valeur in _MANQUANTES):
+                    manquantes[i] = True
+                else:
+                    exemples[i].setdefault(_classe(valeur), valeur)
+        types = {}
+        for nom, classes, manquante in zip(noms, exemples, manquantes):
+            types[nom] = _typer_colonne(list(classes.values()) + ([None] if manquante else [])).dtype
+        return types
+
+    def _bloc(self, noms, valeurs, debut, types=None):
+        df = pd.DataFrame({nom: _typer_colonne(colonne, types[nom] if types else None)
+                           for nom, colonne in zip(noms, valeurs)})
+        self.stats['lignes'] += len(df)
+        self.stats['blocs'] += 1
+        self.stats['duree_secondes'] = round(time.perf_counter() - debut, 3)
+        if self.stats['duree_secondes'] > 0:
+            self.stats['lignes_par_seconde'] = round(self.stats['lignes'] / self.stats['duree_secondes'])
+        return df
+
+    def _journaliser(self):
+        logging.info(f"📖 {self.chemin.name}: {self.stats['lignes']:,} lignes en {self.stats['blocs']} blocs, "
+                     f"{self.stats['lignes_par_seconde']:,} lignes/s")
+
+    def lire(self):
+        """Feuille complète (ou sous-ensemble de colonnes) en un DataFrame"""
+        # Types harmonisés à la concaténation: pas de passe de schéma
+        blocs = list(self._parcourir(schema_commun=False))
+        if not blocs:
+            return pd.DataFrame(columns=self.colonnes or [])
+        if len(blocs) == 1:
+            return blocs[0]
+        # Types harmonisés comme une lecture d'un seul tenant (entier + manquant -> flottant)
+        return pd.concat(blocs, ignore_index=True).infer_objects()
+
+
+def lire_classeur(chemin, colonnes=None, taille_bloc=50_000):
+    """Équivalent en flux de pd.read_excel(chemin, usecols=colonnes)"""
+    return LecteurExcel(chemin, colonnes, taille_bloc).lire()
+
+
+def comparer_lecteurs(chemin, colonnes=None, taille_bloc=50_000):
+    """Compare temps, pic mémoire Python et contenu: pd.read_excel vs lecture en flux"""
+    import tracemalloc
+
+    resultats = {}
+    for nom, lecture in (('pandas', lambda: pd.read_excel(chemin, usecols=colonnes)),
+                         ('flux', lambda: lire_classeur(chemin, colonnes, taille_bloc))):
+        tracemalloc.start()
+        debut = time.perf_counter()
+        df = lecture()
+        duree = time.perf_counter() - debut
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        resultats[nom] = {'df': df, 'duree_secondes': round(duree, 3), 'pic_mo': round(pic / 1024 ** 2, 1),
+                          'lignes_par_seconde': round(len(df) / duree) if duree > 0 else 0}
+        print(f"⏱️ {nom}: {duree:.2f}s, pic {pic / 1024 ** 2:.1f} Mo, {resultats[nom]['lignes_par_seconde']:,} lignes/s")
+
+    try:
+        pd.testing.assert_frame_equal(resultats['pandas']['df'], resultats['flux']['df'], check_dtype=False)
+        print("✅ Contenu identique à pd.read_excel")
+        resultats['identique'] = True
+    except AssertionError as e:
+        print(f"❌ Contenu différent de pd.read_excel: {e}")
+        resultats['identique'] = False
+    return resultats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lecture en flux de classeurs Excel volumineux")
+    parser.add_argument('fichier', help="Classeur .xlsx à lire")
+    parser.add_argument('--colonnes', nargs='+', default=None, help="Sous-ensemble de colonnes à lire")
+    parser.add_argument('--taille-bloc', type=int, default=50_000, help="Lignes par bloc")
+    parser.add_argument('--comparer', action='store_true', help="Comparer avec pd.read_excel (temps, mémoire, contenu)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.comparer:
+        comparer_lecteurs(args.fichier, args.colonnes, args.taille_bloc)
+    else:
+        lecteur = LecteurExcel(args.fichier, args.colonnes, args.taille_bloc)
+        for bloc in lecteur:
+            pass
+        print(f"📊 {lecteur.stats['lignes']:,} lignes, {lecteur.stats['lignes_par_seconde']:,} lignes/s")
@@ -23,8 +23,8 @@ def verifier_prerequis():
     print("🔍 VÉRIFICATION DES PRÉREQUIS...")
     
     # Vérifier que l'ETL a été exécuté
-    data_file = Path('../data/processed/sales_facts_clean.csv')
-    if not data_file.exists():
+    from stockage import table_existe
+    if not table_existe(Path('../data/processed'), 'sales_facts'):
         print("❌ Les données nettoyées n'existent pas!")
         print("💡 Exécutez d'abord l'ETL (option 1)")
         return False
@@ -79,11 +79,11 @@ def main():
         elif choix == "6":
             print("\n🎯 EXÉCUTION COMPLÈTE ETL + ANALYSE + VISUALISATIONS")
             print("=" * 50)
-            if executer_etl():
-                time.sleep(1)
-                if executer_analyse():
-                    time.sleep(1)
-                    executer_visualisations()
+            # Tables passées en mémoire d'une étape à l'autre; CSV écrits en arrière-plan
+            with SessionPipeline() as session:
+                if executer_etl(session):
+                    if executer_analyse(session):
+                        executer_visualisations(session)
         elif choix == "7":
             print("👋 Au revoir!")
             break
@@ -95,6 +95,7 @@ try:
     from etl_main import executer_etl
     from analysis_main import executer_analyse
     from visualizations import executer_visualisations
+    from session_pipeline import SessionPipeline
     print("✅ Modules principaux chargés avec succès!")
 except ImportError as e:
     print(f"⚠️ Certains modules ne sont pas chargés: {e}")
@@ -0,0 +1,226 @@
+# scripts/panier.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+from scipy import sparse
+
+
+def matrice_paniers(commandes, produits):
+    """Matrice creuse commandes x produits (CSR, 1 si le produit figure dans la commande)
+
+    Retourne la matrice et les libellés des lignes (commandes) et colonnes (produits).
+    """
+    codes_commandes, commandes_uniques = pd.factorize(pd.Series(commandes), sort=False)
+    codes_produits, produits_uniques = pd.factorize(pd.Series(produits), sort=False)
+    valides = (codes_commandes >= 0) & (codes_produits >= 0)
+    matrice = sparse.csr_matrix((np.ones(int(valides.sum()), dtype='int32'),
+                                 (codes_commandes[valides], codes_produits[valides])),
+                                shape=(len(commandes_uniques), len(produits_uniques)))
+    # Produit présent sur plusieurs lignes d'une même commande: compté une fois
+    matrice.data[:] = 1
+    return matrice, commandes_uniques, produits_uniques
+
+
+def cooccurrences(matrice):
+    """Commandes communes à chaque paire de produits: Xᵀ·X (diagonale = commandes du produit)"""
+    cooc = (matrice.T @ matrice).tocsr()
+    cooc.sort_indices()
+    return cooc
+
+
+def _croissance(prefixe, conditionnelle, items, comptes, seuil, longueur_max, itemsets):
+    """Extension d'un préfixe fréquent sur sa base conditionnelle (FP-growth)
+
+    conditionnelle: commandes contenant le préfixe, une colonne par item
+    candidat (items), colonnes triées par support décroissant. Chaque item
+    n'est étendu qu'avec les suivants: chaque ensemble est énuméré une fois.
+    """
+    for position, (item, compte) in enumerate(zip(items, comptes)):
+        itemset = prefixe + (int(item),)
+        itemsets.append((itemset, int(compte)))
+        if conditionnelle is None or len(itemset) >= longueur_max or position + 1 >= len(items):
+            continue
+        colonne = conditionnelle.getcol(position)
+        sous_base = conditionnelle[colonne.indices][:, position + 1:]
+        sous_comptes = np.asarray(sous_base.sum(axis=0)).ravel()
+        ordre = np.argsort(-sous_comptes, kind='stable')
+        ordre = ordre[sous_comptes[ordre] >= seuil]
+        if len(ordre):
+            _croissance(itemset, sous_base[:, ordre].tocsc(), items[position + 1:][ordre], sous_comptes[ordre],
+                        seuil, longueur_max, itemsets)
+
+
+def itemsets_frequents(matrice, seuil, longueur_max=3, cooc=None):
+    """Ensembles de produits achetés ensemble dans au moins `seuil` commandes
+
+    Singletons et paires sont lus dans la matrice de co-occurrence; au-delà,
+    croissance par bases conditionnelles creuses (sans génération de candidats).
+    """
+    cooc = cooccurrences(matrice) if cooc is None else cooc
+    supports = cooc.diagonal()
+    frequents = np.argsort(-supports, kind='stable')
+    frequents = frequents[supports[frequents] >= seuil]
+    rang = np.full(len(supports), len(supports))
+    rang[frequents] = np.arange(len(frequents))
+
+    itemsets = [((int(i),), int(supports[i])) for i in frequents]
+    colonnes = matrice.tocsc() if longueur_max > 2 else None
+    if longueur_max >= 2:
+        for i in frequents:
+            debut, fin = cooc.indptr[i], cooc.indptr[i + 1]
+            voisins, comptes = cooc.indices[debut:fin], cooc.data[debut:fin]
+            garde = (rang[voisins] > rang[i]) & (comptes >= seuil)
+            ordre = np.argsort(-comptes[garde], kind='stable')
+            voisins, comptes = voisins[garde][ordre], comptes[garde][ordre]
+            if not len(voisins):
+                continue
+            conditionnelle = None
+            if colonnes is not None:
+                lignes = colonnes.indices[colonnes.indptr[i]:colonnes.indptr[i + 1]]
+                conditionnelle = matrice[lignes][:, voisins].tocsc()
+            _croissance((int(i),), conditionnelle, voisins, comptes, seuil, longueur_max, itemsets)
+
+    return pd.DataFrame(itemsets, columns=['items', 'nb_commandes'])
+
+
+def regles_association(itemsets, n_commandes, confiance_min=0.2, lift_min=1.0):
+    """Règles {antécédent} -> {produit} tirées des ensembles fréquents
+
+    support = commandes contenant l'ensemble / commandes, confiance =
+    support(ensemble) / support(antécédent), lift = confiance / support(produit).
+    """
+    supports = dict(zip(map(frozenset, itemsets['items']), itemsets['nb_commandes']))
+    regles = []
+    for items, compte in zip(itemsets['items'], itemsets['nb_commandes']):
+        if len(items) < 2:
+            continue
+        for consequent in items:
+            antecedent = tuple(i for i in items if i != consequent)
+            confiance = compte / supports[frozenset(antecedent)]
+            lift = confiance / (supports[frozenset((consequent,))] / n_commandes)
+            if confiance >= confiance_min and lift >= lift_min:
+                regles.append((antecedent, consequent, compte, compte / n_commandes, confiance, lift))
+    regles = pd.DataFrame(regles, columns=['antecedent', 'consequent', 'nb_commandes', 'support', 'confiance', 'lift'])
+    return regles.sort_values(['lift', 'confiance', 'nb_commandes'], ascending=False, ignore_index=True)
+
+
+def analyser_paniers(faits, support_min=0.01, min_commandes=2, confiance_min=0.2, lift_min=1.0, longueur_max=3):
+    """Co-occurrences de produits et règles d'association des paniers de sales_facts
+
+    Retourne les règles (libellés produits), les paires les plus fréquentes et
+    des statistiques de calcul.
+    """
+    debut = time.perf_counter()
+    matrice, _, produits = matrice_paniers(faits['order_id'], faits['product_name'])
+    n_commandes = matrice.shape[0]
+    seuil = max(min_commandes, int(np.ceil(support_min * n_commandes)))
+    cooc = cooccurrences(matrice)
+    itemsets = itemsets_frequents(matrice, seuil, longueur_max, cooc)
+    regles = regles_association(itemsets, n_commandes, confiance_min, lift_min)
+
+    libelles = np.asarray(produits, dtype=object)
+    regles['antecedent'] = [' + '.join(map(str, libelles[list(a)])) for a in regles['antecedent']]
+    regles['consequent'] = libelles[regles['consequent'].to_numpy(dtype='int64')]
+
+    paires = sparse.triu(cooc, k=1).tocoo()
+    top = np.argsort(-paires.data, kind='stable')[:50]
+    paires_top = pd.DataFrame({'produit_a': libelles[paires.row[top]], 'produit_b': libelles[paires.col[top]],
+                               'nb_commandes': paires.data[top]})
+
+    stats = {'commandes': n_commandes, 'produits': matrice.shape[1], 'lignes_panier': int(matrice.nnz),
+             'seuil_commandes': seuil, 'itemsets_frequents': len(itemsets), 'regles': len(regles),
+             'memoire_mo': (matrice.data.nbytes + matrice.indices.nbytes + matrice.indptr.nbytes
+                            + cooc.data.nbytes + cooc.indices.nbytes + cooc.indptr.nbytes) / 1024**2,
+             'duree_secondes': time.perf_counter() - debut}
+    logging.info(f"🧺 Paniers: {n_commandes:,} commandes x {matrice.shape[1]:,} produits, "
+                 f"{len(itemsets):,} ensembles fréquents, {len(regles):,} règles ({stats['duree_secondes']:.2f}s)")
+    return {'regles_association': regles, 'cooccurrences_produits': paires_top, 'stats': stats}
+
+
+def itemsets_reference(faits, seuil, longueur_max=3):
+    """Comptes des ensembles par énumération des combinaisons de chaque panier (référence)"""
+    from itertools import combinations
+    from collections import Counter
+
+    comptes = Counter()
+    for _, lignes in faits.groupby('order_id', observed=True)['product_name']:
+        produits = sorted(set(lignes))
+        for k in range(1, longueur_max + 1):
+            comptes.update(combinations(produits, k))
+    return {frozenset(items): c for items, c in comptes.items() if c >= seuil}
+
+
+def verifier(faits, seuil=2, longueur_max=3):
+    """Ensembles fréquents (co-occurrences + croissance) == énumération brute des paniers"""
+    matrice, _, produits = matrice_paniers(faits['order_id'], faits['product_name'])
+    itemsets = itemsets_frequents(matrice, seuil, longueur_max)
+    libelles = np.asarray(produits, dtype=object)
+    obtenu = {frozenset(libelles[list(items)]): c for items, c in zip(itemsets['items'], itemsets['nb_commandes'])}
+    reference = itemsets_reference(faits, seuil, longueur_max)
+    identique = obtenu == reference and len(obtenu) == len(itemsets)
+    if identique:
+        logging.info(f"✅ {len(obtenu)} ensembles fréquents identiques à l'énumération des paniers")
+    else:
+        logging.error(f"❌ Ensembles fréquents: {len(obtenu)} obtenus, {len(reference)} attendus, "
+                      f"{len(set(obtenu.items()) ^ set(reference.items()))} différences")
+    return identique
+
+
+def mesurer(n_commandes=1_000_000, n_produits=10_000, graine=0):
+    """Paniers synthétiques (popularité de Zipf + associations plantées): temps et mémoire"""
+    rng = np.random.default_rng(graine)
+    popularite = 1 / np.arange(1, n_produits + 1) ** 0.8
+    tailles = 1 + rng.poisson(3, n_commandes)
+    commandes = np.repeat(np.arange(n_commandes), tailles)
+    produits = rng.choice(n_produits, len(commandes), p=popularite / popularite.sum())
+    # 20 trios de produits achetés ensemble dans 1% des commandes chacun
+    trios = rng.choice(n_produits, (20, 3), replace=False)
+    plantees = rng.choice(n_commandes, (20, n_commandes // 100))
+    commandes = np.concatenate([commandes, np.repeat(plantees.ravel(), 3)])
+    produits = np.concatenate([produits, np.repeat(trios, n_commandes // 100, axis=0).ravel()])
+    faits = pd.DataFrame({'order_id': commandes, 'product_name': produits})
+    print(f"🧪 {n_commandes:,} commandes x {n_produits:,} produits, {len(faits):,} lignes")
+
+    resultat = analyser_paniers(faits, support_min=0.002)
+    stats = resultat['stats']
+    regles = resultat['regles_association']
+    ensembles = {frozenset(a.split(' + ')) | {str(c)} for a, c in zip(regles['antecedent'], regles['consequent'])}
+    trouves = sum(frozenset(trio) in ensembles for trio in trios.astype(str))
+    print(f"⏱️ {stats['duree_secondes']:.2f}s | matrice + co-occurrences: {stats['memoire_mo']:.0f} Mo | "
+          f"{stats['itemsets_frequents']:,} ensembles, {stats['regles']:,} règles | "
+          f"associations plantées retrouvées: {trouves}/20")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    import stockage
+
+    parser = argparse.ArgumentParser(description="Analyse des paniers: co-occurrences et règles d'association")
+    parser.add_argument('--support', type=float, default=0.01, help="Support minimal (part des commandes)")
+    parser.add_argument('--confiance', type=float, default=0.2, help="Confiance minimale des règles")
+    parser.add_argument('--longueur-max', type=int, default=3, help="Taille maximale des ensembles")
+    parser.add_argument('--verifier', action='store_true', help="Comparer à l'énumération brute des paniers")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=1_000_000, default=None, metavar='COMMANDES',
+                        help="Paniers synthétiques (10k produits)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        mesurer(args.benchmark)
+    else:
+        faits = stockage.lire_table(Path('../data/processed'), 'sales_facts')
+        if faits is None:
+            print("❌ Table sales_facts_clean non trouvée")
+        else:
+            resultat = analyser_paniers(faits, args.support, confiance_min=args.confiance,
+                                        longueur_max=args.longueur_max)
+            analysis_path = Path('../data/analysis')
+            analysis_path.mkdir(exist_ok=True)
+            for nom in ('regles_association', 'cooccurrences_produits'):
+                resultat[nom].to_csv(analysis_path / f'{nom}.csv', index=False)
+            print(resultat['regles_association'].head(15).round(3).to_string())
+            if args.verifier:
+                verifier(faits, longueur_max=args.longueur_max)
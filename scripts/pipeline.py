@@ -0,0 +1,322 @@
+# scripts/pipeline.py
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import hashlib
+import json
+import logging
+import time
+import instrumentation
+import stockage
+
+RACINE = Path('..')
+ETAT_PATH = RACINE / 'data' / 'cache' / 'pipeline_etat.json'
+PROCESSED_PATH = RACINE / 'data' / 'processed'
+# Table nettoyée 'table:<nom>': fichiers de sa version publiée dans data/processed,
+# quel qu'en soit le format (parquet, feather, csv ou jeu partitionné)
+TABLE = 'table:'
+
+# Étapes: dépendances, entrées et sorties (motifs relatifs à la racine du projet
+# ou tables nettoyées) et modules dont le code fait partie de l'empreinte.
+# L'ordre de déclaration est l'ordre d'exécution séquentiel.
+ETAPES = {
+    'exploration': {
+        'dependances': (),
+        'entrees': ('data/raw/*.xlsx',),
+        'sorties': ('reports/exploration_rapport.txt',),
+        'modules': ('exploration_donnees.py',)
+    },
+    'etl': {
+        'dependances': ('exploration',),
+        'entrees': ('data/raw/*.xlsx',),
+        'sorties': ('table:orders', 'table:order_details', 'table:products', 'table:sales_facts',
+                    'data/processed/dictionnaires.json'),
+        'modules': ('etl_main.py', 'encodage.py', 'stockage.py')
+    },
+    'analyse': {
+        'dependances': ('etl',),
+        'entrees': ('table:sales_facts', 'data/processed/dictionnaires.json'),
+        'sorties': ('reports/rapport_analyse.txt',),
+        'modules': ('analysis_main.py', 'stockage.py')
+    },
+    'visualisations': {
+        'dependances': ('analyse',),
+        'entrees': ('table:sales_facts', 'table:products', 'data/processed/dictionnaires.json'),
+        'sorties': ('figures/ventes/*.png', 'figures/produits/*.png', 'figures/clients/*.png',
+                    'figures/interactifs/*.html', 'reports/rapport_visualisations.txt'),
+        'modules': ('visualizations.py', 'cube.py', 'index_temporel.py', 'stockage.py')
+    },
+    'rapports': {
+        'dependances': ('analyse',),
+        'entrees': ('table:sales_facts', 'data/processed/dictionnaires.json', 'data/analysis/segments_rfm.csv'),
+        'sorties': ('reports/rapport_technique.md', 'reports/rapport_business.md'),
+        'modules': ('generate_reports.py', 'panier.py', 'stockage.py')
+    },
+    'validation': {
+        'dependances': ('visualisations', 'rapports'),
+        'entrees': ('table:orders', 'table:order_details', 'table:products', 'table:sales_facts',
+                    'reports/rapport_analyse.txt', 'reports/rapport_business.md', 'reports/rapport_visualisations.txt'),
+        'sorties': ('reports/validation_pipeline.txt',),
+        'modules': ('profilage.py',)
+    }
+}
+
+
+def _executer_exploration():
+    from exploration_donnees import ExplorationDonnees
+    return bool(ExplorationDonnees().executer_exploration_complete())
+
+
+def _executer_etl():
+    from etl_main import executer_etl
+    return executer_etl() is not None
+
+
+def _executer_analyse():
+    from analysis_main import executer_analyse
+    return executer_analyse() is not None
+
+
+def _executer_visualisations():
+    from visualizations import executer_visualisations
+    return bool(executer_visualisations())
+
+
+def _executer_rapports():
+    # Rapports seulement: README.md et requirements.txt du projet ne sont pas régénérés
+    from generate_reports import RapportFinal
+    rapporteur = RapportFinal()
+    rapporteur.generer_rapport_technique()
+    return rapporteur.generer_rapport_business() is not None
+
+
+def _executer_validation():
+    """Tables nettoyées non vides, sans doublon ni faits sans commande; sorties des étapes présentes"""
+    import profilage
+
+    anomalies, lignes = [], []
+    for nom in ('orders', 'order_details', 'products', 'sales_facts'):
+        df = stockage.lire_table(PROCESSED_PATH, nom)
+        if df is None or df.empty:
+            anomalies.append(f"table {nom} absente ou vide")
+            continue
+        profil = profilage.profiler_table(df)
+        lignes.append(f"{nom}: {profil['lignes']} lignes, {profil['valeurs_manquantes']} manquants, "
+                      f"{profil['doublons']} doublons")
+        if profil['doublons']:
+            anomalies.append(f"{profil['doublons']} doublon(s) dans {nom}")
+        if nom == 'sales_facts' and df['order_id'].isna().any():
+            anomalies.append("faits sans order_id")
+    for etape in ETAPES:
+        if etape != 'validation':
+            anomalies += [f"sortie manquante de {etape}: {motif}"
+                          for motif in ETAPES[etape]['sorties'] if not _fichiers(motif)]
+
+    rapport = ["VALIDATION DU PIPELINE", "=" * 40, *lignes, ""]
+    rapport += [f"❌ {a}" for a in anomalies] or ["✅ Aucune anomalie"]
+    with open(RACINE / 'reports' / 'validation_pipeline.txt', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(rapport))
+    for anomalie in anomalies:
+        logging.error(f"❌ {anomalie}")
+    return not anomalies
+
+
+FONCTIONS = {
+    'exploration': _executer_exploration,
+    'etl': _executer_etl,
+    'analyse': _executer_analyse,
+    'visualisations': _executer_visualisations,
+    'rapports': _executer_rapports,
+    'validation': _executer_validation
+}
+
+
+def _fichiers(motif):
+    """Fichiers d'un motif glob, ou de la version publiée d'une table ('table:<nom>')"""
+    if motif.startswith(TABLE):
+        chemin = stockage.trouver_table(PROCESSED_PATH, motif[len(TABLE):])
+        if chemin is None:
+            return []
+        return sorted(p for p in chemin.rglob('part-*') if p.is_file()) if chemin.is_dir() else [chemin]
+    return sorted(p for p in RACINE.glob(motif) if p.is_file())
+
+
+def _hash_fichier(chemin, _memo={}):
+    """SHA-256 du contenu, mémorisé par (taille, mtime) pendant l'exécution"""
+    stat = chemin.stat()
+    cle = (str(chemin), stat.st_size, stat.st_mtime_ns)
+    if cle not in _memo:
+        h = hashlib.sha256()
+        with open(chemin, 'rb') as f:
+            for bloc in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloc)
+        _memo[cle] = h.hexdigest()
+    return _memo[cle]
+
+
+def _hash_motifs(motifs):
+    """Empreintes {chemin relatif: sha256} des fichiers correspondant aux motifs"""
+    return {str(p.relative_to(RACINE)): _hash_fichier(p) for motif in motifs for p in _fichiers(motif)}
+
+
+def empreinte_entrees(nom):
+    """Empreinte du contenu des entrées et du code d'une étape"""
+    etape = ETAPES[nom]
+    contenu = {'entrees': _hash_motifs(etape['entrees']),
+               'modules': _hash_motifs(f"scripts/{m}" for m in etape['modules'])}
+    return hashlib.sha256(json.dumps(contenu, sort_keys=True).encode()).hexdigest()
+
+
+def charger_etat():
+    if ETAT_PATH.exists():
+        with open(ETAT_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def sauvegarder_etat(etat):
+    ETAT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(ETAT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(etat, f, indent=2)
+
+
+def raison_execution(nom, etat, force=False):
+    """Pourquoi l'étape doit s'exécuter, ou None si elle est à jour"""
+    if force:
+        return "forcée"
+    precedent = etat.get(nom)
+    if precedent is None:
+        return "jamais exécutée"
+    if precedent['entrees'] != empreinte_entrees(nom):
+        return "entrées ou code modifiés"
+    sorties = _hash_motifs(ETAPES[nom]['sorties'])
+    if not all(_fichiers(motif) for motif in ETAPES[nom]['sorties']) or sorties != precedent['sorties']:
+        return "sorties absentes ou modifiées"
+    return None
+
+
+def etapes_requises(demandees):
+    """Étapes demandées et leurs dépendances, dans l'ordre de déclaration"""
+    requises = set()
+    pile = list(demandees)
+    while pile:
+        nom = pile.pop()
+        if nom not in requises:
+            requises.add(nom)
+            pile.extend(ETAPES[nom]['dependances'])
+    return [nom for nom in ETAPES if nom in requises]
+
+
+def _lancer(nom):
+    """Exécute une étape (dans le processus courant ou un worker): (succès, durée, mesures)
+
+    Les mesures d'instrumentation reviennent au processus principal, qui
+    écrit reports/run_metrics.json pour toute l'exécution du pipeline.
+    """
+    debut = time.perf_counter()
+    try:
+        with instrumentation.Mesure(f"pipeline.{nom}"):
+            succes = FONCTIONS[nom]()
+    except Exception as e:
+        logging.error(f"💥 Étape {nom}: {e}")
+        succes = False
+    return bool(succes), time.perf_counter() - debut, instrumentation.extraire()
+
+
+def executer_pipeline(etapes=None, jobs=2, force=False, dry_run=False):
+    """Exécute les étapes dans l'ordre du graphe, en sautant celles dont les entrées n'ont pas changé
+
+    Une étape est prête quand ses dépendances sont terminées; jusqu'à jobs
+    étapes prêtes tournent en parallèle (processus séparés). L'empreinte des
+    entrées est recalculée juste avant l'exécution: une étape amont réexécutée
+    mais aux sorties identiques ne relance pas l'aval.
+    """
+    etapes = etapes_requises(etapes or list(ETAPES))
+    demandees_force = set(etapes) if force is True else set(force or ())
+    etat = charger_etat()
+
+    if dry_run:
+        relancees = set()
+        for nom in etapes:
+            raison = raison_execution(nom, etat, nom in demandees_force)
+            if raison is None and any(d in relancees for d in ETAPES[nom]['dependances']):
+                raison = "amont à réexécuter"
+            if raison is not None:
+                relancees.add(nom)
+            logging.info(f"{'▶️' if raison else '⏭️'} {nom:<15} {raison or 'à jour'}")
+        return {nom: None for nom in etapes}
+
+    resultats, en_cours = {}, {}
+    debut = time.perf_counter()
+    executeur = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while len(resultats) < len(etapes):
+            for nom in etapes:
+                if nom in resultats or nom in en_cours.values():
+                    continue
+                dependances = [resultats.get(d) for d in ETAPES[nom]['dependances'] if d in etapes]
+                if any(r in ('echec', 'annulee') for r in dependances):
+                    resultats[nom] = 'annulee'
+                    logging.warning(f"⚠️ {nom}: annulée (dépendance en échec)")
+                    continue
+                if not all(r in ('executee', 'a_jour') for r in dependances):
+                    continue
+                raison = raison_execution(nom, etat, nom in demandees_force)
+                if raison is None:
+                    resultats[nom] = 'a_jour'
+                    logging.info(f"⏭️ {nom}: à jour")
+                elif executeur is None:
+                    logging.info(f"▶️ {nom}: {raison}")
+                    resultats[nom] = _terminer(nom, *_lancer(nom), etat)
+                elif len(en_cours) < jobs:
+                    logging.info(f"▶️ {nom}: {raison}")
+                    en_cours[executeur.submit(_lancer, nom)] = nom
+            if en_cours:
+                faits, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for futur in faits:
+                    nom = en_cours.pop(futur)
+                    resultats[nom] = _terminer(nom, *futur.result(), etat)
+    finally:
+        if executeur is not None:
+            executeur.shutdown()
+
+    executees = [n for n, r in resultats.items() if r == 'executee']
+    echecs = [n for n, r in resultats.items() if r in ('echec', 'annulee')]
+    logging.info(f"{'🎉' if not echecs else '❌'} Pipeline: {len(executees)} étape(s) exécutée(s), "
+                 f"{list(resultats.values()).count('a_jour')} à jour, {len(echecs)} en échec/annulée(s) "
+                 f"({time.perf_counter() - debut:.1f}s)")
+    return resultats
+
+
+def _terminer(nom, succes, duree, mesures, etat):
+    """Enregistre les empreintes d'une étape réussie; 'executee' ou 'echec'"""
+    instrumentation.ajouter(mesures)
+    if not succes:
+        logging.error(f"❌ {nom}: échec ({duree:.1f}s)")
+        etat.pop(nom, None)
+        sauvegarder_etat(etat)
+        return 'echec'
+    etat[nom] = {'entrees': empreinte_entrees(nom), 'sorties': _hash_motifs(ETAPES[nom]['sorties']),
+                 'duree_secondes': round(duree, 3), 'date': time.strftime('%Y-%m-%d %H:%M:%S')}
+    sauvegarder_etat(etat)
+    logging.info(f"✅ {nom}: terminée ({duree:.1f}s)")
+    return 'executee'
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Pipeline Northwind: exploration → ETL → analyse → "
+                                                 "visualisations + rapports → validation")
+    parser.add_argument('--stages', nargs='+', choices=list(ETAPES), default=None,
+                        help="Étapes à exécuter (leurs dépendances sont incluses); toutes par défaut")
+    parser.add_argument('--jobs', type=int, default=2, help="Étapes indépendantes exécutées en parallèle")
+    parser.add_argument('--force', nargs='*', choices=list(ETAPES), default=None,
+                        help="Réexécuter même à jour (toutes les étapes retenues, ou celles listées)")
+    parser.add_argument('--dry-run', action='store_true', help="Afficher le plan sans rien exécuter")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    force = True if args.force == [] else args.force
+    resultats = executer_pipeline(args.stages, args.jobs, force, args.dry_run)
+    sys.exit(1 if any(r in ('echec', 'annulee') for r in resultats.values()) else 0)
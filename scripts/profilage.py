@@ -0,0 +1,170 @@
+# scripts/profilage.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+
+# Multiplicateur FNV-1a 64 bits pour combiner les hash de colonnes en hash de ligne
+_FNV_PREMIER = np.uint64(0x100000001B3)
+
+
+def _hash_colonne(serie):
+    """Hash 64 bits par valeur (les catégorielles sont hachées sur leurs valeurs, pas leurs codes)"""
+    return pd.util.hash_pandas_object(serie, index=False, categorize=True).to_numpy()
+
+
+def _profil_colonne(serie, hashes):
+    """Statistiques d'une colonne: type, manquants, min/max, nombre de valeurs distinctes"""
+    dtype = serie.dtype
+    profil = {'dtype': str(dtype)}
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = serie.cat.codes.to_numpy()
+        manquants = codes < 0
+        profil['manquants'] = int(manquants.sum())
+        # Distinctes exactes à partir des codes utilisés
+        profil['distincts'] = int(np.count_nonzero(np.bincount(codes[~manquants], minlength=1)))
+    else:
+        manquants = serie.isna().to_numpy()
+        profil['manquants'] = int(manquants.sum())
+        # Estimation par hash 64 bits (exacte aux collisions près), valeurs manquantes exclues
+        profil['distincts'] = int(len(pd.unique(hashes[~manquants])))
+
+    if profil['manquants'] < len(serie) and (pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+                                             or pd.api.types.is_datetime64_any_dtype(dtype)):
+        profil['min'] = serie.min()
+        profil['max'] = serie.max()
+    return profil
+
+
+def profiler_table(df):
+    """Profil complet d'une table en une passe par colonne
+
+    Chaque colonne est hachée une seule fois; ces hash servent à la fois au
+    comptage des valeurs distinctes et, combinés, au hash de ligne qui donne
+    le nombre de doublons sans comparer les lignes entre elles.
+    """
+    debut = time.perf_counter()
+    hash_lignes = np.zeros(len(df), dtype='uint64')
+    colonnes = {}
+
+    with np.errstate(over='ignore'):
+        for nom in df.columns:
+            hashes = _hash_colonne(df[nom])
+            colonnes[nom] = _profil_colonne(df[nom], hashes)
+            hash_lignes = (hash_lignes * _FNV_PREMIER) ^ hashes
+
+    types = pd.Series([c['dtype'] for c in colonnes.values()], dtype=object).value_counts()
+    return {
+        'lignes': len(df),
+        'colonnes': len(df.columns),
+        'valeurs_manquantes': sum(c['manquants'] for c in colonnes.values()),
+        'doublons': int(len(df) - len(pd.unique(hash_lignes))) if len(df) else 0,
+        'types': {str(t): int(n) for t, n in types.items()},
+        'par_colonne': colonnes,
+        'duree_secondes': round(time.perf_counter() - debut, 4)
+    }
+
+
+class ProfileurDonnees:
+    """Cache des profils de tables, partagé par l'analyse qualité et le rapport ETL.
+
+    Un profil est réutilisé tant que la table est le même objet, avec le même
+    nombre de lignes et les mêmes colonnes/types; sinon il est recalculé.
+    """
+
+    def __init__(self):
+        self.profils = {}
+        self._signatures = {}
+        self.stats = {'calculs': 0, 'reutilisations': 0}
+
+    @staticmethod
+    def _signature(df):
+        return id(df), len(df), tuple((nom, str(t)) for nom, t in df.dtypes.items())
+
+    def profiler(self, nom, df):
+        """Profil de la table nom (calculé au premier appel, puis servi depuis le cache)"""
+        signature = self._signature(df)
+        if self._signatures.get(nom) == signature:
+            self.stats['reutilisations'] += 1
+            return self.profils[nom]
+
+        profil = profiler_table(df)
+        self.profils[nom] = profil
+        self._signatures[nom] = signature
+        self.stats['calculs'] += 1
+        logging.debug(f"🔬 Profil {nom}: {profil['duree_secondes']}s")
+        return profil
+
+    def profiler_tables(self, tables):
+        return {nom: self.profiler(nom, df) for nom, df in tables.items()}
+
+    def invalider(self, nom=None):
+        """Oublie le profil d'une table (ou de toutes)"""
+        if nom is None:
+            self.profils.clear()
+            self._signatures.clear()
+        else:
+            self.profils.pop(nom, None)
+            self._signatures.pop(nom, None)
+
+
+def comparer_avec_scans(df, repetitions=3):
+    """Compare le profil aux scans qu'il remplace
+
+    Avant profilage, analyse qualité et rapport ETL refaisaient chacun
+    isnull().sum() et duplicated() sur chaque table, puis le rapport
+    relançait nunique() sur trois colonnes de faits.
+    """
+    def chrono(fonction):
+        meilleur = float('inf')
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = fonction()
+            meilleur = min(meilleur, time.perf_counter() - debut)
+        return meilleur, resultat
+
+    def scans():
+        for _ in range(2):
+            manquants, doublons = int(df.isnull().sum().sum()), int(df.duplicated().sum())
+        for colonne in df.columns[:3]:
+            df[colonne].nunique()
+        return manquants, doublons
+
+    t_scans, (manquants, doublons) = chrono(scans)
+    t_profil, profil = chrono(lambda: profiler_table(df))
+
+    print(f"⏱️ scans qualité + rapport: {t_scans:.3f}s | profil une passe: {t_profil:.3f}s (min/max, distinctes et types en plus)")
+    identique = manquants == profil['valeurs_manquantes'] and doublons == profil['doublons']
+    print(f"{'✅' if identique else '❌'} manquants {manquants} / {profil['valeurs_manquantes']}, "
+          f"doublons {doublons} / {profil['doublons']}")
+    return {'scans_secondes': t_scans, 'profil_secondes': t_profil, 'identique': identique}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profilage des tables nettoyées")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=1_000_000, default=None, metavar='LIGNES',
+                        help="Comparer aux scans isnull/duplicated sur une table synthétique")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        import encodage
+        faits = encodage.generer_faits_synthetiques(args.benchmark)
+        # Colonnes texte "comme lues depuis un CSV" et une part de lignes dupliquées
+        faits = faits.astype({colonne: object for colonne in encodage.COLONNES_CATEGORIELLES})
+        faits = pd.concat([faits, faits.sample(frac=0.05, random_state=0)], ignore_index=True)
+        print(f"🧪 Table synthétique: {len(faits):,} lignes x {len(faits.columns)} colonnes")
+        comparer_avec_scans(faits, repetitions=1)
+    else:
+        import stockage
+        from pathlib import Path
+        dossier = Path('../data/processed')
+        for nom in ('sales_facts', 'orders', 'order_details', 'products', 'customers', 'employees'):
+            df = stockage.lire_table(dossier, nom)
+            if df is not None:
+                profil = profiler_table(df)
+                print(f"🔬 {nom}: {profil['lignes']} lignes, {profil['valeurs_manquantes']} manquants, "
+                      f"{profil['doublons']} doublons, types {profil['types']}")
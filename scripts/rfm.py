@@ -0,0 +1,202 @@
+# scripts/rfm.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+import stockage
+import sketches
+import cube
+
+QUANTILES = [0.2, 0.4, 0.6, 0.8]
+
+# Segment selon les scores R (lignes 1 à 5) et F (colonnes 1 à 5)
+SEGMENTS_RF = np.array([
+    ['Hibernants', 'Hibernants', 'À risque', 'À risque', 'À ne pas perdre'],
+    ['Hibernants', 'Hibernants', 'À risque', 'À risque', 'À ne pas perdre'],
+    ['Sur le départ', 'Sur le départ', 'À surveiller', 'Fidèles', 'Fidèles'],
+    ['Prometteurs', 'Fidèles potentiels', 'Fidèles potentiels', 'Fidèles', 'Fidèles'],
+    ['Nouveaux', 'Fidèles potentiels', 'Fidèles potentiels', 'Champions', 'Champions']
+], dtype=object)
+
+AGREGATS = {'order_date': 'max', 'order_id': 'nunique', 'line_total': 'sum'}
+NOMS_AGREGATS = {'order_date': 'derniere_commande', 'order_id': 'nb_commandes', 'line_total': 'montant'}
+
+
+def agreger_clients(faits):
+    """Dernière commande, commandes distinctes et montant par client (nommage etl.py ou *_main)"""
+    base = cube.preparer_faits(faits)
+    agregats = base.groupby('customer_company', observed=True).agg(AGREGATS)
+    return agregats.rename(columns=NOMS_AGREGATS)
+
+
+def seuils_quintiles(valeurs, approx=False):
+    """Bornes des quintiles (p20..p80): exactes par tri partiel, ou t-digest si demandé
+
+    Sur un tableau déjà en mémoire, np.quantile est plus rapide et exact:
+    le t-digest n'est retenu que sur demande (comparaison de mesurer()).
+    """
+    valeurs = np.asarray(valeurs, dtype='float64')
+    if approx:
+        return np.asarray(sketches.construire_digest(valeurs).quantiles(QUANTILES))
+    return np.quantile(valeurs, QUANTILES)
+
+
+def scorer(agregats, date_reference=None, approx=False):
+    """Scores R, F, M de 1 à 5 et segment, calculés en un passage vectorisé par colonne
+
+    Recence en jours depuis date_reference (par défaut le lendemain de la
+    dernière commande): les plus récents obtiennent R=5. F et M croissent
+    avec le nombre de commandes et le montant.
+    """
+    if date_reference is None:
+        date_reference = agregats['derniere_commande'].max() + pd.Timedelta(days=1)
+    scores = agregats[['derniere_commande', 'nb_commandes', 'montant']].copy()
+    scores['recence_jours'] = (date_reference - scores['derniere_commande']).dt.days.astype('int64')
+
+    for score, colonne, croissant in (('R', 'recence_jours', False), ('F', 'nb_commandes', True),
+                                      ('M', 'montant', True)):
+        valeurs = scores[colonne].to_numpy(dtype='float64')
+        rangs = np.searchsorted(seuils_quintiles(valeurs, approx), valeurs, side='left')
+        scores[score] = (rangs + 1 if croissant else 5 - rangs).astype('int8')
+
+    scores['score_rfm'] = scores['R'] * 100 + scores['F'] * 10 + scores['M']
+    scores['segment'] = pd.Categorical(SEGMENTS_RF[scores['R'].to_numpy() - 1, scores['F'].to_numpy() - 1],
+                                       categories=pd.unique(SEGMENTS_RF.ravel()))
+    return scores
+
+
+class ScoresRFM:
+    """Scores RFM persistés, rescorés à l'arrivée de nouvelles commandes.
+
+    Les agrégats par client sont fusionnables (max des dates, sommes des
+    commandes et montants): un lot de commandes nouvelles ne met à jour que
+    les clients concernés, puis tous les scores sont recalculés en un
+    passage vectorisé (seuils et récence dépendent de toute la population).
+    """
+
+    def __init__(self, agregats, date_reference=None, approx=False):
+        self.approx = approx
+        self.scores = scorer(agregats, date_reference, approx)
+        self.stats = {}
+
+    @classmethod
+    def depuis_faits(cls, faits, approx=False):
+        return cls(agreger_clients(faits), approx=approx)
+
+    @property
+    def agregats(self):
+        return self.scores[list(NOMS_AGREGATS.values())]
+
+    def ajouter(self, faits_nouveaux):
+        """Intègre des lignes de commandes nouvelles (absentes des agrégats) et rescore"""
+        debut = time.perf_counter()
+        delta = agreger_clients(faits_nouveaux) if len(faits_nouveaux) else None
+        if delta is None or delta.empty:
+            return self
+
+        anciens = self.scores['segment']
+        agregats = self.agregats
+        communs = delta.index.intersection(agregats.index)
+        fusion = pd.concat([agregats.loc[communs], delta.loc[communs]]).groupby(level=0, observed=True).agg(
+            {'derniere_commande': 'max', 'nb_commandes': 'sum', 'montant': 'sum'})
+        agregats = pd.concat([agregats.drop(communs), fusion, delta.drop(communs)])
+        agregats.index.name = 'customer_company'
+
+        self.scores = scorer(agregats, approx=self.approx)
+        changes = (self.scores['segment'].astype(object) != anciens.reindex(self.scores.index).astype(object)).sum()
+        self.stats = {'clients_mis_a_jour': len(delta), 'nouveaux_clients': len(delta) - len(communs),
+                      'segments_modifies': int(changes)}
+        logging.info(f"🔁 RFM: {len(delta)} client(s) mis à jour, {int(changes)} changement(s) de segment "
+                     f"({time.perf_counter() - debut:.2f}s)")
+        return self
+
+    def resume_segments(self):
+        """Nombre de clients, montant et scores moyens par segment"""
+        resume = self.scores.groupby('segment', observed=True).agg(
+            nb_clients=('R', 'size'), montant=('montant', 'sum'), recence_moyenne=('recence_jours', 'mean'),
+            commandes_moyennes=('nb_commandes', 'mean'))
+        resume['part_clients'] = (resume['nb_clients'] / len(self.scores) * 100).round(1)
+        return resume.sort_values('montant', ascending=False)
+
+    def sauvegarder(self, dossier, nom='rfm_clients'):
+        sauvegarder_scores(self.scores, dossier, nom)
+
+    @classmethod
+    def charger(cls, dossier, nom='rfm_clients', approx=False):
+        """Scores persistés par sauvegarder(), ou None"""
+        scores = stockage.lire_table(dossier, nom, dictionnaires={})
+        if scores is None:
+            return None
+        scores = scores.set_index('customer_company')
+        scores['derniere_commande'] = pd.to_datetime(scores['derniere_commande'])
+        return cls(scores[list(NOMS_AGREGATS.values())], approx=approx)
+
+
+def sauvegarder_scores(scores, dossier, nom='rfm_clients'):
+    """Persiste une table de scores (agrégats compris), relue par ScoresRFM.charger()"""
+    stockage.ecrire_table(scores.reset_index(), dossier, nom)
+
+
+def mesurer(n_clients=20_000_000, graine=0):
+    """Seuils exacts vs t-digest sur une population synthétique: temps et accord des scores"""
+    rng = np.random.default_rng(graine)
+    reference = pd.Timestamp('2024-01-01')
+    agregats = pd.DataFrame({
+        'derniere_commande': reference - pd.to_timedelta(rng.integers(0, 730, n_clients), unit='D'),
+        'nb_commandes': rng.geometric(0.3, n_clients),
+        'montant': rng.lognormal(6, 1.2, n_clients)
+    })
+    print(f"🧪 {n_clients:,} clients synthétiques")
+
+    resultats = {}
+    for approx in (False, True):
+        debut = time.perf_counter()
+        resultats[approx] = scorer(agregats, reference, approx=approx)
+        print(f"⏱️ Seuils {'t-digest' if approx else 'exacts'}: {time.perf_counter() - debut:.2f}s")
+    accord = {s: float((resultats[True][s] == resultats[False][s]).mean() * 100) for s in ('R', 'F', 'M')}
+    print(f"🎯 Scores identiques: " + ', '.join(f"{s} {p:.3f}%" for s, p in accord.items()))
+    return accord
+
+
+def verifier_incremental(faits, part=0.2):
+    """Scores après ajout des dernières commandes == scores recalculés sur tous les faits"""
+    faits = faits.sort_values('order_date', kind='mergesort')
+    commandes = faits['order_id'].drop_duplicates()
+    nouvelles = commandes.iloc[int(len(commandes) * (1 - part)):]
+    masque = faits['order_id'].isin(nouvelles)
+
+    incremental = ScoresRFM.depuis_faits(faits[~masque]).ajouter(faits[masque]).scores
+    complet = ScoresRFM.depuis_faits(faits).scores
+    try:
+        pd.testing.assert_frame_equal(incremental.sort_index(), complet.sort_index(), check_dtype=False,
+                                      check_categorical=False)
+    except AssertionError as e:
+        logging.error(f"❌ RFM incrémental / complet: {e}")
+        return False
+    logging.info(f"✅ RFM incrémental identique au calcul complet ({len(nouvelles)} commandes ajoutées)")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Scores RFM des clients")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=20_000_000, default=None, metavar='CLIENTS',
+                        help="Seuils exacts vs t-digest sur une population synthétique")
+    parser.add_argument('--verifier-incremental', action='store_true',
+                        help="Comparer un rescoring incrémental au calcul complet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        mesurer(args.benchmark)
+    else:
+        faits = stockage.lire_table(Path('../data/processed'), 'sales_facts', parse_dates=['order_date'])
+        if faits is None:
+            print("❌ Table sales_facts_clean non trouvée")
+        else:
+            scores = ScoresRFM.depuis_faits(faits)
+            print(scores.resume_segments().round(1).to_string())
+            if args.verifier_incremental:
+                verifier_incremental(faits)
@@ -0,0 +1,225 @@
+# scripts/schema_etoile.py
+import pandas as pd
+import numpy as np
+import logging
+import json
+from pathlib import Path
+import calendrier
+import stockage
+
+# Membre "inconnu" de chaque dimension: clé 0, les membres réels commencent à 1
+CLE_INCONNUE = 0
+LIBELLE_INCONNU = 'Inconnu'
+
+# Mesures conservées dans la table de faits
+MESURES = ['quantity', 'unit_price', 'line_total', 'standard_cost', 'profit',
+           'shipping_fee', 'delivery_days', 'status_id']
+
+
+def _dimension(df, colonne_naturelle, colonnes, nom_cle, membres_supplementaires=None):
+    """Construit une dimension dédoublonnée avec clé entière dense (0 = inconnu)
+
+    membres_supplementaires: valeurs naturelles rencontrées dans les faits mais
+    absentes de la table source (ajoutées sans attributs, comme une jointure gauche).
+    """
+    dim = df[colonnes].drop_duplicates(subset=[colonne_naturelle]).dropna(subset=[colonne_naturelle])
+    if membres_supplementaires is not None:
+        manquants = pd.Series(pd.unique(pd.Series(membres_supplementaires).dropna()))
+        manquants = manquants[~manquants.isin(dim[colonne_naturelle])]
+        if len(manquants):
+            dim = pd.concat([dim, pd.DataFrame({colonne_naturelle: manquants.values})], ignore_index=True)
+    dim = dim.reset_index(drop=True)
+
+    inconnu = pd.DataFrame({col: [LIBELLE_INCONNU if col == colonne_naturelle else np.nan] for col in colonnes})
+    dim = pd.concat([inconnu, dim], ignore_index=True)
+    dim.insert(0, nom_cle, np.arange(len(dim), dtype='int32'))
+    return dim
+
+
+def _cles(dim, colonne_naturelle, valeurs):
+    """Clés de substitution pour un vecteur de valeurs naturelles (-1 -> membre inconnu)"""
+    positions = pd.Index(dim[colonne_naturelle].iloc[1:]).get_indexer(valeurs)
+    return (positions + 1).astype('int32')
+
+
+def _table_de_correspondance(ids):
+    """Tableau id -> position pour des identifiants entiers (recherche par indexation directe)"""
+    ids = np.asarray(ids, dtype='int64')
+    lut = np.full(int(ids.max()) + 1 if len(ids) else 1, -1, dtype='int64')
+    lut[ids] = np.arange(len(ids))
+    return lut
+
+
+def construire_dim_date(dates):
+    """Dimension date au grain jour (calendrier complet), clé entière AAAAMMJJ"""
+    return calendrier.dim_date_pour(dates)
+
+
+def cles_date(dates, dim_date):
+    """Clé AAAAMMJJ pour un vecteur de dates, lue dans le calendrier (0 si manquante)"""
+    pos = calendrier.positions(dates, dim_date)
+    cles = dim_date['date_key'].to_numpy()[np.where(pos >= 0, pos, 0)] if len(dim_date) else np.zeros(len(pos), dtype='int32')
+    return np.where(pos >= 0, cles, CLE_INCONNUE).astype('int32')
+
+
+def construire_schema_etoile(orders, order_details, products, customers, employees):
+    """Construit les dimensions et la table de faits à clés entières
+
+    Les tables en entrée sont les tables nettoyées par ETLNorthwind (noms de
+    colonnes en snake_case). La table de faits ne contient que des clés int32
+    et des mesures; les jointures se font par recherche positionnelle.
+    """
+    dim_product = _dimension(products, 'product_name',
+                             ['product_name', 'product_code', 'category', 'standard_cost', 'list_price'],
+                             'product_key', order_details['product_name'])
+    dim_customer = _dimension(customers, 'company_name',
+                              ['company_name', 'customer_name', 'city', 'state', 'country'],
+                              'customer_key', orders['customer_company'])
+    dim_employee = _dimension(employees, 'employee_name',
+                              ['employee_name', 'job_title', 'city', 'country'],
+                              'employee_key', orders['employee_name'])
+    dim_payment = _dimension(orders, 'payment_type', ['payment_type'], 'payment_key')
+    dim_date = construire_dim_date(orders['order_date'])
+
+    # Attributs de la commande portés par chaque ligne: recherche directe par order_id
+    lut_commandes = _table_de_correspondance(orders['order_id'])
+    ids_lignes = order_details['order_id'].to_numpy(dtype='int64')
+    dans_bornes = (ids_lignes >= 0) & (ids_lignes < len(lut_commandes))
+    pos = np.where(dans_bornes, lut_commandes[np.clip(ids_lignes, 0, len(lut_commandes) - 1)], -1)
+    trouve = pos >= 0
+
+    def attribut_commande(valeurs, defaut):
+        valeurs = np.asarray(valeurs)
+        resultat = np.full(len(pos), defaut, dtype=valeurs.dtype if valeurs.dtype != object else object)
+        resultat[trouve] = valeurs[pos[trouve]]
+        return resultat
+
+    cle_client_commande = _cles(dim_customer, 'company_name', orders['customer_company'])
+    cle_employe_commande = _cles(dim_employee, 'employee_name', orders['employee_name'])
+    cle_paiement_commande = _cles(dim_payment, 'payment_type', orders['payment_type'])
+    cle_date_commande = cles_date(orders['order_date'], dim_date)
+
+    product_key = _cles(dim_product, 'product_name', order_details['product_name'])
+    cout_standard = dim_product['standard_cost'].to_numpy(dtype='float64')[product_key]
+
+    faits = pd.DataFrame({
+        'order_id': ids_lignes.astype('int32'),
+        'date_key': attribut_commande(cle_date_commande, CLE_INCONNUE).astype('int32'),
+        'product_key': product_key,
+        'customer_key': attribut_commande(cle_client_commande, CLE_INCONNUE).astype('int32'),
+        'employee_key': attribut_commande(cle_employe_commande, CLE_INCONNUE).astype('int32'),
+        'payment_key': attribut_commande(cle_paiement_commande, CLE_INCONNUE).astype('int32'),
+        'quantity': order_details['quantity'].to_numpy(dtype='int32'),
+        'unit_price': order_details['unit_price'].to_numpy(dtype='float64'),
+        'line_total': order_details['line_total'].to_numpy(dtype='float64'),
+        'standard_cost': cout_standard,
+        'shipping_fee': attribut_commande(orders['shipping_fee'].to_numpy(dtype='float64'), np.nan),
+        'delivery_days': attribut_commande(orders['delivery_days'].to_numpy(dtype='float64'), np.nan),
+        # Entier nullable: statut manquant pour une ligne sans commande
+        'status_id': pd.arrays.IntegerArray(attribut_commande(orders['status_id'].to_numpy(dtype='int8'), 0), ~trouve)
+    })
+    faits['profit'] = ((faits['unit_price'] - faits['standard_cost']) * faits['quantity']).round(2)
+    faits = faits[['order_id', 'date_key', 'product_key', 'customer_key', 'employee_key', 'payment_key'] + MESURES]
+
+    logging.info(f"⭐ Schéma en étoile: {len(faits)} faits, {len(dim_product) - 1} produits, "
+                 f"{len(dim_customer) - 1} clients, {len(dim_employee) - 1} employés, {len(dim_date)} jours")
+
+    return {
+        'dim_product': dim_product,
+        'dim_customer': dim_customer,
+        'dim_employee': dim_employee,
+        'dim_payment': dim_payment,
+        'dim_date': dim_date,
+        'fact_sales': faits
+    }
+
+
+def _libelles(dim, colonne, cles):
+    """Colonne catégorielle construite à partir des clés, sans copie de chaînes"""
+    categories = dim[colonne].astype(object).where(dim[colonne].notna(), None)
+    valeurs_uniques = pd.unique(categories.dropna())
+    codes_dim = pd.Index(valeurs_uniques).get_indexer(categories)
+    codes = codes_dim[cles]
+    codes[cles == CLE_INCONNUE] = -1  # membre inconnu -> valeur manquante, comme la jointure gauche
+    return pd.Categorical.from_codes(codes, categories=valeurs_uniques).remove_unused_categories()
+
+
+def denormaliser(schema):
+    """Reconstruit une vue sales_facts à partir du schéma en étoile
+
+    Les colonnes texte sont des catégorielles (codes entiers) pour que les
+    groupby de l'analyse travaillent sur des entiers.
+    """
+    faits = schema['fact_sales']
+    dim_date = schema['dim_date']
+    dim_product = schema['dim_product']
+    dim_customer = schema['dim_customer']
+    dim_employee = schema['dim_employee']
+    dim_payment = schema['dim_payment']
+
+    # Recherche positionnelle date_key -> ligne de dim_date
+    pos_date = pd.Index(dim_date['date_key']).get_indexer(faits['date_key'])
+    dates = pd.to_datetime(dim_date['date']).to_numpy()
+    order_date = np.where(pos_date >= 0, dates[np.clip(pos_date, 0, max(len(dates) - 1, 0))], np.datetime64('NaT'))
+
+    pk = faits['product_key'].to_numpy()
+    ck = faits['customer_key'].to_numpy()
+    ek = faits['employee_key'].to_numpy()
+
+    vue = pd.DataFrame({
+        'order_id': faits['order_id'],
+        'order_date': pd.to_datetime(order_date),
+        'customer_company': _libelles(dim_customer, 'company_name', ck),
+        'customer_name': _libelles(dim_customer, 'customer_name', ck),
+        'city': _libelles(dim_customer, 'city', ck),
+        'state': _libelles(dim_customer, 'state', ck),
+        'country': _libelles(dim_customer, 'country', ck),
+        'employee_name': _libelles(dim_employee, 'employee_name', ek),
+        'product_name': _libelles(dim_product, 'product_name', pk),
+        'category': _libelles(dim_product, 'category', pk),
+        'payment_type': _libelles(dim_payment, 'payment_type', faits['payment_key'].to_numpy())
+    })
+    for colonne, attribut in (('order_year', 'year'), ('order_month', 'month'), ('order_quarter', 'quarter')):
+        vue[colonne] = calendrier.attribut(dim_date, pos_date, attribut)
+    for mesure in MESURES:
+        vue[mesure] = faits[mesure].array
+
+    return vue
+
+
+TABLES_SCHEMA = ['dim_product', 'dim_customer', 'dim_employee', 'dim_payment', 'dim_date', 'fact_sales']
+# Version de sales_facts dont le schéma publié a été construit
+SOURCE_SCHEMA = 'schema_etoile_source.json'
+
+
+def enregistrer_source(dossier):
+    """Note l'empreinte de sales_facts publiée avec le schéma (à appeler après leur écriture)"""
+    with open(Path(dossier) / SOURCE_SCHEMA, 'w', encoding='utf-8') as f:
+        json.dump({'sales_facts': stockage.empreinte_tables(dossier, ['sales_facts'])}, f)
+
+
+def _source_a_jour(dossier):
+    """Le schéma a-t-il été construit à partir de la sales_facts publiée ?"""
+    try:
+        with open(Path(dossier) / SOURCE_SCHEMA, encoding='utf-8') as f:
+            source = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return source.get('sales_facts') == stockage.empreinte_tables(dossier, ['sales_facts'])
+
+
+def charger_schema(dossier):
+    """Relit le schéma en étoile publié par l'ETL, ou None s'il est incomplet ou périmé
+
+    sales_facts republiée sans le schéma (etl_main, session, pipeline):
+    le schéma décrit une version précédente des ventes et n'est pas utilisé.
+    """
+    if not all(stockage.table_existe(dossier, nom) for nom in TABLES_SCHEMA):
+        return None
+    if not _source_a_jour(dossier):
+        logging.warning("⚠️ Schéma en étoile périmé (sales_facts republiée depuis): lecture de sales_facts")
+        return None
+    return {
+        nom: stockage.lire_table(dossier, nom, parse_dates=['date'] if nom == 'dim_date' else None)
+        for nom in TABLES_SCHEMA
+    }
@@ -0,0 +1,129 @@
+# scripts/session_pipeline.py
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import time
+import stockage
+
+
+class SessionPipeline:
+    """Tables nettoyées partagées en mémoire entre les étapes d'une exécution complète.
+
+    L'ETL y dépose ses tables; l'analyse et les visualisations les lisent
+    directement, sans relire ni reparser les CSV. L'écriture sur disque
+    devient un effet de bord asynchrone (un thread d'écriture) et n'est
+    plus le canal de communication entre étapes: fermer() attend qu'elle
+    soit terminée, pour le dashboard ou une exécution ultérieure.
+    """
+
+    def __init__(self, dossier='../data/processed', format_fichier='csv'):
+        self.dossier = Path(dossier)
+        self.format_fichier = format_fichier
+        self.tables = {}
+        self._ecritures = {}
+        self._executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persistance')
+        self.stats = {'tables_servies': 0, 'lectures_disque': 0, 'ecriture_secondes': 0.0}
+
+    def publier(self, nom, df):
+        """Rend la table disponible aux étapes suivantes et planifie son écriture"""
+        self.tables[nom] = df
+        # Copie superficielle (copy-on-write): aucune donnée dupliquée, et une
+        # colonne ajoutée par une étape n'atteint pas le fichier en cours d'écriture
+        self._ecritures[nom] = self._executeur.submit(self._ecrire, nom, df.copy(deep=False))
+
+    def _ecrire(self, nom, df):
+        debut = time.perf_counter()
+        chemin = stockage.ecrire_table(df, self.dossier, nom, self.format_fichier)
+        self.stats['ecriture_secondes'] += time.perf_counter() - debut
+        return chemin
+
+    def table(self, nom, **options_lecture):
+        """Table de la session, ou lue sur disque (options de stockage.lire_table) si absente"""
+        if nom in self.tables:
+            self.stats['tables_servies'] += 1
+            return self.tables[nom]
+        self.stats['lectures_disque'] += 1
+        df = stockage.lire_table(self.dossier, nom, **options_lecture)
+        if df is not None:
+            self.tables[nom] = df
+        return df
+
+    def attendre(self):
+        """Attend les écritures en cours; retourne les tables dont l'écriture a échoué"""
+        echecs = []
+        for nom, ecriture in self._ecritures.items():
+            try:
+                chemin = ecriture.result()
+                print(f"✅ {chemin.name} sauvegardé ({len(self.tables[nom])} lignes)")
+            except Exception as e:
+                print(f"❌ Erreur sauvegarde {nom}: {e}")
+                echecs.append(nom)
+        self._ecritures.clear()
+        return echecs
+
+    def fermer(self):
+        echecs = self.attendre()
+        self._executeur.shutdown()
+        print(f"📦 Session: {self.stats['tables_servies']} table(s) servie(s) en mémoire, "
+              f"{self.stats['lectures_disque']} lue(s) sur disque, écriture {self.stats['ecriture_secondes']:.2f}s")
+        return not echecs
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def comparer_execution():
+    """Exécution complète par fichiers puis en session: durées et KPI identiques"""
+    from etl_main import executer_etl
+    from analysis_main import executer_analyse
+    from visualizations import executer_visualisations
+
+    debut = time.perf_counter()
+    executer_etl()
+    kpis_disque = executer_analyse()
+    executer_visualisations()
+    duree_disque = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    with SessionPipeline() as session:
+        executer_etl(session)
+        kpis_session = executer_analyse(session)
+        executer_visualisations(session)
+        duree_etapes = time.perf_counter() - debut
+    duree_session = time.perf_counter() - debut
+
+    differents = []
+    for nom, attendu in (kpis_disque or {}).items():
+        obtenu = (kpis_session or {}).get(nom)
+        try:
+            if isinstance(attendu, pd.Series):
+                pd.testing.assert_series_equal(obtenu, attendu, check_index_type=False, check_categorical=False)
+            elif obtenu != attendu and not (pd.isna(obtenu) and pd.isna(attendu)):
+                differents.append(nom)
+        except (AssertionError, TypeError):
+            differents.append(nom)
+    print(f"📊 Fichiers: {duree_disque:.2f}s | Session: {duree_session:.2f}s "
+          f"(étapes {duree_etapes:.2f}s, écritures attendues ensuite) | "
+          f"{'KPI identiques' if kpis_disque and not differents else f'KPI différents: {differents}'}")
+    return kpis_disque is not None and not differents
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ETL + analyse + visualisations en une session (tables en mémoire)")
+    parser.add_argument('--comparer', action='store_true', help="Comparer à l'exécution par fichiers (durées et KPI)")
+    args = parser.parse_args()
+
+    if args.comparer:
+        comparer_execution()
+    else:
+        from etl_main import executer_etl
+        from analysis_main import executer_analyse
+        from visualizations import executer_visualisations
+        with SessionPipeline() as session:
+            if executer_etl(session) and executer_analyse(session):
+                executer_visualisations(session)
@@ -0,0 +1,422 @@
+# scripts/sketches.py
+import pandas as pd
+import numpy as np
+import logging
+import time
+
+# Bornes de précision: 2^4 à 2^18 registres (erreur relative ~26% à ~0.2%)
+PRECISION_MIN = 4
+PRECISION_MAX = 18
+# Lignes hachées par lot (borne les tableaux intermédiaires)
+TAILLE_LOT = 5_000_000
+
+
+def precision_pour_erreur(erreur):
+    """Précision p telle que l'erreur type 1.04/sqrt(2^p) soit <= erreur"""
+    p = int(np.ceil(np.log2((1.04 / erreur) ** 2)))
+    return min(max(p, PRECISION_MIN), PRECISION_MAX)
+
+
+def hacher(valeurs):
+    """Hash 64 bits des valeurs non manquantes (les manquants sont ignorés, comme nunique)"""
+    serie = valeurs if isinstance(valeurs, pd.Series) else pd.Series(valeurs)
+    serie = serie[serie.notna().to_numpy()]
+    return pd.util.hash_pandas_object(serie, index=False, categorize=True).to_numpy()
+
+
+def _rangs(hashes, precision):
+    """(registre, rang) de chaque hash: p bits de poids fort, puis position du premier 1"""
+    registres = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    reste = hashes << np.uint64(precision)
+    # Longueur en bits sur deux moitiés 32 bits (frexp exact en float64)
+    haut = np.frexp((reste >> np.uint64(32)).astype(np.uint32))[1]
+    bas = np.frexp((reste & np.uint64(0xFFFFFFFF)).astype(np.uint32))[1]
+    longueur = np.where(haut > 0, haut + 32, bas)
+    rangs = np.minimum(64 - longueur + 1, 64 - precision + 1).astype(np.uint8)
+    return registres, rangs
+
+
+def _estimer(registres):
+    """Estimation HyperLogLog (avec correction petites cardinalités) par ligne de registres"""
+    registres = np.atleast_2d(registres)
+    m = registres.shape[1]
+    if m == 16:
+        alpha = 0.673
+    elif m == 32:
+        alpha = 0.697
+    elif m == 64:
+        alpha = 0.709
+    else:
+        alpha = 0.7213 / (1 + 1.079 / m)
+
+    puissances = np.exp2(-np.arange(66, dtype='float64'))
+    estimations = np.empty(len(registres))
+    # Par paquets de groupes pour ne pas matérialiser n x m flottants
+    for debut in range(0, len(registres), 256):
+        paquet = registres[debut:debut + 256]
+        brute = alpha * m * m / puissances[paquet].sum(axis=1)
+        vides = (paquet == 0).sum(axis=1)
+        lineaire = m * np.log(m / np.maximum(vides, 1))
+        estimations[debut:debut + 256] = np.where((brute <= 2.5 * m) & (vides > 0), lineaire, brute)
+    return estimations
+
+
+class HyperLogLog:
+    """Comptage approximatif de valeurs distinctes en mémoire constante (2^p octets).
+
+    Deux sketches de même précision se fusionnent par maximum des registres:
+    le sketch d'une union de partitions ou de périodes est la fusion de leurs
+    sketches, sans relire les données.
+    """
+
+    def __init__(self, precision=14, registres=None):
+        if not PRECISION_MIN <= precision <= PRECISION_MAX:
+            raise ValueError(f"Précision hors bornes [{PRECISION_MIN}, {PRECISION_MAX}]: {precision}")
+        self.precision = precision
+        self.registres = registres if registres is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def depuis_erreur(cls, erreur):
+        return cls(precision_pour_erreur(erreur))
+
+    @property
+    def erreur_relative(self):
+        return 1.04 / np.sqrt(len(self.registres))
+
+    def ajouter(self, valeurs):
+        return self.ajouter_hashes(hacher(valeurs))
+
+    def ajouter_hashes(self, hashes):
+        for debut in range(0, len(hashes), TAILLE_LOT):
+            registres, rangs = _rangs(hashes[debut:debut + TAILLE_LOT], self.precision)
+            np.maximum.at(self.registres, registres, rangs)
+        return self
+
+    def fusionner(self, autre):
+        if autre.precision != self.precision:
+            raise ValueError(f"Précisions différentes: {self.precision} vs {autre.precision}")
+        return HyperLogLog(self.precision, np.maximum(self.registres, autre.registres))
+
+    __or__ = fusionner
+
+    def estimer(self):
+        return float(_estimer(self.registres)[0])
+
+
+class HLLGroupes:
+    """Un sketch HyperLogLog par groupe (une ligne de registres par clé de groupe).
+
+    L'équivalent approché de df.groupby(cles)[colonne].nunique(): les groupes
+    de deux HLLGroupes (partitions, périodes) se fusionnent clé par clé.
+    """
+
+    def __init__(self, index, registres, precision):
+        self.index = index
+        self.registres = registres
+        self.precision = precision
+
+    @classmethod
+    def construire(cls, df, cles, colonne, precision=14):
+        groupes = df.groupby(cles, observed=True, sort=True)
+        # Lignes à clé manquante: hors groupes (ngroup NaN), comme dans groupby
+        codes = groupes.ngroup().fillna(-1).to_numpy(dtype='int64')
+        index = groupes.size().index
+        m = 1 << precision
+        registres = np.zeros(len(index) * m, dtype=np.uint8)
+
+        valeurs = df[colonne]
+        utiles = (codes >= 0) & valeurs.notna().to_numpy()
+        codes = codes[utiles]
+        hashes = hacher(valeurs[utiles])
+        for debut in range(0, len(hashes), TAILLE_LOT):
+            positions, rangs = _rangs(hashes[debut:debut + TAILLE_LOT], precision)
+            np.maximum.at(registres, codes[debut:debut + TAILLE_LOT] * m + positions, rangs)
+        return cls(index, registres.reshape(len(index), m), precision)
+
+    def fusionner(self, autre):
+        if autre.precision != self.precision:
+            raise ValueError(f"Précisions différentes: {self.precision} vs {autre.precision}")
+        index = self.index.union(autre.index)
+        registres = np.zeros((len(index), self.registres.shape[1]), dtype=np.uint8)
+        for source in (self, autre):
+            positions = index.get_indexer(source.index)
+            registres[positions] = np.maximum(registres[positions], source.registres)
+        return HLLGroupes(index, registres, self.precision)
+
+    __or__ = fusionner
+
+    def total(self):
+        """Sketch de l'ensemble des groupes (distinctes toutes clés confondues)"""
+        return HyperLogLog(self.precision, self.registres.max(axis=0))
+
+    def estimer(self):
+        return pd.Series(np.rint(_estimer(self.registres)).astype('int64'), index=self.index)
+
+
+class TDigest:
+    """Sketch de quantiles t-digest: centroïdes (moyenne, poids) comprimés par fusion.
+
+    Les valeurs sont accumulées par lots vectorisés; au-delà de taille_tampon
+    centroïdes, ceux-ci sont triés et regroupés selon la fonction d'échelle
+    k1 (centroïdes fins aux extrémités, larges au centre), sans jamais trier
+    la colonne complète. Deux digests se fusionnent en concaténant puis
+    recomprimant leurs centroïdes. Tant qu'aucune compression n'a eu lieu,
+    les quantiles sont exacts (interpolation linéaire, comme Series.quantile).
+    """
+
+    def __init__(self, delta=500, taille_tampon=None):
+        self.delta = delta
+        self.taille_tampon = taille_tampon or 10 * delta
+        self.moyennes = np.empty(0)
+        self.poids = np.empty(0)
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    @property
+    def n(self):
+        return float(self.poids.sum())
+
+    def ajouter(self, valeurs):
+        valeurs = np.asarray(pd.Series(valeurs).dropna(), dtype='float64')
+        if len(valeurs) == 0:
+            return self
+        self.minimum = min(self.minimum, valeurs.min())
+        self.maximum = max(self.maximum, valeurs.max())
+        for debut in range(0, len(valeurs), TAILLE_LOT):
+            lot = valeurs[debut:debut + TAILLE_LOT]
+            self.moyennes = np.concatenate([self.moyennes, lot])
+            self.poids = np.concatenate([self.poids, np.ones(len(lot))])
+            if len(self.moyennes) > self.taille_tampon:
+                self._comprimer()
+        return self
+
+    def _comprimer(self):
+        ordre = np.argsort(self.moyennes)
+        moyennes, poids = self.moyennes[ordre], self.poids[ordre]
+        cumul = np.cumsum(poids)
+        q_gauche = (cumul - poids) / cumul[-1]
+        # Un cluster par unité de k: k(q) = delta / pi * asin(2q - 1), soit ~delta centroïdes
+        k = self.delta / np.pi * np.arcsin(2 * q_gauche - 1)
+        clusters = np.floor(k - k[0]).astype(np.int64)
+        _, clusters = np.unique(clusters, return_inverse=True)
+        self.poids = np.bincount(clusters, weights=poids)
+        self.moyennes = np.bincount(clusters, weights=poids * moyennes) / self.poids
+
+    def fusionner(self, autre):
+        resultat = TDigest(self.delta, self.taille_tampon)
+        resultat.moyennes = np.concatenate([self.moyennes, autre.moyennes])
+        resultat.poids = np.concatenate([self.poids, autre.poids])
+        resultat.minimum = min(self.minimum, autre.minimum)
+        resultat.maximum = max(self.maximum, autre.maximum)
+        if len(resultat.moyennes) > resultat.taille_tampon:
+            resultat._comprimer()
+        return resultat
+
+    __or__ = fusionner
+
+    def quantiles(self, q):
+        """Quantile(s) estimé(s) pour q (scalaire ou liste), NaN si le digest est vide"""
+        q = np.asarray(q, dtype='float64')
+        if len(self.poids) == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        ordre = np.argsort(self.moyennes)
+        moyennes, poids = self.moyennes[ordre], self.poids[ordre]
+        # Rang moyen des valeurs de chaque centroïde (rang i pour une valeur seule)
+        centres = np.cumsum(poids) - poids + (poids - 1) / 2
+        if poids[0] > 1:
+            centres, moyennes = np.r_[0.0, centres], np.r_[self.minimum, moyennes]
+        if poids[-1] > 1:
+            centres, moyennes = np.r_[centres, poids.sum() - 1], np.r_[moyennes, self.maximum]
+        resultat = np.interp(q * (poids.sum() - 1), centres, moyennes)
+        return resultat if q.ndim else float(resultat)
+
+    def quantile(self, q):
+        return self.quantiles(q)
+
+
+def construire_digest(valeurs, delta=500, taille_bloc=TAILLE_LOT):
+    """TDigest d'une colonne lue bloc par bloc (itérable de séries ou série unique)"""
+    digest = TDigest(delta)
+    blocs = valeurs
+    if isinstance(valeurs, (pd.Series, np.ndarray)):
+        blocs = (valeurs[debut:debut + taille_bloc] for debut in range(0, len(valeurs), taille_bloc))
+    for bloc in blocs:
+        digest.ajouter(bloc)
+    return digest
+
+
+def compter_distincts(valeurs, erreur=None):
+    """nunique() exact (erreur=None) ou estimé par HyperLogLog à l'erreur type demandée"""
+    if erreur is None:
+        return valeurs.nunique()
+    return int(round(HyperLogLog.depuis_erreur(erreur).ajouter(valeurs).estimer()))
+
+
+def distincts_par_groupe(df, cles, colonne, erreur=None):
+    """df.groupby(cles)[colonne].nunique(), exact ou estimé par HyperLogLog"""
+    if erreur is None:
+        return df.groupby(cles, observed=True)[colonne].nunique()
+    return HLLGroupes.construire(df, cles, colonne, precision_pour_erreur(erreur)).estimer().rename(colonne)
+
+
+def _par_partition(dossier, nom, colonnes, construire):
+    """Applique construire(df) à chaque partition (année, mois), lue seule et limitée à colonnes"""
+    import stockage
+
+    sketches = {}
+    for partition in stockage.lister_partitions(dossier, nom):
+        df = stockage.lire_partitions(dossier, nom, partitions=[partition], colonnes=colonnes)
+        if df is not None:
+            sketches[partition] = construire(df)
+    return sketches
+
+
+def sketches_par_partition(dossier, nom, colonne, cles=None, erreur=0.01):
+    """Un sketch HyperLogLog par partition (année, mois) d'un jeu partitionné
+
+    Chaque partition est lue seule (colonnes utiles uniquement); les sketches
+    d'une période quelconque s'obtiennent ensuite par fusion, sans relecture.
+    """
+    precision = precision_pour_erreur(erreur)
+    if cles is None:
+        return _par_partition(dossier, nom, [colonne], lambda df: HyperLogLog(precision).ajouter(df[colonne]))
+    colonnes = [colonne] + ([cles] if isinstance(cles, str) else list(cles))
+    return _par_partition(dossier, nom, colonnes, lambda df: HLLGroupes.construire(df, cles, colonne, precision))
+
+
+def digests_par_partition(dossier, nom, colonne, delta=500):
+    """Un TDigest par partition (année, mois), fusionnables comme les sketches HyperLogLog"""
+    return _par_partition(dossier, nom, [colonne], lambda df: TDigest(delta).ajouter(df[colonne]))
+
+
+def fusionner_periode(sketches, debut=None, fin=None):
+    """Fusion des sketches de partitions dont le mois est dans [debut, fin] (bornes incluses)"""
+    debut = pd.Timestamp(debut).to_period('M') if debut is not None else None
+    fin = pd.Timestamp(fin).to_period('M') if fin is not None else None
+    resultat = None
+    for partition, sketch in sketches.items():
+        if partition is None:
+            if debut is not None or fin is not None:
+                continue
+        else:
+            mois = pd.Period(year=partition[0], month=partition[1], freq='M')
+            if (debut is not None and mois < debut) or (fin is not None and mois > fin):
+                continue
+        resultat = sketch if resultat is None else resultat.fusionner(sketch)
+    return resultat
+
+
+def mesurer_gains(n_lignes=100_000_000, erreur=0.01, n_groupes=50, taille_lot=20_000_000):
+    """Distinctes exactes vs HyperLogLog: temps, pic mémoire et erreur observée
+
+    La table est générée par lots (order_id, groupe) pour tenir en mémoire à
+    100M lignes. Les sketches sont mesurés en premier: le pic mémoire du
+    processus (ru_maxrss) n'augmente ensuite qu'avec le comptage exact.
+    """
+    import resource
+
+    def pic_mo():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    rng = np.random.default_rng(42)
+    n_commandes = n_lignes // 3 + 1
+    print(f"🧪 {n_lignes:,} lignes, ~{n_commandes:,} commandes, {n_groupes} groupes, erreur cible {erreur:.1%}")
+
+    ids = np.empty(n_lignes, dtype=np.int64)
+    groupes = np.empty(n_lignes, dtype=np.int16)
+    for debut in range(0, n_lignes, taille_lot):
+        fin = min(debut + taille_lot, n_lignes)
+        ids[debut:fin] = rng.integers(0, n_commandes, fin - debut)
+        groupes[debut:fin] = rng.integers(0, n_groupes, fin - debut)
+    base = pic_mo()
+
+    def mesurer(libelle, fonction):
+        debut = time.perf_counter()
+        resultat = fonction()
+        duree = time.perf_counter() - debut
+        print(f"⏱️ {libelle}: {duree:.2f}s (pic mémoire +{pic_mo() - base:,.0f} Mo)")
+        return resultat, duree
+
+    sketch = HyperLogLog.depuis_erreur(erreur)
+
+    def approx():
+        for debut in range(0, n_lignes, taille_lot):
+            sketch.ajouter_hashes(hacher(ids[debut:debut + taille_lot]))
+        return sketch.estimer()
+
+    # Par groupe, lots fusionnés comme le seraient des partitions
+    def approx_groupes():
+        fusion = None
+        for debut in range(0, n_lignes, taille_lot):
+            lot = pd.DataFrame({'g': groupes[debut:debut + taille_lot], 'id': ids[debut:debut + taille_lot]})
+            sketch_lot = HLLGroupes.construire(lot, 'g', 'id', precision_pour_erreur(erreur))
+            fusion = sketch_lot if fusion is None else fusion.fusionner(sketch_lot)
+        return fusion.estimer()
+
+    def exact_groupes():
+        # Groupe par groupe: un groupby().nunique() d'un bloc ne tient pas en mémoire à 100M lignes
+        return pd.Series({g: pd.Series(ids[groupes == g]).nunique() for g in range(n_groupes)})
+
+    estime, t_approx = mesurer(f"HyperLogLog p={sketch.precision} ({len(sketch.registres) // 1024} Ko)", approx)
+    par_groupe_approx, t_groupes_approx = mesurer("HLL par groupe (lots fusionnés)", approx_groupes)
+    exact, t_exact = mesurer("nunique exact", lambda: pd.Series(ids).nunique())
+    par_groupe_exact, t_groupes_exact = mesurer("nunique exact par groupe", exact_groupes)
+
+    ecart = abs(estime - exact) / exact
+    ecarts = (par_groupe_approx - par_groupe_exact).abs() / par_groupe_exact
+    print(f"📊 global: exact {exact:,} / estimé {estime:,.0f} (écart {ecart:.2%})")
+    print(f"📊 par groupe: écart moyen {ecarts.mean():.2%}, max {ecarts.max():.2%}")
+
+    return {'exact_secondes': t_exact, 'approx_secondes': t_approx, 'ecart': ecart,
+            'groupes_exact_secondes': t_groupes_exact, 'groupes_approx_secondes': t_groupes_approx,
+            'ecart_groupes_max': float(ecarts.max())}
+
+
+def mesurer_quantiles(n_lignes=10_000_000, delta=500, n_partitions=40, q=(0.5, 0.9, 0.99)):
+    """t-digest par partition puis fusion vs quantiles exacts: temps et erreur de rang"""
+    from functools import reduce
+
+    rng = np.random.default_rng(42)
+    valeurs = rng.lognormal(1.5, 0.8, n_lignes)
+    print(f"🧪 {n_lignes:,} valeurs, {n_partitions} partitions, delta={delta}")
+
+    debut = time.perf_counter()
+    exacts = np.quantile(valeurs, q)
+    t_exact = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    digest = reduce(TDigest.fusionner, (TDigest(delta).ajouter(partie) for partie in np.array_split(valeurs, n_partitions)))
+    estimes = digest.quantiles(q)
+    t_digest = time.perf_counter() - debut
+
+    rangs = np.abs(np.searchsorted(np.sort(valeurs), estimes) / n_lignes - np.asarray(q))
+    print(f"⏱️ exact: {t_exact:.2f}s | t-digest fusionné: {t_digest:.2f}s ({len(digest.moyennes):,} centroïdes)")
+    for quantile, exact, estime, rang in zip(q, exacts, estimes, rangs):
+        print(f"📊 p{quantile * 100:g}: exact {exact:.3f} / estimé {estime:.3f} (erreur de rang {rang:.4%})")
+    return {'exact_secondes': t_exact, 'digest_secondes': t_digest, 'erreur_rang_max': float(rangs.max())}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sketches de cardinalité (HyperLogLog) et de quantiles (t-digest)")
+    parser.add_argument('--benchmark', type=int, nargs='?', const=100_000_000, default=None, metavar='LIGNES',
+                        help="Comparer nunique exact et HyperLogLog (100M lignes par défaut)")
+    parser.add_argument('--erreur', type=float, default=0.01, help="Erreur type visée (0.01 = 1%%)")
+    parser.add_argument('--groupes', type=int, default=50, help="Nombre de groupes du benchmark")
+    parser.add_argument('--benchmark-quantiles', type=int, nargs='?', const=10_000_000, default=None, metavar='LIGNES',
+                        help="t-digest fusionné par partitions vs quantiles exacts (10M valeurs par défaut)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        mesurer_gains(args.benchmark, args.erreur, args.groupes)
+    elif args.benchmark_quantiles:
+        mesurer_quantiles(args.benchmark_quantiles)
+    else:
+        from pathlib import Path
+        sketches = sketches_par_partition(Path('../data/processed'), 'sales_facts', 'order_id', erreur=args.erreur)
+        for partition, sketch in sketches.items():
+            print(f"🗂️ {partition}: ~{sketch.estimer():,.0f} commandes")
+        if sketches:
+            print(f"📊 Total (fusion): ~{fusionner_periode(sketches).estimer():,.0f} commandes")
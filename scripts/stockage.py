@@ -0,0 +1,391 @@
+# scripts/stockage.py
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import shutil
+import logging
+import hashlib
+import json
+import encodage
+
+# Extensions par format, dans l'ordre de préférence des lecteurs
+EXTENSIONS = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'csv': '.csv',
+    'xlsx': '.xlsx'
+}
+ORDRE_LECTURE = ['parquet', 'feather', 'csv', 'xlsx']
+# Formats de publication des tables nettoyées; xlsx n'est qu'un export, à côté
+# de la table publiée (un .xlsx seul laisserait en place, et prioritaires à la
+# lecture, les versions parquet/csv ou partitionnées précédentes)
+FORMATS_PUBLICATION = ('parquet', 'feather', 'csv')
+COMPRESSIONS = {'parquet': ('zstd', 'snappy', 'gzip', None), 'feather': ('zstd', 'lz4', None)}
+
+# Jeux de données partitionnés à la Hive: <nom>_clean/order_year=AAAA/order_month=M/part-00000.<ext>
+# Les colonnes de partition ne sont pas stockées dans les fichiers, elles sont
+# reconstruites à partir des répertoires. Un jeu non partitionné écrit par
+# morceaux (ETL en flux) range ses fichiers part-NNNNN directement sous <nom>_clean/
+COLONNES_PARTITION = ('order_year', 'order_month')
+PARTITION_DEFAUT = '__HIVE_DEFAULT_PARTITION__'
+
+try:
+    import pyarrow  # noqa: F401
+    FORMAT_DEFAUT = 'parquet'
+except ImportError:
+    FORMAT_DEFAUT = 'csv'
+
+
+def chemin_table(dossier, nom, format_fichier):
+    """Chemin du fichier d'une table nettoyée pour un format donné"""
+    return Path(dossier) / f"{nom}_clean{EXTENSIONS[format_fichier]}"
+
+
+def chemin_dataset(dossier, nom):
+    """Répertoire racine d'une table publiée en partitions"""
+    return Path(dossier) / f"{nom}_clean"
+
+
+def est_partitionnee(dossier, nom):
+    return chemin_dataset(dossier, nom).is_dir()
+
+
+def trouver_table(dossier, nom):
+    """Fichier (ou répertoire partitionné) le plus efficace disponible pour une table, ou None"""
+    if est_partitionnee(dossier, nom):
+        return chemin_dataset(dossier, nom)
+    for format_fichier in ORDRE_LECTURE:
+        chemin = chemin_table(dossier, nom, format_fichier)
+        if chemin.exists():
+            return chemin
+    return None
+
+
+def table_existe(dossier, nom):
+    return trouver_table(dossier, nom) is not None
+
+
+def empreinte_tables(dossier, noms):
+    """Empreinte (taille, mtime) des fichiers publiés des tables, pour détecter une republication"""
+    dossier = Path(dossier)
+    fichiers = {}
+    for nom in noms:
+        chemin = trouver_table(dossier, nom)
+        if chemin is None:
+            continue
+        for fichier in sorted(chemin.rglob('part-*')) if chemin.is_dir() else [chemin]:
+            stat = fichier.stat()
+            fichiers[str(fichier.relative_to(dossier))] = [stat.st_size, stat.st_mtime_ns]
+    return hashlib.sha256(json.dumps(fichiers, sort_keys=True).encode()).hexdigest()
+
+
+def disposition_table(dossier, nom):
+    """'partitions' (Hive année/mois), 'morceaux' (part-* sans partition), 'fichier' ou None"""
+    chemin = trouver_table(dossier, nom)
+    if chemin is None:
+        return None
+    if not chemin.is_dir():
+        return 'fichier'
+    return 'partitions' if next(chemin.glob('*=*/*=*/part-*'), None) is not None else 'morceaux'
+
+
+def format_table(dossier, nom):
+    """Format de la table publiée ('parquet', 'csv'...), y compris pour un jeu partitionné"""
+    chemin = trouver_table(dossier, nom)
+    if chemin is None:
+        return None
+    if chemin.is_dir():
+        fichier = next(chemin.glob('*=*/*=*/part-*'), None) or next(chemin.glob('part-*'), None)
+        return fichier.suffix.lstrip('.') if fichier is not None else FORMAT_DEFAUT
+    return chemin.suffix.lstrip('.')
+
+
+def _nom_morceau(numero, format_fichier):
+    return f"part-{numero:05d}{EXTENSIONS[format_fichier]}"
+
+
+def _morceaux(repertoire):
+    """Fichiers part-NNNNN d'un répertoire, dans l'ordre d'écriture"""
+    return sorted(repertoire.glob('part-*'), key=lambda f: int(f.stem.split('-', 1)[1]))
+
+
+def _ecrire_fichier(df, chemin, format_fichier, compression):
+    if format_fichier == 'parquet':
+        df.to_parquet(chemin, index=False, compression=compression)
+    elif format_fichier == 'feather':
+        df.reset_index(drop=True).to_feather(chemin, compression=compression)
+    elif format_fichier == 'csv':
+        df.to_csv(chemin, index=False, encoding='utf-8')
+    elif format_fichier == 'xlsx':
+        df.to_excel(chemin, index=False)
+    else:
+        raise ValueError(f"Format de sortie inconnu: {format_fichier}")
+
+
+def _lire_fichier(chemin, colonnes, parse_dates, dictionnaires):
+    """Lit un fichier de table (format d'après l'extension), sans réencodage"""
+    suffixe = chemin.suffix
+    if suffixe == '.parquet':
+        df = pd.read_parquet(chemin, columns=colonnes)
+    elif suffixe == '.feather':
+        df = pd.read_feather(chemin, columns=colonnes)
+    elif suffixe == '.csv':
+        df = encodage.lire_csv(chemin, dictionnaires, usecols=colonnes)
+    else:
+        df = pd.read_excel(chemin, usecols=colonnes)
+
+    for colonne in parse_dates or []:
+        if colonne in df.columns and not pd.api.types.is_datetime64_any_dtype(df[colonne]):
+            df[colonne] = pd.to_datetime(df[colonne], format='mixed', errors='coerce')
+    return df
+
+
+def _supprimer_variantes(dossier, nom, sauf=None):
+    """Retire les versions d'une table dans les autres formats lisibles (et le jeu partitionné)"""
+    for autre in FORMATS_PUBLICATION:
+        if autre != sauf:
+            chemin_table(dossier, nom, autre).unlink(missing_ok=True)
+    if sauf != 'partitions':
+        shutil.rmtree(chemin_dataset(dossier, nom), ignore_errors=True)
+
+
+def supprimer_table(dossier, nom):
+    """Retire toutes les versions publiées d'une table (hors export Excel)"""
+    _supprimer_variantes(Path(dossier), nom)
+
+
+def ecrire_table(df, dossier, nom, format_fichier=FORMAT_DEFAUT, compression='zstd'):
+    """Écrit une table nettoyée dans le format demandé et retourne le chemin
+
+    Les variantes de la même table dans les autres formats lisibles
+    (parquet/feather/csv, jeu partitionné) sont supprimées pour qu'un lecteur
+    ne tombe jamais sur une version périmée. L'export Excel (xlsx) s'ajoute à
+    la table publiée sans rien supprimer.
+    """
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin = chemin_table(dossier, nom, format_fichier)
+
+    _ecrire_fichier(df, chemin, format_fichier, compression)
+
+    if format_fichier != 'xlsx':
+        _supprimer_variantes(dossier, nom, sauf=format_fichier)
+
+    return chemin
+
+
+def partitions_de(dates):
+    """Partitions (année, mois) couvertes par un vecteur de dates; None = date manquante"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    valides = dates.dropna()
+    partitions = set(zip(valides.dt.year.astype(int), valides.dt.month.astype(int)))
+    if dates.isna().any():
+        partitions.add(None)
+    return partitions
+
+
+def _repertoire_partition(racine, partition):
+    annee, mois = (PARTITION_DEFAUT, PARTITION_DEFAUT) if partition is None else partition
+    return racine / f"{COLONNES_PARTITION[0]}={annee}" / f"{COLONNES_PARTITION[1]}={mois}"
+
+
+def _partition_du_repertoire(repertoire):
+    """(année, mois) depuis .../order_year=AAAA/order_month=M, None pour la partition par défaut"""
+    annee = repertoire.parent.name.split('=', 1)[1]
+    mois = repertoire.name.split('=', 1)[1]
+    if PARTITION_DEFAUT in (annee, mois):
+        return None
+    return int(annee), int(mois)
+
+
+def lister_partitions(dossier, nom):
+    """Partitions présentes sur disque, triées chronologiquement (partition par défaut en dernier)"""
+    racine = chemin_dataset(dossier, nom)
+    partitions = {_partition_du_repertoire(f.parent) for f in racine.glob('*=*/*=*/part-*')}
+    return sorted(partitions, key=lambda p: (p is None, p or (0, 0)))
+
+
+def ecrire_partitions(df, dossier, nom, colonne_date='order_date', format_fichier=FORMAT_DEFAUT,
+                      compression='zstd', partitions=None):
+    """Écrit une table en jeu partitionné par année/mois de colonne_date
+
+    partitions=None: réécriture complète du jeu. Sinon, seules les partitions
+    listées sont remplacées par les lignes de df qui leur appartiennent (une
+    partition sans ligne est supprimée); les autres partitions restent intactes.
+    """
+    if format_fichier not in FORMATS_PUBLICATION:
+        raise ValueError(f"Format non partitionnable: {format_fichier}")
+
+    dossier = Path(dossier)
+    racine = chemin_dataset(dossier, nom)
+    if partitions is None:
+        shutil.rmtree(racine, ignore_errors=True)
+        partitions = partitions_de(df[colonne_date])
+
+    dates = pd.to_datetime(df[colonne_date], errors='coerce')
+    annees, mois = dates.dt.year, dates.dt.month
+    contenu = df.drop(columns=[c for c in COLONNES_PARTITION if c in df.columns])
+
+    for partition in partitions:
+        masque = dates.isna() if partition is None else (annees == partition[0]) & (mois == partition[1])
+        repertoire = _repertoire_partition(racine, partition)
+        shutil.rmtree(repertoire, ignore_errors=True)
+        if masque.any():
+            repertoire.mkdir(parents=True, exist_ok=True)
+            _ecrire_fichier(contenu[masque.to_numpy()], repertoire / _nom_morceau(0, format_fichier),
+                            format_fichier, compression)
+        elif repertoire.parent.exists() and not any(repertoire.parent.iterdir()):
+            repertoire.parent.rmdir()
+
+    _supprimer_variantes(dossier, nom, sauf='partitions')
+    logging.debug(f"🗂️ {nom}: {len(partitions)} partition(s) écrite(s)")
+    return racine
+
+
+def ajouter_morceau(df, dossier, nom, numero, colonne_date=None, format_fichier=FORMAT_DEFAUT, compression='zstd'):
+    """Ajoute un morceau (part-NNNNN) à un jeu de données écrit en flux
+
+    Le morceau 0 remplace toute version publiée de la table. Avec
+    colonne_date, le morceau est réparti dans les partitions année/mois;
+    sinon il est rangé à la racine du jeu.
+    """
+    if format_fichier not in FORMATS_PUBLICATION:
+        raise ValueError(f"Format non partitionnable: {format_fichier}")
+
+    dossier = Path(dossier)
+    racine = chemin_dataset(dossier, nom)
+    if numero == 0:
+        _supprimer_variantes(dossier, nom)
+    nom_fichier = _nom_morceau(numero, format_fichier)
+
+    if colonne_date is None:
+        racine.mkdir(parents=True, exist_ok=True)
+        _ecrire_fichier(df, racine / nom_fichier, format_fichier, compression)
+        return racine
+
+    dates = pd.to_datetime(df[colonne_date], errors='coerce')
+    annees, mois = dates.dt.year, dates.dt.month
+    contenu = df.drop(columns=[c for c in COLONNES_PARTITION if c in df.columns])
+    for partition in partitions_de(dates):
+        masque = dates.isna() if partition is None else (annees == partition[0]) & (mois == partition[1])
+        repertoire = _repertoire_partition(racine, partition)
+        repertoire.mkdir(parents=True, exist_ok=True)
+        _ecrire_fichier(contenu[masque.to_numpy()], repertoire / nom_fichier, format_fichier, compression)
+    return racine
+
+
+def _partition_dans_periode(partition, debut, fin):
+    """Élagage: le mois de la partition recoupe-t-il [debut, fin] ?"""
+    if debut is None and fin is None:
+        return True
+    if partition is None:
+        return False
+    premier_jour = pd.Timestamp(year=partition[0], month=partition[1], day=1)
+    dernier_jour = premier_jour + pd.offsets.MonthEnd(0)
+    return (debut is None or dernier_jour >= debut.normalize()) and (fin is None or premier_jour <= fin)
+
+
+def filtrer_periode(df, colonne_date='order_date', debut=None, fin=None):
+    """Lignes de df dont colonne_date est dans [debut, fin] (bornes incluses, None: ouverte)"""
+    if (debut is None and fin is None) or colonne_date not in df.columns:
+        return df
+    debut = pd.Timestamp(debut) if debut is not None else None
+    fin = pd.Timestamp(fin) if fin is not None else None
+    dates = pd.to_datetime(df[colonne_date], errors='coerce')
+    # Faits triés par date (ETL): la période est une tranche trouvée par dichotomie
+    if dates.is_monotonic_increasing:
+        i = dates.searchsorted(debut, side='left') if debut is not None else 0
+        j = dates.searchsorted(fin, side='right') if fin is not None else len(dates)
+        return df.iloc[i:j].reset_index(drop=True)
+    masque = dates.notna()
+    if debut is not None:
+        masque &= dates >= debut
+    if fin is not None:
+        masque &= dates <= fin
+    return df[masque.to_numpy()].reset_index(drop=True)
+
+
+def lire_partitions(dossier, nom, debut=None, fin=None, partitions=None, colonne_date='order_date',
+                    parse_dates=None, dictionnaires=None, colonnes=None):
+    """Lit un jeu partitionné en ne parcourant que les partitions utiles
+
+    debut/fin (bornes incluses): seules les partitions dont le mois recoupe la
+    période sont lues, puis les lignes sont filtrées exactement. partitions:
+    liste explicite de partitions (année, mois) à lire à la place d'une période.
+    """
+    if dictionnaires is None:
+        dictionnaires = encodage.charger_dictionnaires(Path(dossier))
+    debut = pd.Timestamp(debut) if debut is not None else None
+    fin = pd.Timestamp(fin) if fin is not None else None
+
+    racine = chemin_dataset(dossier, nom)
+    disponibles = lister_partitions(dossier, nom)
+    if partitions is not None:
+        retenues = [p for p in disponibles if p in set(partitions)]
+    else:
+        retenues = [p for p in disponibles if _partition_dans_periode(p, debut, fin)]
+
+    # Colonnes à lire dans les fichiers (les colonnes de partition viennent des chemins)
+    colonnes_fichier = None
+    if colonnes is not None:
+        colonnes_fichier = [c for c in colonnes if c not in COLONNES_PARTITION]
+        if (debut is not None or fin is not None) and colonne_date not in colonnes_fichier:
+            colonnes_fichier.append(colonne_date)
+    dates = list(parse_dates or [])
+    if colonne_date not in dates:
+        dates.append(colonne_date)
+
+    morceaux = []
+    for partition in retenues:
+        for fichier in _morceaux(_repertoire_partition(racine, partition)):
+            morceau = _lire_fichier(fichier, colonnes_fichier, dates, dictionnaires)
+            annee, mois = (np.nan, np.nan) if partition is None else partition
+            morceau[COLONNES_PARTITION[0]] = np.full(len(morceau), annee, dtype='float64' if partition is None else 'int16')
+            morceau[COLONNES_PARTITION[1]] = np.full(len(morceau), mois, dtype='float64' if partition is None else 'int8')
+            morceaux.append(filtrer_periode(morceau, colonne_date, debut, fin))
+    
+    # Jeu écrit en flux sans partition: morceaux à la racine, pas d'élagage possible
+    if not disponibles:
+        fichiers = _morceaux(racine)
+        for fichier in fichiers:
+            morceau = _lire_fichier(fichier, colonnes_fichier, dates, dictionnaires)
+            morceaux.append(filtrer_periode(morceau, colonne_date, debut, fin))
+        logging.info(f"🗂️ {nom}: {len(fichiers)} morceaux lus")
+    else:
+        logging.info(f"🗂️ {nom}: {len(retenues)}/{len(disponibles)} partitions lues")
+    if not morceaux:
+        return None
+    df = pd.concat(morceaux, ignore_index=True)
+    if colonnes is not None:
+        df = df[[c for c in colonnes if c in df.columns]]
+    return encodage.encoder(df, dictionnaires)
+
+
+def lire_table(dossier, nom, parse_dates=None, dictionnaires=None, colonnes=None,
+               debut=None, fin=None, colonne_date='order_date'):
+    """Lit une table nettoyée en détectant son format (partitions > parquet > feather > csv > xlsx)
+
+    Les colonnes texte du schéma catégoriel sont réalignées sur les
+    dictionnaires persistés quel que soit le format. debut/fin restreignent
+    la lecture à une période (élagage des partitions si la table est
+    partitionnée, simple filtre sinon). Retourne None si absente.
+    """
+    chemin = trouver_table(dossier, nom)
+    if chemin is None:
+        return None
+
+    if dictionnaires is None:
+        dictionnaires = encodage.charger_dictionnaires(Path(dossier))
+
+    if chemin.is_dir():
+        return lire_partitions(dossier, nom, debut, fin, colonne_date=colonne_date, parse_dates=parse_dates,
+                               dictionnaires=dictionnaires, colonnes=colonnes)
+
+    if chemin.suffix == '.csv':
+        dates = [c for c in (parse_dates or []) if colonnes is None or c in colonnes]
+        df = encodage.lire_csv(chemin, dictionnaires, parse_dates=dates or None, usecols=colonnes)
+    else:
+        df = encodage.encoder(_lire_fichier(chemin, colonnes, parse_dates, dictionnaires), dictionnaires)
+
+    logging.debug(f"📂 {nom} lu depuis {chemin.name}")
+    return filtrer_periode(df, colonne_date, debut, fin)
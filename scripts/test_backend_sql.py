@@ -0,0 +1,71 @@
+# scripts/test_backend_sql.py
+"""Parité backend SQL / pandas sur les données d'exemple (data/raw)
+
+L'ETL complet et la base embarquée sont produits dans une copie de travail
+temporaire; les KPI calculés en SQL doivent être ceux de l'analyse pandas.
+Lancement: cd scripts && python -m pytest test_backend_sql.py
+"""
+import shutil
+from pathlib import Path
+import pytest
+
+RACINE = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope='module')
+def projet(tmp_path_factory):
+    """Copie de travail (scripts/ comme répertoire courant) après un ETL complet avec --base-sql"""
+    racine = tmp_path_factory.mktemp('northwind')
+    shutil.copytree(RACINE / 'data' / 'raw', racine / 'data' / 'raw')
+    for dossier in ('scripts', 'reports', 'figures'):
+        (racine / dossier).mkdir()
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(racine / 'scripts')
+        # Import après le changement de répertoire: etl.py journalise dans ../reports
+        import etl
+        import instrumentation
+        assert etl.ETLNorthwind(utiliser_cache=False, base_sql=True).executer_etl_complet() is not None
+        yield racine / 'data' / 'processed'
+        # Pas de métriques d'exécution écrites par les tests
+        instrumentation.extraire()
+
+
+def _analyser(backend, debut=None, fin=None):
+    from analysis import AnalyseNorthwind
+    analyse = AnalyseNorthwind(debut=debut, fin=fin, backend=backend)
+    analyse.charger_donnees_propres()
+    analyse.executer_analyses()
+    return analyse
+
+
+@pytest.mark.parametrize('periode', [(None, None), ('2006-02-01', '2006-04-30')], ids=['historique', 'periode'])
+def test_kpis_sql_identiques_pandas(projet, periode):
+    from analysis import _comparer_kpis
+    sql = _analyser('sql', *periode)
+    assert sql.sql is not None, "base SQL non utilisée"
+    reference = _analyser('pandas', *periode)
+    assert reference.kpis
+    assert _comparer_kpis(sql.kpis, reference.kpis) == []
+
+
+def test_agregats_sql_identiques_groupby(projet):
+    import backend_sql
+    import stockage
+    backend = backend_sql.BackendSQL.ouvrir(projet)
+    try:
+        faits = stockage.lire_table(projet, 'sales_facts', parse_dates=['order_date'])
+        assert backend_sql.verifier(faits, backend)
+    finally:
+        backend.fermer()
+
+
+def test_base_perimee_ignoree(projet):
+    import backend_sql
+    import stockage
+    assert backend_sql.trouver_base(projet) is not None
+    # Table republiée sans rechargement de la base (ETL sans --base-sql, etl_main...)
+    produits = stockage.lire_table(projet, 'products')
+    stockage.ecrire_table(produits, projet, 'products', stockage.format_table(projet, 'products'))
+    assert backend_sql.trouver_base(projet) is None
+    assert backend_sql.BackendSQL.ouvrir(projet) is None
@@ -8,6 +8,10 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
 import warnings
+import stockage
+import instrumentation
+import cube
+import index_temporel
 warnings.filterwarnings('ignore')
 
 # Configuration du style
@@ -15,30 +19,43 @@ plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
 class VisualisationsNorthwind:
-    def __init__(self):
+    def __init__(self, session=None):
         self.data_path = Path('../data/processed')
+        # SessionPipeline: tables reçues en mémoire de l'ETL au lieu d'être relues
+        self.session = session
         self.figures_path = Path('../figures')
         self.donnees = {}
+        self.cube = None
+        self.index_temporel = None
         
     def charger_donnees(self):
         """Charge les données pour la visualisation"""
         print("📥 CHARGEMENT DES DONNÉES POUR VISUALISATION")
         
         try:
-            # Charger la table de faits
-            chemin_faits = self.data_path / 'sales_facts_clean.csv'
-            if chemin_faits.exists():
-                self.donnees['sales_facts'] = pd.read_csv(chemin_faits, parse_dates=['order_date'])
-                print(f"✅ Données de vente chargées: {len(self.donnees['sales_facts'])} lignes")
+            # Table de faits reçue de la session (exécution complète) ou lue sur disque
+            if self.session is not None:
+                faits = self.session.table('sales_facts', parse_dates=['order_date'])
             else:
-                print("❌ Fichier sales_facts_clean.csv non trouvé")
+                faits = stockage.lire_table(self.data_path, 'sales_facts', parse_dates=['order_date'])
+            if faits is None:
+                print("❌ Table sales_facts_clean non trouvée")
                 return False
+            print(f"✅ Données de vente chargées: {len(faits)} lignes")
+            
+            # Faits triés par date: séries journalières lues sur les frontières de jours
+            self.index_temporel = index_temporel.IndexTemporel(faits)
+            self.donnees['sales_facts'] = self.index_temporel.faits
+            
+            # Cube d'agrégats (mois et jour issus du calendrier) dont lisent tous les graphiques
+            self.cube = cube.CubeVentes.construire(self.donnees['sales_facts'])
                 
             # Charger les produits
-            chemin_produits = self.data_path / 'products_clean.csv'
-            if chemin_produits.exists():
-                self.donnees['products'] = pd.read_csv(chemin_produits)
-                print(f"✅ Données produits chargées: {len(self.donnees['products'])} produits")
+            produits = (self.session.table('products') if self.session is not None
+                        else stockage.lire_table(self.data_path, 'products'))
+            if produits is not None:
+                self.donnees['products'] = produits
+                print(f"✅ Données produits chargées: {len(produits)} produits")
                 
             return True
             
@@ -56,22 +73,20 @@ class VisualisationsNorthwind:
         
         print("✅ Dossiers de figures créés")
     
+    @instrumentation.mesurer(entree='donnees.sales_facts')
     def visualiser_kpi_principaux(self):
         """Crée les visualisations pour les KPI principaux"""
         print("📊 CRÉATION VISUALISATIONS KPI PRINCIPAUX")
         
         if 'sales_facts' not in self.donnees:
             return False
-            
-        df = self.donnees['sales_facts']
         
         # 1. Évolution du chiffre d'affaires dans le temps
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
         fig.suptitle('DASHBOARD NORTHWIND - KPI PRINCIPAUX', fontsize=16, fontweight='bold')
         
         # Graphique 1: Évolution mensuelle du CA
-        df['mois'] = df['order_date'].dt.to_period('M').astype(str)
-        ca_mensuel = df.groupby('mois')['Line Total'].sum()
+        ca_mensuel = self.cube.agreger('mois', {'Line Total': 'sum'})['Line Total']
         
         axes[0, 0].plot(ca_mensuel.index, ca_mensuel.values, marker='o', linewidth=2, color='#2E86AB')
         axes[0, 0].set_title('Évolution du Chiffre d\'Affaires Mensuel', fontweight='bold')
@@ -80,15 +95,15 @@ class VisualisationsNorthwind:
         axes[0, 0].grid(True, alpha=0.3)
         
         # Graphique 2: Répartition par catégorie de produits
-        if 'Category' in df.columns:
-            ca_par_categorie = df.groupby('Category')['Line Total'].sum().sort_values(ascending=False)
+        if self.cube.a_colonne('Category'):
+            ca_par_categorie = self.cube.agreger('Category', {'Line Total': 'sum'})['Line Total'].sort_values(ascending=False)
             axes[0, 1].bar(ca_par_categorie.index, ca_par_categorie.values, color='#A23B72')
             axes[0, 1].set_title('Chiffre d\'Affaires par Catégorie', fontweight='bold')
             axes[0, 1].set_ylabel('Chiffre d\'Affaires ($)')
             axes[0, 1].tick_params(axis='x', rotation=45)
         
         # Graphique 3: Top 10 produits
-        top_produits = df.groupby('product_name')['Line Total'].sum().sort_values(ascending=False).head(10)
+        top_produits = self.cube.agreger('product_name', {'Line Total': 'sum'})['Line Total'].sort_values(ascending=False).head(10)
         axes[1, 0].barh(range(len(top_produits)), top_produits.values, color='#F18F01')
         axes[1, 0].set_yticks(range(len(top_produits)))
         axes[1, 0].set_yticklabels(top_produits.index, fontsize=9)
@@ -96,7 +111,7 @@ class VisualisationsNorthwind:
         axes[1, 0].set_xlabel('Chiffre d\'Affaires ($)')
         
         # Graphique 4: Performance des employés
-        perf_employes = df.groupby('employee_name')['Line Total'].sum().sort_values(ascending=False)
+        perf_employes = self.cube.agreger('employee_name', {'Line Total': 'sum'})['Line Total'].sort_values(ascending=False)
         axes[1, 1].bar(perf_employes.index, perf_employes.values, color='#C73E1D')
         axes[1, 1].set_title('Performance des Employés', fontweight='bold')
         axes[1, 1].set_ylabel('Chiffre d\'Affaires ($)')
@@ -109,21 +124,20 @@ class VisualisationsNorthwind:
         print("✅ Graphiques KPI principaux sauvegardés")
         return True
     
+    @instrumentation.mesurer(entree='donnees.sales_facts')
     def visualiser_analyse_produits(self):
         """Visualisations détaillées pour l'analyse produits"""
         print("📦 CRÉATION VISUALISATIONS PRODUITS")
         
         if 'sales_facts' not in self.donnees:
             return False
-            
-        df = self.donnees['sales_facts']
         
         # 1. Analyse de la marge par produit
         fig, axes = plt.subplots(1, 2, figsize=(15, 6))
         
         # Graphique marges
-        if 'Standard Cost' in df.columns and 'Unit Price' in df.columns:
-            df_produits = df.groupby('product_name').agg({
+        if self.cube.a_colonne('Standard Cost') and self.cube.a_colonne('Unit Price'):
+            df_produits = self.cube.agreger('product_name', {
                 'Line Total': 'sum',
                 'Quantity': 'sum',
                 'Unit Price': 'mean',
@@ -143,8 +157,8 @@ class VisualisationsNorthwind:
             axes[0].set_xlabel('Marge (%)')
         
         # 2. Quantités vendues par catégorie
-        if 'Category' in df.columns:
-            qte_par_categorie = df.groupby('Category')['Quantity'].sum().sort_values(ascending=False)
+        if self.cube.a_colonne('Category'):
+            qte_par_categorie = self.cube.agreger('Category', {'Quantity': 'sum'})['Quantity'].sort_values(ascending=False)
             axes[1].pie(qte_par_categorie.values, labels=qte_par_categorie.index, autopct='%1.1f%%')
             axes[1].set_title('Répartition des Ventes par Catégorie', fontweight='bold')
         
@@ -155,17 +169,16 @@ class VisualisationsNorthwind:
         print("✅ Graphiques produits sauvegardés")
         return True
     
+    @instrumentation.mesurer(entree='donnees.sales_facts')
     def visualiser_analyse_clients(self):
         """Visualisations pour l'analyse clients"""
         print("👥 CRÉATION VISUALISATIONS CLIENTS")
         
         if 'sales_facts' not in self.donnees:
             return False
-            
-        df = self.donnees['sales_facts']
         
         # Analyse des clients
-        analyse_clients = df.groupby('customer_company').agg({
+        analyse_clients = self.cube.agreger('customer_company', {
             'Line Total': 'sum',
             'order_id': 'nunique',
             'Quantity': 'sum'
@@ -202,22 +215,16 @@ class VisualisationsNorthwind:
         print("✅ Graphiques clients sauvegardés")
         return True
     
+    @instrumentation.mesurer(entree='donnees.sales_facts')
     def visualiser_tendances_temporelles(self):
         """Visualisations des tendances temporelles"""
         print("📅 CRÉATION VISUALISATIONS TENDANCES")
         
         if 'sales_facts' not in self.donnees:
             return False
-            
-        df = self.donnees['sales_facts']
-        
-        # Préparation des données temporelles
-        df['mois_annee'] = df['order_date'].dt.to_period('M').astype(str)
-        df['semaine'] = df['order_date'].dt.isocalendar().week
-        df['jour_semaine'] = df['order_date'].dt.day_name()
         
-        # Agrégations temporelles
-        tendances_mensuelles = df.groupby('mois_annee').agg({
+        # Agrégations temporelles (mois et jour issus du calendrier)
+        tendances_mensuelles = self.cube.agreger('mois', {
             'Line Total': 'sum',
             'order_id': 'nunique',
             'Quantity': 'sum'
@@ -227,7 +234,7 @@ class VisualisationsNorthwind:
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         
         # Tendance CA mensuel
-        axes[0, 0].plot(tendances_mensuelles['mois_annee'], tendances_mensuelles['Line Total'], 
+        axes[0, 0].plot(tendances_mensuelles['mois'], tendances_mensuelles['Line Total'], 
                        marker='o', linewidth=2, color='#264653')
         axes[0, 0].set_title('Tendance du Chiffre d\'Affaires Mensuel', fontweight='bold')
         axes[0, 0].set_ylabel('CA ($)')
@@ -235,7 +242,7 @@ class VisualisationsNorthwind:
         axes[0, 0].grid(True, alpha=0.3)
         
         # Tendance nombre de commandes
-        axes[0, 1].plot(tendances_mensuelles['mois_annee'], tendances_mensuelles['order_id'], 
+        axes[0, 1].plot(tendances_mensuelles['mois'], tendances_mensuelles['order_id'], 
                        marker='s', linewidth=2, color='#2A9D8F')
         axes[0, 1].set_title('Tendance du Nombre de Commandes', fontweight='bold')
         axes[0, 1].set_ylabel('Nombre de Commandes')
@@ -243,7 +250,7 @@ class VisualisationsNorthwind:
         axes[0, 1].grid(True, alpha=0.3)
         
         # Ventes par jour de la semaine
-        ventes_par_jour = df.groupby('jour_semaine')['Line Total'].sum()
+        ventes_par_jour = self.cube.agreger('jour_semaine', {'Line Total': 'sum'})['Line Total']
         jours_ordre = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         ventes_par_jour = ventes_par_jour.reindex(jours_ordre)
         
@@ -253,13 +260,8 @@ class VisualisationsNorthwind:
         axes[1, 0].tick_params(axis='x', rotation=45)
         
         # Heatmap des ventes (exemple simplifié)
-        if 'Category' in df.columns:
-            ventes_categorie_mois = df.pivot_table(
-                values='Line Total', 
-                index='Category', 
-                columns='mois_annee', 
-                aggfunc='sum'
-            ).fillna(0)
+        if self.cube.a_colonne('Category'):
+            ventes_categorie_mois = self.cube.agreger(['Category', 'mois'], {'Line Total': 'sum'})['Line Total'].unstack('mois').fillna(0)
             
             sns.heatmap(ventes_categorie_mois, ax=axes[1, 1], cmap='YlOrRd', cbar_kws={'label': 'CA ($)'})
             axes[1, 1].set_title('Heatmap: CA par Catégorie et Mois', fontweight='bold')
@@ -271,18 +273,16 @@ class VisualisationsNorthwind:
         print("✅ Graphiques tendances sauvegardés")
         return True
     
+    @instrumentation.mesurer(entree='donnees.sales_facts')
     def creer_visualisations_interactives(self):
         """Crée des visualisations interactives avec Plotly"""
         print("🎨 CRÉATION VISUALISATIONS INTERACTIVES")
         
         if 'sales_facts' not in self.donnees:
             return False
-            
-        df = self.donnees['sales_facts']
         
         # 1. Graphique interactif: Évolution du CA
-        df['mois'] = df['order_date'].dt.to_period('M').astype(str)
-        ca_mensuel = df.groupby('mois')['Line Total'].sum().reset_index()
+        ca_mensuel = self.cube.agreger('mois', {'Line Total': 'sum'}).reset_index()
         
         fig1 = px.line(ca_mensuel, x='mois', y='Line Total', 
                       title='Évolution du Chiffre d\'Affaires Mensuel',
@@ -290,8 +290,15 @@ class VisualisationsNorthwind:
         fig1.update_traces(line=dict(width=3), marker=dict(size=8))
         fig1.write_html(str(self.figures_path / 'interactifs/evolution_ca.html'))
         
+        # 1b. CA journalier avec sélecteur de période (index temporel, sans groupby)
+        ca_journalier = self.index_temporel.sommes_journalieres('Line Total').reset_index()
+        fig1b = px.line(ca_journalier, x='jour', y='line_total', title='Chiffre d\'Affaires Journalier',
+                        labels={'line_total': 'Chiffre d\'Affaires ($)', 'jour': 'Jour'})
+        fig1b.update_xaxes(rangeslider_visible=True)
+        fig1b.write_html(str(self.figures_path / 'interactifs/ca_journalier.html'))
+        
         # 2. Graphique interactif: Top produits
-        top_produits = df.groupby('product_name')['Line Total'].sum().sort_values(ascending=False).head(15).reset_index()
+        top_produits = self.cube.agreger('product_name', {'Line Total': 'sum'}).sort_values('Line Total', ascending=False).head(15).reset_index()
         
         fig2 = px.bar(top_produits, x='Line Total', y='product_name', orientation='h',
                      title='Top 15 Produits par Chiffre d\'Affaires',
@@ -300,8 +307,8 @@ class VisualisationsNorthwind:
         fig2.write_html(str(self.figures_path / 'interactifs/top_produits.html'))
         
         # 3. Graphique interactif: Répartition par catégorie
-        if 'Category' in df.columns:
-            ca_categories = df.groupby('Category')['Line Total'].sum().reset_index()
+        if self.cube.a_colonne('Category'):
+            ca_categories = self.cube.agreger('Category', {'Line Total': 'sum'}).reset_index()
             
             fig3 = px.pie(ca_categories, values='Line Total', names='Category',
                          title='Répartition du CA par Catégorie')
@@ -326,13 +333,13 @@ class VisualisationsNorthwind:
                       row=1, col=2)
         
         # Graphique 3: Répartition catégories
-        if 'Category' in df.columns:
+        if self.cube.a_colonne('Category'):
             fig4.add_trace(go.Pie(labels=ca_categories['Category'], values=ca_categories['Line Total'],
                                  name='Catégories'),
                           row=2, col=1)
         
         # Graphique 4: Performance employés
-        perf_employes = df.groupby('employee_name')['Line Total'].sum().sort_values(ascending=False).head(10).reset_index()
+        perf_employes = self.cube.agreger('employee_name', {'Line Total': 'sum'}).sort_values('Line Total', ascending=False).head(10).reset_index()
         fig4.add_trace(go.Bar(x=perf_employes['employee_name'], y=perf_employes['Line Total'],
                              name='Performance Employés'),
                       row=2, col=2)
@@ -408,8 +415,8 @@ class VisualisationsNorthwind:
             return False
 
 # Fonction pour exécuter directement
-def executer_visualisations():
-    viz = VisualisationsNorthwind()
+def executer_visualisations(session=None):
+    viz = VisualisationsNorthwind(session)
     return viz.executer_visualisations_completes()
 
 if __name__ == "__main__":